@@ -0,0 +1,82 @@
+"""
+Compare AlertEngine against a linear scan over every alert on each price tick.
+
+Alerts get random targets around each ticker's starting price; prices then
+random-walk and each tick evaluates every ticker once. The linear scan is what
+check_alerts did per request (every alert, every time); both sides fire
+exactly the same alerts.
+
+Run from backend/:
+    python -m benchmarks.bench_alert_engine [--alerts 100000] [--tickers 500] [--ticks 50]
+"""
+
+import argparse
+import random
+import time
+from src.alert_engine import AlertEngine
+
+
+def make_alerts(n: int, tickers: list[str], rng: random.Random) -> list[dict]:
+    alerts = []
+    for i in range(n):
+        condition = rng.choice(["above", "below"])
+        offset = rng.uniform(0.01, 0.2)
+        target = 100 * (1 + offset if condition == "above" else 1 - offset)
+        alerts.append({"_id": str(i), "ticker": rng.choice(tickers), "target_price": round(target, 2),
+                       "condition": condition})
+    return alerts
+
+
+def linear_scan(alerts: dict[str, dict], prices: dict[str, float]) -> list[dict]:
+    fired = []
+    for alert_id, a in list(alerts.items()):
+        price = prices[a["ticker"]]
+        if (a["condition"] == "above" and price >= a["target_price"]) or \
+           (a["condition"] == "below" and price <= a["target_price"]):
+            fired.append(alerts.pop(alert_id))
+    return fired
+
+
+def main(args):
+    rng = random.Random(0)
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    alerts = make_alerts(args.alerts, tickers, rng)
+
+    start = time.perf_counter()
+    engine = AlertEngine()
+    for a in alerts:
+        engine.add(a)
+    build = time.perf_counter() - start
+    remaining = {a["_id"]: a for a in alerts}
+
+    prices = dict.fromkeys(tickers, 100.0)
+    engine_time = scan_time = 0.0
+    fired_total = 0
+    for _ in range(args.ticks):
+        prices = {t: p * (1 + rng.gauss(0, 0.02)) for t, p in prices.items()}
+
+        start = time.perf_counter()
+        fired_engine = engine.evaluate_many(prices)
+        engine_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fired_scan = linear_scan(remaining, prices)
+        scan_time += time.perf_counter() - start
+
+        assert sorted(a["_id"] for a in fired_engine) == sorted(a["_id"] for a in fired_scan)
+        fired_total += len(fired_engine)
+
+    print(f"{args.alerts} alerts over {args.tickers} tickers, {args.ticks} ticks "
+          f"(every ticker priced each tick), {fired_total} fired, {len(engine)} left")
+    print(f"index build      : {build * 1000:8.1f} ms")
+    print(f"heap engine      : {engine_time / args.ticks * 1000:8.2f} ms/tick")
+    print(f"linear scan      : {scan_time / args.ticks * 1000:8.2f} ms/tick   "
+          f"({scan_time / engine_time:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=50)
+    main(parser.parse_args())
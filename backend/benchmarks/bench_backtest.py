@@ -0,0 +1,40 @@
+"""
+Benchmark the vectorised backtester against the per-bar reference loop.
+
+Run from backend/:
+    python -m benchmarks.bench_backtest [sizes...]
+"""
+
+import contextlib
+import os
+import sys
+import time
+import numpy as np
+from src.backtester import run_backtest, _run_backtest_loop
+
+
+def make_series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    return prices, prices * (1 + rng.normal(0, 0.02, n))
+
+
+def timed(fn, *args):
+    # The reference loop prints one debug line per bar; keep it off the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'bars':>10} {'loop (s)':>10} {'vector (s)':>11} {'speedup':>8}  parity")
+    for n in sizes:
+        y, p = make_series(n)
+        expected, t_loop = timed(_run_backtest_loop, y, p)
+        actual, t_vec    = timed(run_backtest, y, p)
+        print(f"{n:>10,} {t_loop:>10.3f} {t_vec:>11.3f} {t_loop / t_vec:>7.1f}x  {actual == expected}")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,68 @@
+"""
+Cost of keeping RSI-14 / SMA-14 / MACD current as bars arrive: recomputing the
+whole history with `ta` on every bar (what add_technical_indicators did) vs
+one IndicatorState.update() per bar, and `ta` per ticker vs the vectorised
+batch mode over many tickers.
+
+Synthetic closes, no network. Run from backend/:
+    python -m benchmarks.bench_indicators [--history 17000] [--new-bars 200] [--tickers 100]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, SMAIndicator
+
+
+def ta_all(close: pd.Series) -> dict:
+    macd = MACD(close=close)
+    return {
+        "rsi": RSIIndicator(close=close, window=14).rsi(),
+        "sma": SMAIndicator(close=close, window=14).sma_indicator(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+    }
+
+
+def main(args):
+    from src.indicators import IndicatorState, compute_indicators
+
+    rng = np.random.default_rng(9)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, args.history + args.new_bars)))
+    print(f"{args.history} bars of history, then {args.new_bars} new bars one at a time")
+
+    start = time.perf_counter()
+    for end in range(args.history + 1, args.history + args.new_bars + 1):
+        ta_all(pd.Series(closes[:end]))
+    full = (time.perf_counter() - start) / args.new_bars
+
+    start = time.perf_counter()
+    state = IndicatorState.from_history(closes[:args.history])
+    seed = time.perf_counter() - start
+    start = time.perf_counter()
+    for close in closes[args.history:]:
+        state.update(close)
+    streamed = (time.perf_counter() - start) / args.new_bars
+    print(f"{'ta recompute per bar':<26} {full * 1e6:10.1f} µs/bar")
+    print(f"{'streaming update':<26} {streamed * 1e6:10.1f} µs/bar   ({full / streamed:.0f}x; one-off seed {seed * 1000:.1f} ms)")
+
+    matrix = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (args.history, args.tickers)), axis=0))
+    start = time.perf_counter()
+    for j in range(args.tickers):
+        ta_all(pd.Series(matrix[:, j]))
+    per_ticker = time.perf_counter() - start
+    start = time.perf_counter()
+    compute_indicators(matrix)
+    batch = time.perf_counter() - start
+    print(f"{args.tickers} tickers x {args.history} bars: ta per ticker {per_ticker * 1000:.1f} ms   "
+          f"batch {batch * 1000:.1f} ms   ({per_ticker / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=17000)   # ~90 days of 5-min bars incl. extended hours
+    parser.add_argument("--new-bars", type=int, default=200)
+    parser.add_argument("--tickers", type=int, default=100)
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+"""
+/healthz latency during a burst of logins, with bcrypt verified inline on the
+event loop (the old behaviour) vs on the bcrypt thread pool.
+
+Runs the app in-process over httpx's ASGI transport, so everything shares one
+event loop exactly as under a single uvicorn worker. The users collection is
+a stub returning one user hashed at BCRYPT_ROUNDS; no database is needed.
+
+Run from backend/:
+    python -m benchmarks.bench_login_storm [--logins 40] [--concurrency 20] [--probe-every 0.01]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+from unittest.mock import MagicMock, patch
+import httpx
+import numpy as np
+
+
+async def verify_inline(plain_password, hashed_password):
+    from src.utils import pwd_context
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def storm(app, args) -> tuple[np.ndarray, float]:
+    latencies = []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probe():
+            # latency is measured from when each probe was due, not when the
+            # blocked loop finally got round to sending it
+            due = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/healthz")
+                latencies.append(time.perf_counter() - due)
+                due += args.probe_every
+
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with sem:
+                res = await client.post("/login", json={"email": "bench@example.com", "password": "hunter22"})
+                assert res.status_code == 200, res.text
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(0.2)
+        latencies.clear()   # warm-up
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.1)   # let probes held up by the last login report
+        done.set()
+        await prober
+    return np.array(latencies) * 1000, elapsed
+
+
+def main(args):
+    import main as api
+    from src.utils import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, hash_password
+
+    stored = {"_id": "u1", "email": "bench@example.com", "password": hash_password("hunter22")}
+
+    async def find_one(*args, **kwargs):
+        await asyncio.sleep(0)   # a real query yields to the loop
+        return dict(stored)
+
+    db = MagicMock()
+    db.users.find_one = find_one
+    print(f"{args.logins} logins ({args.concurrency} concurrent), bcrypt rounds {BCRYPT_ROUNDS}, "
+          f"{PASSWORD_HASH_WORKERS} pool threads; /healthz probed every {args.probe_every * 1000:.0f} ms")
+    for label, verify in [("inline (before)", verify_inline), ("thread pool", None)]:
+        with patch("src.mongo_crud.db", db), \
+             (patch("src.mongo_crud.verify_and_update_async", verify) if verify else contextlib.nullcontext()), \
+             open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            lat, elapsed = asyncio.run(storm(api.app, args))
+        print(f"{label:<16} logins/s {args.logins / elapsed:6.1f}   /healthz p50 {np.percentile(lat, 50):7.1f} ms   "
+              f"p99 {np.percentile(lat, 99):7.1f} ms   max {lat.max():7.1f} ms   ({len(lat)} probes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--probe-every", type=float, default=0.01)
+    main(parser.parse_args())
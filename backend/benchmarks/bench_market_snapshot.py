@@ -0,0 +1,77 @@
+"""
+Lookup cost against a full-market grouped-daily response (~12k tickers):
+the columnar MarketSnapshot vs working on the raw list of result dicts, as
+/market/top did before (and as top-N lists would without the table).
+
+Synthetic results, no network. Run from backend/:
+    python -m benchmarks.bench_market_snapshot [--tickers 12000] [--n 20] [--repeat 2000]
+"""
+
+import argparse
+import random
+import string
+import time
+
+
+def synthetic_results(n: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    letters = string.ascii_uppercase
+    results = []
+    for i in range(n):
+        ticker = "".join(letters[(i // 26 ** k) % 26] for k in range(4))
+        o = rng.uniform(1, 500)
+        c = o * rng.uniform(0.8, 1.2)
+        results.append({"T": ticker, "o": o, "h": max(o, c) * 1.01, "l": min(o, c) * 0.99, "c": c,
+                        "v": rng.randint(0, 50_000_000), "vw": (o + c) / 2, "t": 0, "n": 1})
+    return results
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(args):
+    from src.market_snapshot import MarketSnapshot
+
+    results = synthetic_results(args.tickers)
+    start = time.perf_counter()
+    snap = MarketSnapshot("2024-01-02", results)
+    build_ms = (time.perf_counter() - start) * 1000
+    probe = results[len(results) // 2]["T"]
+    top20 = [r["T"] for r in results[:20]]
+
+    def raw_bar():
+        return next(r for r in results if r["T"] == probe)
+
+    def raw_top20():
+        wanted = set(top20)
+        return {r["T"]: r for r in results if r["T"] in wanted}
+
+    def raw_gainers():
+        return sorted(results, key=lambda r: (r["c"] - r["o"]) / r["o"], reverse=True)[:args.n]
+
+    print(f"{len(snap)} tickers; snapshot built in {build_ms:.1f} ms, "
+          f"{sum(getattr(snap, f).nbytes for f in ('open', 'high', 'low', 'close', 'volume', 'change_pct')) / 1024:.0f} KiB of columns")
+    rows = [
+        ("one ticker's bar", raw_bar, lambda: snap.bar(probe)),
+        ("20 /market/top bars", raw_top20, lambda: [snap.bar(t) for t in top20]),
+        (f"top {args.n} gainers", raw_gainers, lambda: snap.top(args.n, by="gainers")),
+        (f"top {args.n} by volume (>=100k)", lambda: sorted((r for r in results if r["v"] >= 100_000),
+                                                            key=lambda r: r["v"], reverse=True)[:args.n],
+         lambda: snap.top(args.n, by="volume", min_volume=100_000)),
+    ]
+    for label, raw, columnar in rows:
+        slow = per_call_us(raw, max(1, args.repeat // 20))
+        fast = per_call_us(columnar, args.repeat)
+        print(f"{label:<28} raw dicts {slow:9.1f} µs   snapshot {fast:8.1f} µs   ({slow / fast:6.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=12000)
+    parser.add_argument("--n", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,150 @@
+"""
+Load-test /ws/prices with many concurrent WebSocket subscribers.
+
+The app runs under uvicorn in a background thread with a fake price feed
+(random walk, fixed simulated upstream latency) in place of Polygon, so the
+numbers show the hub's fan-out cost and upstream call volume, not Polygon's.
+
+Run from backend/:
+    python -m benchmarks.bench_price_hub [--clients 1000] [--tickers 50] [--per-client 3]
+                                         [--interval 1.0] [--duration 10] [--ws wsproto]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import string
+import threading
+import time
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+import numpy as np
+import uvicorn
+import websockets
+
+
+class FakeFeed:
+    """Random-walk quotes; counts upstream calls per ticker."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = Counter()
+        self.prices: dict[str, float] = {}
+
+    async def __call__(self, ticker: str) -> dict:
+        self.calls[ticker] += 1
+        await asyncio.sleep(self.latency)
+        price = self.prices.get(ticker, 100.0) * (1 + random.gauss(0, 0.001))
+        self.prices[ticker] = price
+        return {"ticker": ticker, "price": round(price, 2), "change": 0.0, "change_pct": 0.0,
+                "volume": 0, "ts": time.time()}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_tickers(n: int) -> list[str]:
+    letters = string.ascii_uppercase
+    return [letters[i // 26 % 26] + letters[i % 26] + "Q" for i in range(n)]
+
+
+async def client(url: str, tickers: list[str], stop: asyncio.Event, latencies: list, counts: Counter,
+                 ready: asyncio.Event, connected: list):
+    async with websockets.connect(url, max_queue=None) as ws:
+        await ws.send(json.dumps({"subscribe": tickers}))
+        connected.append(1)
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            message = json.loads(raw)
+            if message["type"] == "price" and ready.is_set():
+                latencies.append(time.time() - message["ts"])
+                counts["messages"] += 1
+
+
+async def run_clients(url: str, args, universe: list[str], feed: FakeFeed) -> tuple[list, Counter, float]:
+    stop, ready = asyncio.Event(), asyncio.Event()
+    latencies, counts, connected = [], Counter(), []
+    rng = random.Random(0)
+    tasks = []
+    for _ in range(args.clients):
+        tickers = rng.sample(universe, args.per_client)
+        tasks.append(asyncio.create_task(client(url, tickers, stop, latencies, counts, ready, connected)))
+        await asyncio.sleep(0)
+    while len(connected) < args.clients:
+        await asyncio.sleep(0.05)
+        for t in tasks:
+            if t.done() and t.exception():
+                raise t.exception()
+
+    latencies.clear()
+    counts.clear()
+    calls_before = sum(feed.calls.values())
+    ready.set()
+    start = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    counts["upstream"] = sum(feed.calls.values()) - calls_before
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return latencies, counts, elapsed
+
+
+def main(args):
+    import main as api
+
+    feed = FakeFeed(args.latency)
+    universe = make_tickers(args.tickers)
+    port = free_port()
+
+    with patch("main._load_model", return_value=MagicMock()), \
+         patch("main.get_quote", new=feed), \
+         patch("main.get_active_alerts", new_callable=AsyncMock, return_value=[]), \
+         patch("main.PRICE_POLL_INTERVAL", args.interval):
+        server = uvicorn.Server(uvicorn.Config(api.app, port=port, log_level="warning", ws=args.ws))
+        thread = threading.Thread(target=server.run, daemon=True)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            thread.start()
+            while not server.started:
+                if not thread.is_alive():
+                    raise SystemExit("uvicorn failed to start (try --ws wsproto)")
+                time.sleep(0.05)
+
+        latencies, counts, elapsed = asyncio.run(
+            run_clients(f"ws://127.0.0.1:{port}/ws/prices", args, universe, feed))
+
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    distinct = len({t for t in feed.calls})
+    lat = np.array(latencies) * 1000
+    polling_rate = args.clients * args.per_client / args.interval   # every client polling /price itself
+    print(f"{args.clients} clients x {args.per_client} tickers over {distinct} distinct tickers, "
+          f"{args.interval}s hub interval, {elapsed:.1f}s measured")
+    print(f"upstream calls/s : {counts['upstream'] / elapsed:8.1f}   (clients polling /price at the same "
+          f"interval: {polling_rate:.0f}/s, 1-2 Polygon calls each)")
+    print(f"messages/s       : {counts['messages'] / elapsed:8.1f}")
+    if len(lat):
+        print(f"fan-out latency  : p50 {np.percentile(lat, 50):.1f} ms   p95 {np.percentile(lat, 95):.1f} ms   "
+              f"p99 {np.percentile(lat, 99):.1f} ms   (quote fetched → client received)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--per-client", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--ws", default="auto", help="uvicorn WebSocket implementation (auto, websockets, wsproto)")
+    main(parser.parse_args())
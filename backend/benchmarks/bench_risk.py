@@ -0,0 +1,95 @@
+"""
+Risk metrics for many tickers: a per-ticker, per-level, per-window pandas
+loop (how calculate_var computed one number) vs the vectorised functions in
+src/stock_stats.py. Also times the VaR step of /predict before (a Polygon
+daily fetch per call, stubbed with --latency) and after (derived from the
+5-min bars already in memory).
+
+Synthetic returns, no network. Run from backend/:
+    python -m benchmarks.bench_risk [--tickers 100] [--days 250] [--window 20] [--latency 0.15]
+"""
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+LEVELS = (0.9, 0.95, 0.99)
+
+
+def loop_metrics(frame: pd.DataFrame, window: int) -> dict:
+    out = {}
+    for ticker in frame.columns:
+        r = frame[ticker].dropna()
+        per_level = {}
+        for level in LEVELS:
+            var = r.quantile(1 - level)
+            per_level[level] = (var, r[r <= var].mean(), r.mean() + r.std() * -1.6448536,
+                                [r.iloc[i - window:i].quantile(1 - level) for i in range(window, len(r) + 1)])
+        out[ticker] = per_level
+    return out
+
+
+def vector_metrics(frame: pd.DataFrame, window: int) -> dict:
+    from src.stock_stats import risk_metrics, rolling_risk_metrics
+    metrics = risk_metrics(frame.to_numpy(), LEVELS)
+    rolling = {t: rolling_risk_metrics(frame[t].dropna().to_numpy(), window, LEVELS) for t in frame.columns}
+    return {"metrics": metrics, "rolling": rolling}
+
+
+async def predict_var_before(ticker: str, latency: float) -> float:
+    from src.stock_stats import calculate_var, _returns_cache
+
+    async def get_json(url, params):
+        await asyncio.sleep(latency)
+        days = pd.bdate_range("2025-01-02", periods=63)
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(days))))
+        return {"results": [{"t": int(d.timestamp() * 1000), "c": c} for d, c in zip(days, closes)]}
+
+    _returns_cache.clear()   # the old calculate_var had no cache
+    with patch("src.polygon_client.get_json", side_effect=get_json):
+        return await calculate_var(ticker, "2025-01-02", "2025-04-01", 0.95)
+
+
+def predict_var_after(bars: pd.DataFrame) -> float:
+    from src.stock_stats import daily_returns_from_bars, historical_var
+    return float(historical_var(daily_returns_from_bars(bars), 0.95))
+
+
+def main(args):
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range("2024-01-02", periods=args.days)
+    frame = pd.DataFrame(rng.normal(0, 0.02, (args.days, args.tickers)), index=index,
+                         columns=[f"T{i:03d}" for i in range(args.tickers)])
+    print(f"{args.tickers} tickers x {args.days} days x {len(LEVELS)} levels, rolling window {args.window}")
+    start = time.perf_counter()
+    loop_metrics(frame, args.window)
+    loop_s = time.perf_counter() - start
+    start = time.perf_counter()
+    vector_metrics(frame, args.window)
+    vec_s = time.perf_counter() - start
+    print(f"{'pandas loop':<24} {loop_s * 1000:9.1f} ms")
+    print(f"{'vectorised':<24} {vec_s * 1000:9.1f} ms   ({loop_s / vec_s:.0f}x)")
+
+    days = pd.bdate_range("2025-01-02", periods=63)
+    bar_index = pd.DatetimeIndex([d + pd.Timedelta(hours=14, minutes=30 + 5 * i) for d in days for i in range(78)])
+    bars = pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(bar_index))))}, index=bar_index)
+    start = time.perf_counter()
+    asyncio.run(predict_var_before("AAPL", args.latency))
+    before = time.perf_counter() - start
+    start = time.perf_counter()
+    predict_var_after(bars)
+    after = time.perf_counter() - start
+    print(f"/predict VaR step: Polygon daily fetch {before * 1000:.1f} ms (at {args.latency * 1000:.0f} ms RTT)   "
+          f"from loaded 5-min bars {after * 1000:.1f} ms, no upstream call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.15)
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Cost of min-max scaling a long close history: sklearn's MinMaxScaler on a
+deep-copied frame (what scale_data did) vs StreamingMinMaxScaler on the close
+array (what the predictor does), and refitting the whole history on every new bar vs partial_fit plus an
+in-place transform of the new bar.
+
+Synthetic bars, no network. Run from backend/:
+    python -m benchmarks.bench_scaler [--history 1000000] [--new-bars 200]
+"""
+
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+
+def old_scale_data(df: pd.DataFrame, column_name: str = "Close"):
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    df_scaled = df.copy()
+    df_scaled[column_name] = scaler.fit_transform(df[[column_name]])
+    return scaler, df_scaled
+
+
+def measure(fn) -> tuple[float, int]:
+    """(seconds, peak bytes allocated) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(args):
+    from src.scaler import StreamingMinMaxScaler
+
+    rng = np.random.default_rng(5)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, args.history + args.new_bars)))
+    df = pd.DataFrame({
+        "Open": closes, "High": closes * 1.001, "Low": closes * 0.999, "Close": closes,
+        "Volume": rng.integers(1_000, 100_000, len(closes)).astype(np.float64),
+    }).iloc[:args.history]
+    print(f"{args.history} bars x {df.shape[1]} columns ({df.memory_usage().sum() / 1e6:.0f} MB)")
+
+    old_t, old_peak = measure(lambda: old_scale_data(df))
+    new_t, new_peak = measure(lambda: StreamingMinMaxScaler().fit_transform(df["Close"].to_numpy()))
+    print(f"{'MinMaxScaler + deep copy':<28} {old_t * 1000:8.1f} ms   peak {old_peak / 1e6:7.1f} MB")
+    print(f"{'streaming on close array':<28} {new_t * 1000:8.1f} ms   peak {new_peak / 1e6:7.1f} MB"
+          f"   ({old_t / new_t:.1f}x faster, {old_peak / new_peak:.1f}x less memory)")
+
+    start = time.perf_counter()
+    for end in range(args.history + 1, args.history + args.new_bars + 1):
+        MinMaxScaler().fit_transform(closes[:end].reshape(-1, 1))
+    refit = (time.perf_counter() - start) / args.new_bars
+    scaler = StreamingMinMaxScaler().fit(closes[:args.history])
+    buf = closes[:args.history + args.new_bars].copy()
+    start = time.perf_counter()
+    for i in range(args.history, args.history + args.new_bars):
+        bar = buf[i:i + 1]
+        scaler.partial_fit(bar)
+        scaler.transform(bar, out=bar)
+    streamed = (time.perf_counter() - start) / args.new_bars
+    print(f"{'refit whole history per bar':<28} {refit * 1e6:10.1f} µs/bar")
+    print(f"{'partial_fit + in-place':<28} {streamed * 1e6:10.1f} µs/bar   ({refit / streamed:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--new-bars", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+"""
+Benchmark /predict/batch against one /predict call per ticker.
+
+Bar data is synthetic and served with a fixed simulated Polygon latency, so
+the numbers reflect the request fan-out and model calls rather than the
+network. Uses the real LSTM from MODEL_PATH.
+
+Run from backend/:
+    python -m benchmarks.bench_scan [ticker counts...] [--bars N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import string
+import time
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+
+def make_tickers(n: int) -> list[str]:
+    letters = string.ascii_uppercase
+    return [letters[i // 26 % 26] + letters[i % 26] + "X" for i in range(n)]
+
+
+def fake_loader(bars: int, latency: float):
+    async def load_data(ticker, start=None, end=None, interval=None):
+        await asyncio.sleep(latency)
+        rng = np.random.default_rng(abs(hash(ticker)) % 2**32)
+        closes = 100 + np.cumsum(rng.normal(0, 0.3, bars))
+        index = pd.date_range("2025-01-02 14:30", periods=bars, freq="5min", name="t")
+        return pd.DataFrame({"Close": closes}, index=index)
+    return load_data
+
+
+def timed(fn):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+
+def main(counts: list[int], bars: int, latency: float):
+    from main import app
+    from src.predictor import reset_state
+
+    app.state.limiter.enabled = False
+    # /predict derives VaR from the bars it loaded, so load_data is the only upstream
+    with patch("main.load_data", new=fake_loader(bars, latency)), TestClient(app) as client:
+
+        def scan(tickers):
+            res = client.get("/predict/batch", params={"tickers": ",".join(tickers)})
+            assert res.status_code == 200 and len(res.json()["data"]) == len(tickers), res.text
+
+        def one_by_one(tickers):
+            for ticker in tickers:
+                assert client.get("/predict", params={"ticker": ticker}).status_code == 200
+
+        timed(lambda: scan(make_tickers(2)))   # warm up the model
+        print(f"{bars} bars per ticker, {latency * 1000:.0f} ms simulated fetch latency")
+        print(f"{'tickers':>8} {'batch (s)':>10} {'N x /predict cold (s)':>22} {'warm (s)':>9} {'speedup':>8}")
+        for n in counts:
+            tickers = make_tickers(n)
+            reset_state()
+            t_cold = timed(lambda: one_by_one(tickers))
+            t_warm = timed(lambda: one_by_one(tickers))
+            t_scan = timed(lambda: scan(tickers))
+            print(f"{n:>8} {t_scan:>10.2f} {t_cold:>22.2f} {t_warm:>9.2f} {t_warm / t_scan:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("counts", nargs="*", type=int, default=[20, 100])
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    main(args.counts, args.bars, args.latency)
@@ -0,0 +1,115 @@
+"""
+Sentiment scoring work over repeated news refreshes: scoring every article on
+every fetch (the old behaviour) vs the per-article score cache with one batch
+per refresh.
+
+Replays a news corpus through a stubbed Polygon client, so no API key or
+network is needed. By default the corpus is synthetic — a stream of articles
+each tagged with 1-3 tickers, a few new ones per refresh — or pass --corpus
+with a JSON list of recorded /v2/reference/news results (each with "tickers").
+
+Run from backend/:
+    python -m benchmarks.bench_sentiment [--tickers 20] [--refreshes 30] [--new-per-refresh 6] [--corpus news.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from unittest.mock import patch
+
+HEADLINES = [
+    "{t} beats earnings estimates as revenue surges",
+    "{t} shares plunge after guidance miss",
+    "Analysts upgrade {t} on strong demand",
+    "{t} faces lawsuit over product recall",
+    "{t} announces record dividend and buyback",
+    "{t} trades flat ahead of the Fed decision",
+    "{t} layoffs deepen as costs rise",
+    "Investors rally behind {t} after product launch",
+]
+
+
+def synthetic_corpus(tickers: list[str], total: int, seed: int = 7) -> list[dict]:
+    """`total` articles, oldest first, each mentioning 1-3 tickers."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(total):
+        tagged = rng.sample(tickers, rng.randint(1, min(3, len(tickers))))
+        corpus.append({
+            "id": f"bench-{i}",
+            "title": rng.choice(HEADLINES).format(t=tagged[0]),
+            "description": " ".join(rng.choice(HEADLINES).format(t=t) for t in tagged),
+            "article_url": f"https://news.example/{i}",
+            "published_utc": f"2024-01-01T{i // 60 % 24:02d}:{i % 60:02d}:00Z",
+            "publisher": {"name": "Bench Wire"},
+            "tickers": tagged,
+        })
+    return corpus
+
+
+def make_stub(corpus: list[dict], visible: list[int]):
+    """get_json stand-in serving the newest `limit` articles published so far that mention the ticker."""
+    async def get_json(path, params):
+        hits = [a for a in reversed(corpus[:visible[0]]) if params["ticker"] in a.get("tickers", ())]
+        return {"results": hits[:params["limit"]]}
+    return get_json
+
+
+async def replay(tickers, corpus, args, batched: bool) -> tuple[int, float]:
+    from src import news_sentiment
+
+    news_sentiment._score_cache.clear()
+    scored = 0
+    original = news_sentiment.score_texts
+
+    def counting(texts):
+        nonlocal scored
+        scored += len(texts)
+        return original(texts)
+
+    visible = [len(corpus) - args.refreshes * args.new_per_refresh]
+    with patch("src.polygon_client.get_json", side_effect=make_stub(corpus, visible)), \
+         patch("src.news_sentiment.score_texts", side_effect=counting):
+        start = time.perf_counter()
+        for _ in range(args.refreshes):
+            visible[0] += args.new_per_refresh
+            if batched:
+                await news_sentiment.fetch_news_many(tickers, limit=args.limit)
+            else:
+                for t in tickers:
+                    await news_sentiment.fetch_news(t, limit=args.limit)
+                    news_sentiment._score_cache.clear()   # nothing remembered between fetches
+        elapsed = time.perf_counter() - start
+    return scored, elapsed
+
+
+def main(args):
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = sorted(json.load(f), key=lambda a: a.get("published_utc", ""))
+        tickers = sorted({t for a in corpus for t in a.get("tickers", ())})[:args.tickers]
+        args.new_per_refresh = min(args.new_per_refresh, len(corpus) // (args.refreshes + 1))
+    else:
+        tickers = [f"T{i:02d}" for i in range(args.tickers)]
+        corpus = synthetic_corpus(tickers, args.tickers * args.limit + args.refreshes * args.new_per_refresh)
+
+    fetched = args.refreshes * len(tickers)
+    print(f"{len(tickers)} tickers x {args.refreshes} refreshes ({fetched} fetches, limit {args.limit}), "
+          f"{args.new_per_refresh} new articles per refresh, corpus of {len(corpus)}")
+    legacy, legacy_s = asyncio.run(replay(tickers, corpus, args, batched=False))
+    cached, cached_s = asyncio.run(replay(tickers, corpus, args, batched=True))
+    print(f"{'score every fetch (before)':<30} {legacy:7d} articles scored   {legacy_s * 1000:8.1f} ms")
+    print(f"{'per-article cache + batch':<30} {cached:7d} articles scored   {cached_s * 1000:8.1f} ms")
+    print(f"re-scoring avoided: {legacy - cached} articles ({(1 - cached / max(legacy, 1)) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--refreshes", type=int, default=30)
+    parser.add_argument("--new-per-refresh", type=int, default=6)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--corpus", help="JSON list of recorded Polygon news results")
+    main(parser.parse_args())
@@ -0,0 +1,61 @@
+"""
+Benchmark create_sequences() against the list-based builder it replaced.
+
+Reports wall time and peak traced allocation for building the windows, and for
+materialising them in fixed-size batches with iter_sequences().
+
+Run from backend/:
+    python -m benchmarks.bench_sequences [sizes...]
+"""
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+from config import TIME_STEP
+from src.preprocessing import create_sequences, iter_sequences
+
+BATCH_SIZE = 4096
+
+
+def create_sequences_lists(data: np.ndarray, time_step: int = 50):
+    X, y = [], []
+    for i in range(time_step, len(data)):
+        X.append(data[i - time_step:i])
+        y.append(data[i])
+    return np.array(X), np.array(y)
+
+
+def materialise_in_batches(data: np.ndarray, time_step: int):
+    # Stand-in for feeding each chunk to model.predict
+    for X, _ in iter_sequences(data, time_step, batch_size=BATCH_SIZE):
+        np.ascontiguousarray(X)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main(sizes):
+    print(f"{'points':>10} | {'lists s':>8} {'MiB':>8} | {'views s':>8} {'MiB':>8} | {'batched s':>9} {'MiB':>8}")
+    for n in sizes:
+        data = np.random.default_rng(0).random(n)
+        X_old, y_old = create_sequences_lists(data, TIME_STEP)
+        X_new, y_new = create_sequences(data, TIME_STEP)
+        assert np.array_equal(X_old, X_new) and np.array_equal(y_old, y_new)
+        del X_old, y_old
+
+        t_old, m_old = measure(create_sequences_lists, data, TIME_STEP)
+        t_new, m_new = measure(create_sequences, data, TIME_STEP)
+        t_bat, m_bat = measure(materialise_in_batches, data, TIME_STEP)
+        print(f"{n:>10,} | {t_old:>8.3f} {m_old:>8.1f} | {t_new:>8.5f} {m_new:>8.3f} | {t_bat:>9.3f} {m_bat:>8.1f}")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
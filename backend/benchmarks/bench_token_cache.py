@@ -0,0 +1,65 @@
+"""
+Per-request auth overhead: verifying the JWT every time (decode_access_token)
+vs the verified-token cache (get_token_subject).
+
+Tokens are drawn at random from a pool of users, each of whom has already made
+one request (so the cache is warm, as it is for a dashboard firing several
+protected calls per page load).
+
+Run from backend/:
+    python -m benchmarks.bench_token_cache [--users 200] [--requests 20000]
+"""
+
+import argparse
+import random
+import time
+from unittest.mock import patch
+
+
+def per_call_us(fn, tokens: list[str], n: int) -> float:
+    rng = random.Random(0)
+    picks = [rng.choice(tokens) for _ in range(n)]
+    start = time.perf_counter()
+    for token in picks:
+        fn(token)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(args):
+    from src import auth
+    tokens = [auth.create_access_token({"sub": f"user{i}@example.com"}) for i in range(args.users)]
+
+    def cold(token):
+        return auth.decode_access_token(token)["sub"]
+
+    auth._token_cache.clear()
+    for token in tokens:   # warm: each user has made one request
+        auth.get_token_subject(token)
+
+    print(f"{args.users} users, {args.requests} requests")
+    cold_us = per_call_us(cold, tokens, args.requests)
+    cached_us = per_call_us(auth.get_token_subject, tokens, args.requests)
+    print(f"auth only       : jose decode {cold_us:7.1f} us   cached {cached_us:7.1f} us   ({cold_us / cached_us:.0f}x)")
+
+    # through the get_current_user dependency, as every protected route runs it
+    import main as api
+
+    def dependency(token):
+        coro = api.get_current_user(token)   # never suspends, so drive it by hand
+        try:
+            coro.send(None)
+        except StopIteration as done:
+            return done.value
+
+    n = args.requests // 10
+    with patch("main.get_token_subject", cold):
+        cold_dep = per_call_us(dependency, tokens, n)
+    cached_dep = per_call_us(dependency, tokens, n)
+    print(f"get_current_user: jose decode {cold_dep:7.1f} us   cached {cached_dep:7.1f} us   "
+          f"({cold_dep / cached_dep:.0f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20000)
+    main(parser.parse_args())
@@ -0,0 +1,112 @@
+"""
+Round trips and wall time to import a watchlist: one request per ticker vs
+one /watchlist/batch call.
+
+Needs a MongoDB server (a local mongod is enough); a throwaway database is
+created and dropped. Round trips are counted with a pymongo command listener,
+so they do not depend on network latency — on Atlas, multiply them by your
+RTT to estimate the saving.
+
+Run from backend/:
+    python -m benchmarks.bench_watchlist_batch [--uri mongodb://localhost:27017] [--tickers 50]
+"""
+
+import argparse
+import asyncio
+import string
+import time
+from unittest.mock import patch
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name not in ("hello", "isMaster", "ping", "endSessions"):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def make_tickers(n: int) -> list[str]:
+    letters = string.ascii_uppercase
+    return [letters[i // 26 % 26] + letters[i % 26] + "X" for i in range(n)]
+
+
+async def legacy_add(db, ticker: str, user_email: str) -> bool:
+    """add_to_watchlist before the unique index: find_one, then insert_one."""
+    if await db.watchlist.find_one({"ticker": ticker, "user_email": user_email}):
+        return False
+    await db.watchlist.insert_one({"ticker": ticker, "user_email": user_email})
+    return True
+
+
+async def measure(label: str, counter: CommandCounter, fn, setup) -> None:
+    await setup()
+    before = counter.count
+    start = time.perf_counter()
+    await fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {counter.count - before:6d} round trips   {elapsed * 1000:8.1f} ms")
+
+
+async def run(args):
+    from src import mongo_crud
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(args.uri, event_listeners=[counter], serverSelectionTimeoutMS=3000)
+    db = client["trading_bot_bench_watchlist"]
+    await client.drop_database(db.name)
+    tickers, user = make_tickers(args.tickers), "bench@example.com"
+
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.ensure_indexes()
+        print(f"import {len(tickers)} tickers, then remove them all")
+
+        async def legacy():
+            for t in tickers:
+                await legacy_add(db, t, user)
+
+        async def per_ticker_upsert():
+            for t in tickers:
+                await mongo_crud.add_to_watchlist(t, user)
+
+        async def batch():
+            await mongo_crud.apply_watchlist_changes(user, add=tickers, remove=[])
+
+        async def batch_remove():
+            await mongo_crud.apply_watchlist_changes(user, add=[], remove=tickers)
+
+        async def per_ticker_remove():
+            for t in tickers:
+                await mongo_crud.remove_from_watchlist(t, user)
+
+        async def empty():
+            await db.watchlist.delete_many({})
+
+        async def full():
+            await empty()
+            await batch()
+
+        await measure("add: find_one + insert_one each", counter, legacy, empty)
+        await measure("add: one upsert each", counter, per_ticker_upsert, empty)
+        await measure("add: /watchlist/batch", counter, batch, empty)
+        await measure("remove: delete_one each", counter, per_ticker_remove, full)
+        await measure("remove: /watchlist/batch", counter, batch_remove, full)
+
+    await client.drop_database(db.name)
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--tickers", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
@@ -5,16 +5,47 @@ import os
 load_dotenv()
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
+POLYGON_BASE_URL = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
+POLYGON_MAX_CONCURRENCY = int(os.getenv("POLYGON_MAX_CONCURRENCY", "8"))
+POLYGON_TIMEOUT = float(os.getenv("POLYGON_TIMEOUT", "10"))
+POLYGON_MAX_RETRIES = int(os.getenv("POLYGON_MAX_RETRIES", "3"))
 ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 ALPACA_BASE_URL = os.getenv("ALPACA_BASE_URL")
+BROKER = os.getenv("BROKER", "alpaca")   # "fake" = in-memory paper account, no Alpaca keys needed
+BROKER_CACHE_TTL = float(os.getenv("BROKER_CACHE_TTL", "5"))
+BROKER_WORKERS = int(os.getenv("BROKER_WORKERS", "4"))
+ORDER_MAX_PARALLEL = int(os.getenv("ORDER_MAX_PARALLEL", "4"))
+ORDER_TRACK_TIMEOUT = float(os.getenv("ORDER_TRACK_TIMEOUT", "10"))
 MONGO_URI       = os.getenv("MONGO_URI")
 SECRET_KEY = os.getenv("SECRET_KEY", "changeme")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
 
 INTERVAL = "5"
 PERIOD = "5d"
 TIME_STEP = 50
 MODEL_PATH = "models/lstm_model.h5"
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "data/bars")
+SCALER_DIR = os.getenv("SCALER_DIR", "models/scalers")
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "2048"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+DATA_CACHE_MAX_ENTRIES = int(os.getenv("DATA_CACHE_MAX_ENTRIES", "256"))
+DATA_CACHE_MAX_BYTES = int(os.getenv("DATA_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PREDICTOR_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTOR_CACHE_MAX_ENTRIES", "512"))
+PREDICTOR_CACHE_MAX_BYTES = int(os.getenv("PREDICTOR_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+INDICATOR_CACHE_MAX_ENTRIES = int(os.getenv("INDICATOR_CACHE_MAX_ENTRIES", "1024"))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "512"))
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", "20000"))
+SENTIMENT_HALF_LIFE_HOURS = float(os.getenv("SENTIMENT_HALF_LIFE_HOURS", "24"))
+PRICE_POLL_INTERVAL = float(os.getenv("PRICE_POLL_INTERVAL", "5"))
+PRICE_HUB_MAX_TICKERS = int(os.getenv("PRICE_HUB_MAX_TICKERS", "500"))
+WS_MAX_CONNECTIONS_PER_IP = int(os.getenv("WS_MAX_CONNECTIONS_PER_IP", "5"))
+MARKET_SNAPSHOT_INTERVAL = float(os.getenv("MARKET_SNAPSHOT_INTERVAL", "900"))
+PLOT_WORKERS = int(os.getenv("PLOT_WORKERS", "2"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PLOT_CACHE_MAX_ENTRIES = int(os.getenv("PLOT_CACHE_MAX_ENTRIES", "128"))
 END_DATE = datetime.today().strftime("%Y-%m-%d")
 START_DATE = (datetime.today() - timedelta(days=90)).strftime("%Y-%m-%d")
@@ -1,17 +1,15 @@
-import matplotlib
-matplotlib.use("Agg")  # Prevent Tkinter-related thread issues
-import matplotlib.pyplot as plt
 import re
+import hashlib
+import uuid
 import pandas as pd
-import os
-import io
-import base64
+import numpy as np
 import math
 import asyncio
-import time
+import json
 from pathlib import Path
+from typing import Literal
 from datetime import datetime, timedelta
-from fastapi import FastAPI, Query, HTTPException, Body, Request, Depends
+from fastapi import FastAPI, Query, HTTPException, Body, Header, Request, Depends, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
@@ -20,32 +18,53 @@ from fastapi.security import OAuth2PasswordBearer
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from src.trader import execute_trade, get_account_status, get_positions
-from src.news_sentiment import fetch_news
+from src.broker import get_broker
+from src.news_sentiment import aggregate_sentiment, fetch_news, fetch_news_many
 from src.backtester import run_backtest
 from src.stock_summary import get_stock_summary
 from src.data_loader import load_data
-from src.feature_engineering import add_technical_indicators
-from src.preprocessing import scale_data, create_sequences
 from src.model import load_model as _load_model
-from src.signal_generator import generate_signal
-from config import INTERVAL, PERIOD, TIME_STEP, MODEL_PATH, START_DATE, END_DATE, ALLOWED_ORIGINS
+from src.inference import InferenceBatcher
+from src.predictor import predict_incremental, predict_latest, get_state
+from src.plotting import DEFAULT_POINTS, series_payload, render_png_cached, shutdown_pool
+from src.indicators import latest_indicators
+from src.signal_generator import generate_signal, generate_signals, signal_labels
+from src.singleflight import SingleFlight, flight_key, get_or_refresh
+from src.cache import TTLCache, all_stats as cache_stats
+from src import polygon_client
+from src.quotes import get_quote
+from src.market_snapshot import MarketSnapshotService
+from src.price_hub import PriceHub
+from config import (
+    INTERVAL, PERIOD, TIME_STEP, MODEL_PATH, START_DATE, END_DATE, ALLOWED_ORIGINS, ADMIN_EMAILS,
+    INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, NEWS_CACHE_MAX_ENTRIES, PRICE_POLL_INTERVAL,
+    PRICE_HUB_MAX_TICKERS, WS_MAX_CONNECTIONS_PER_IP,
+)
 from contextlib import asynccontextmanager
-from src.stock_stats import get_daily_return, calculate_var
+from src.stock_stats import (
+    get_daily_return, get_daily_returns, daily_returns_from_bars, historical_var,
+    risk_metrics, rolling_risk_metrics, portfolio_var,
+)
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from src.mongo_crud import (
-    create_user, record_transaction, get_user_transactions,
+    create_user, record_transaction, record_transactions, get_user_transactions, summarize_user_transactions,
+    encode_cursor, decode_cursor,
     get_user_by_email, authenticate_user,
-    get_watchlist, add_to_watchlist, remove_from_watchlist,
-    get_alerts, create_alert, delete_alert, mark_alert_triggered,
+    get_watchlist, add_to_watchlist, remove_from_watchlist, apply_watchlist_changes,
+    get_alerts, create_alert, delete_alert, apply_alert_changes, mark_alert_triggered, mark_alerts_triggered, get_active_alerts,
+    ensure_indexes,
 )
 from src.models import UserCreate, User, Transaction, LoginRequest, PriceAlert
-from src.auth import hash_password, create_access_token, decode_access_token
+from src.auth import create_access_token, get_token_subject, revoke_token
+from src.utils import hash_password_async
 from src.db import db
 
 # ── Constants ──────────────────────────────────────────────────────────────────
 
 TICKER_RE = re.compile(r'^[A-Z]{1,5}$')
+SCAN_MAX_TICKERS = 100
+BATCH_MAX_ITEMS = 100      # per /watchlist/batch or /alerts/batch request
 
 TOP_TICKERS = [
     ("AAPL",  "Apple Inc."),
@@ -70,8 +89,8 @@ TOP_TICKERS = [
     ("NFLX",  "Netflix Inc."),
 ]
 
-_top_stocks_cache: dict = {}   # {"data": [...], "ts": float}
-TOP_STOCKS_TTL = 300            # 5-minute server-side cache
+# Concurrent cache misses on the same key share one upstream call / model pass
+_flight = SingleFlight()
 
 # ── Rate limiter ───────────────────────────────────────────────────────────────
 
@@ -82,21 +101,42 @@ limiter = Limiter(key_func=get_remote_address)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
-    """Decode JWT and return the user's email. Raises 401 on failure."""
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token.")
-    email: str = payload.get("sub")
+    """Verify the JWT (cached per token until it expires) and return the user's email. Raises 401 on failure."""
+    email = get_token_subject(token)
     if not email:
-        raise HTTPException(status_code=401, detail="Token payload missing subject.")
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
     return email
 
+async def require_admin(current_user: str = Depends(get_current_user)) -> str:
+    """get_current_user(), restricted to the ADMIN_EMAILS allow-list. Raises 403 for anyone else."""
+    if current_user.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required.")
+    return current_user
+
 # ── App startup ────────────────────────────────────────────────────────────────
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # in the background: an unreachable database must not hold up startup
+    indexes = asyncio.ensure_future(ensure_indexes())
     app.state.model = _load_model(MODEL_PATH)
+    app.state.inference = InferenceBatcher(
+        app.state.model,
+        max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    )
+    app.state.inference.start()
+    app.state.market = MarketSnapshotService()
+    await app.state.market.start()
+    app.state.price_hub = new_price_hub(app.state.market)
+    await app.state.price_hub.start()
     yield
+    indexes.cancel()
+    await app.state.price_hub.stop()
+    await app.state.market.stop()
+    app.state.inference.stop()
+    shutdown_pool()
+    await polygon_client.close_client()
 
 app = FastAPI(
     title="Stock Trading Bot API",
@@ -118,38 +158,114 @@ app.add_middleware(
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def fetch_data(ticker: str) -> pd.DataFrame:
-    print(f"[INFO] Fetching data for {ticker}...")
-    df = load_data(ticker, start=START_DATE, end=END_DATE, interval="5")
-    df = df.copy()
-    df.reset_index(inplace=True)
-    os.makedirs("data", exist_ok=True)
-    filepath = f"data/{ticker}_stock_data.csv"
-    df.to_csv(filepath, index=False)
-    print(f"[INFO] Saved data to {filepath}")
-    return df
+def get_inference(app: FastAPI) -> InferenceBatcher:
+    """Inference worker for app.state.model (created on first use if lifespan did not run)."""
+    batcher = getattr(app.state, "inference", None)
+    if batcher is None or batcher.model is not app.state.model:
+        if batcher is not None:
+            batcher.stop()
+        batcher = InferenceBatcher(
+            app.state.model,
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+        )
+        app.state.inference = batcher
+    return batcher
+
+
+def new_price_hub(market: MarketSnapshotService) -> PriceHub:
+    """Live-price hub polling Polygon and firing the alerts stored in MongoDB."""
+    return PriceHub(
+        lambda ticker: get_quote(ticker, prev_day=market.bar),
+        interval=PRICE_POLL_INTERVAL,
+        load_alerts=get_active_alerts,
+        on_alerts=lambda alerts: mark_alerts_triggered([a["_id"] for a in alerts]),
+        max_tickers=PRICE_HUB_MAX_TICKERS,
+        max_connections_per_client=WS_MAX_CONNECTIONS_PER_IP,
+    )
+
+def get_price_hub(app: FastAPI) -> PriceHub:
+    """app.state.price_hub (created on first use if lifespan did not run)."""
+    hub = getattr(app.state, "price_hub", None)
+    if hub is None:
+        hub = app.state.price_hub = new_price_hub(get_market(app))
+    return hub
+
+
+def get_market(app: FastAPI) -> MarketSnapshotService:
+    """app.state.market (created on first use, without the refresh schedule, if lifespan did not run)."""
+    market = getattr(app.state, "market", None)
+    if market is None:
+        market = app.state.market = MarketSnapshotService()
+    return market
+
 
+async def preprocess_and_predict(ticker: str, inference: InferenceBatcher, refresh: bool = False):
+    """
+    (actual closes, predicted closes, bars) over the loaded history; `bars`
+    is the load_data() frame the prediction ran on, for callers that derive
+    more from the same history without loading it again.
 
-def preprocess_and_predict(ticker: str, model):
-    df = fetch_data(ticker)
+    Only windows ending on bars that arrived since the last call go through the
+    model (see src/predictor.py); `refresh` forces a full recompute.
+    Concurrent calls for the same ticker share one computation.
+    """
+    return await _flight.do(("predict", ticker, refresh), lambda: _predict_uncached(ticker, inference, refresh))
 
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = ['_'.join(col).strip() for col in df.columns.values]
 
-    if "Close" not in df.columns:
+async def _predict_uncached(ticker: str, inference: InferenceBatcher, refresh: bool):
+    print(f"[INFO] Fetching data for {ticker}...")
+    bars = await load_data(ticker, start=START_DATE, end=END_DATE, interval="5")
+
+    if "Close" not in bars.columns:
         raise KeyError("Expected 'Close' column not found in data.")
 
-    df = df.rename(columns={"Close": f"close_{ticker.lower()}"})
-    df = add_technical_indicators(df)
+    y_real, predictions = await predict_incremental(
+        ticker, bars["Close"].values, bars.index.values, inference.predict, time_step=TIME_STEP, refresh=refresh,
+    )
+    return y_real, predictions, bars
+
+
+async def scan_tickers(tickers: list[str], inference: InferenceBatcher) -> dict:
+    """
+    Latest signal for every ticker: histories are fetched concurrently and the
+    last window of each goes through the model in one batch.
+    Tickers whose data cannot be loaded are reported under "errors".
+    """
+    frames = await asyncio.gather(
+        *(load_data(t, start=START_DATE, end=END_DATE, interval=INTERVAL) for t in tickers),
+        return_exceptions=True,
+    )
+    closes, errors = {}, {}
+    for ticker, df in zip(tickers, frames):
+        if isinstance(df, Exception):
+            errors[ticker] = str(df)
+        elif len(df) <= TIME_STEP:
+            errors[ticker] = f"Not enough history ({len(df)} bars)."
+        else:
+            closes[ticker] = df["Close"].to_numpy()
+
+    latest = await predict_latest(closes, inference.predict, time_step=TIME_STEP)
+    actual = np.array([a for a, _ in latest.values()])
+    predicted = np.array([p for _, p in latest.values()])
+    signals = signal_labels(generate_signals(predicted, actual))
 
-    scaler, scaled_df = scale_data(df, column_name=f"close_{ticker.lower()}")
-    X, y_scaled = create_sequences(scaled_df[f"close_{ticker.lower()}"].values, time_step=TIME_STEP)
+    data = [
+        {"ticker": t, "current_price": a, "predicted_price": p, "signal": sig}
+        for t, a, p, sig in zip(latest, actual.tolist(), predicted.tolist(), signals)
+    ]
+    return {"status": "success", "data": data, "errors": errors}
 
-    predictions_scaled = model.predict(X)
-    predictions_real = scaler.inverse_transform(predictions_scaled)
-    y_real = scaler.inverse_transform(y_scaled.reshape(-1, 1))
 
-    return y_real, predictions_real
+def parse_tickers(raw: list[str]) -> list[str]:
+    """Upper-case, validate and de-duplicate a ticker list (order kept). Raises 400."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in raw if t.strip()))
+    invalid = [t for t in tickers if not TICKER_RE.match(t)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid ticker symbol(s): {', '.join(invalid)}")
+    if len(tickers) > SCAN_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {SCAN_MAX_TICKERS} tickers per scan.")
+    return tickers
 
 
 def sanitize_json(obj):
@@ -172,57 +288,74 @@ async def predict_with_plot(
     request: Request,
     ticker: str = Query(..., description="Stock ticker symbol (e.g., AAPL, GOOG)"),
     confidence_level: float = Query(0.95, description="Confidence level for VaR calculation"),
+    refresh: bool = Query(False, description="Recompute predictions over the full history"),
+    plot: Literal["series", "png", "none"] = Query(
+        "series", description="series: downsampled data for client-side charts; png: rendered image; none"),
+    points: int = Query(DEFAULT_POINTS, ge=10, le=5000, description="Max points per series when plot=series"),
 ):
     ticker = ticker.strip().upper()
     if not TICKER_RE.match(ticker):
         raise HTTPException(status_code=400, detail="Invalid ticker symbol. Use 1-5 uppercase letters (e.g. AAPL).")
-    y_real, predictions_real = preprocess_and_predict(ticker, request.app.state.model)
+    y_real, predictions_real, bars = await preprocess_and_predict(ticker, get_inference(request.app), refresh)
 
     last_prediction = float(predictions_real[-1][0])
     last_actual = float(y_real[-1][0])
     signal = generate_signal(last_prediction, last_actual)
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(y_real, label="Actual")
-    plt.plot(predictions_real, label="Predicted")
-    plt.legend()
-    plt.title(f"{ticker.upper()} - Predicted vs Actual")
-    plt.grid(True)
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+    chart = {}
+    if plot == "series":
+        chart["series"] = series_payload(y_real, predictions_real, points)
+    elif plot == "png":
+        state = get_state(ticker)
+        version = state.version if state is not None and state.y_real is y_real else None
+        chart["plot_base64"] = await render_png_cached(ticker, version, y_real, predictions_real)
 
+    # derived from the bars the prediction ran on: no second load, and a
+    # failure here degrades to None instead of failing the prediction
     try:
-        var = calculate_var(ticker, START_DATE, END_DATE, confidence_level)
+        var = float(historical_var(daily_returns_from_bars(bars), confidence_level))
     except Exception:
         var = None
+    try:
+        indicators = latest_indicators(ticker, bars["Close"].values, bars.index.values)
+    except Exception:
+        indicators = None
 
     return sanitize_json({
         "ticker": ticker.upper(),
         "current_price": last_actual,
         "predicted_price": last_prediction,
         "signal": signal,
-        "plot_base64": img_base64,
+        **chart,
         "VaR_95_percent": var,
+        "indicators": indicators,
     })
 
 
+@app.get("/predict/batch")
+@limiter.limit("5/minute")
+async def predict_batch(
+    request: Request,
+    tickers: str = Query("", description="Comma-separated tickers (default: the top-20 list)"),
+):
+    """Latest predicted close and signal for many tickers at once (no plots)."""
+    symbols = parse_tickers(tickers.split(",")) or [t for t, _ in TOP_TICKERS]
+    return sanitize_json(await scan_tickers(symbols, get_inference(request.app)))
+
+
 @app.get("/stock-summary")
-def stock_summary(limit: int = 100):
-    return get_stock_summary(limit)
+async def stock_summary(limit: int = 100):
+    return await get_stock_summary(limit)
 
 
 @app.get("/stock-stats")
-def stock_stats(
+async def stock_stats(
     ticker: str = Query(..., description="Stock ticker symbol"),
     start: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end: str = Query(..., description="End date in YYYY-MM-DD format"),
 ):
     try:
-        df = get_daily_return(ticker, start, end)
+        df = await get_daily_return(ticker, start, end)
         return {
             "ticker": ticker.upper(),
             "daily_returns": df['Daily Return'].tolist(),
@@ -232,9 +365,96 @@ def stock_stats(
         return {"error": str(e)}
 
 
+def parse_confidence(raw: str) -> list[float]:
+    """Comma-separated confidence levels, each strictly between 0 and 1. Raises 400."""
+    try:
+        levels = sorted({float(c) for c in raw.split(",") if c.strip()})
+    except ValueError:
+        levels = []
+    if not levels or not all(0 < c < 1 for c in levels):
+        raise HTTPException(status_code=400, detail="Confidence levels must be numbers between 0 and 1.")
+    return levels
+
+
+def metrics_by_level(metrics: dict, levels: list[float], column: int | None = None) -> dict:
+    """
+    risk_metrics() arrays as JSON: VaR/CVaR keyed by confidence level,
+    `column` picking one ticker out of a multi-ticker result.
+    """
+    out = {}
+    for name, values in metrics.items():
+        values = np.asarray(values)
+        if column is not None:
+            values = values[..., column]
+        if name.startswith(("var_", "cvar")):
+            out[name] = {str(c): values[i].tolist() for i, c in enumerate(levels)}
+        else:
+            out[name] = values.tolist()
+    return out
+
+
+@app.get("/risk")
+@limiter.limit("10/minute")
+async def get_risk(
+    request: Request,
+    tickers: str = Query(..., description="Comma-separated tickers"),
+    confidence: str = Query("0.95,0.99", description="Comma-separated confidence levels"),
+    start: str = Query(START_DATE, description="Start date in YYYY-MM-DD format"),
+    end: str = Query(END_DATE, description="End date in YYYY-MM-DD format"),
+    window: int | None = Query(None, ge=5, le=250, description="Also return rolling metrics over this many days"),
+):
+    """
+    Volatility, historical and parametric VaR and CVaR for many tickers at
+    every requested confidence level, from the cached daily returns.
+    """
+    symbols = parse_tickers(tickers.split(","))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers given.")
+    levels = parse_confidence(confidence)
+    returns, errors = await get_daily_returns(symbols, start, end)
+
+    data = {}
+    if not returns.empty:
+        metrics = risk_metrics(returns.to_numpy(), levels)
+        for i, ticker in enumerate(returns.columns):
+            data[ticker] = metrics_by_level(metrics, levels, column=i)
+            if window is not None:
+                series = returns[ticker].dropna()
+                if len(series) >= window:
+                    data[ticker]["rolling"] = {
+                        "dates": series.index[window - 1:].strftime("%Y-%m-%d").tolist(),
+                        **metrics_by_level(rolling_risk_metrics(series.to_numpy(), window, levels), levels),
+                    }
+    return sanitize_json({"status": "success", "confidence": levels, "data": data, "errors": errors})
+
+
+@app.get("/portfolio/risk")
+async def get_portfolio_risk(
+    confidence: str = Query("0.95,0.99", description="Comma-separated confidence levels"),
+    current_user: str = Depends(get_current_user),
+):
+    """One-day VaR and CVaR of the open Alpaca positions, from the holdings' daily returns."""
+    levels = parse_confidence(confidence)
+    positions = await get_broker().positions()
+    if positions["status"] == "error":
+        raise HTTPException(status_code=503, detail=f"Could not fetch portfolio: {positions['message']}")
+    holdings = positions["holdings"]
+    if not holdings:
+        return {"status": "success", "confidence": levels, "data": None}
+
+    returns, errors = await get_daily_returns([h["ticker"] for h in holdings], START_DATE, END_DATE)
+    try:
+        result = portfolio_var(holdings, returns, levels)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=f"{e} {errors or ''}".strip())
+    data = {k: v for k, v in result.items() if k in ("value", "gross_exposure", "observations")}
+    data.update(metrics_by_level({k: v for k, v in result.items() if k not in data}, levels))
+    return sanitize_json({"status": "success", "confidence": levels, "data": data})
+
+
 @app.get("/account-status")
-def check_account():
-    return get_account_status()
+async def check_account():
+    return await get_broker().account()
 
 
 @app.get("/healthz")
@@ -242,6 +462,30 @@ def healthz():
     return {"status": "ok"}
 
 
+@app.get("/admin/inference-stats")
+async def inference_stats(request: Request, current_user: str = Depends(require_admin)):
+    """Queue depth, batch sizes and latency of the batched inference worker."""
+    return {"status": "success", "data": get_inference(request.app).stats()}
+
+
+@app.get("/admin/price-hub-stats")
+async def price_hub_stats(request: Request, current_user: str = Depends(require_admin)):
+    """Connections, subscribed/polled tickers, active alerts and upstream call count of the price hub."""
+    return {"status": "success", "data": get_price_hub(request.app).stats()}
+
+
+@app.get("/admin/market-stats")
+async def market_stats(request: Request, current_user: str = Depends(require_admin)):
+    """Date, size and refresh counters of the in-memory market snapshot."""
+    return {"status": "success", "data": get_market(request.app).stats()}
+
+
+@app.get("/admin/cache-stats")
+async def get_cache_stats(current_user: str = Depends(require_admin)):
+    """Size, limits and hit/miss/eviction counters of every in-memory cache."""
+    return {"status": "success", "data": cache_stats()}
+
+
 # ── Backtesting ────────────────────────────────────────────────────────────────
 
 @app.get("/backtest")
@@ -249,12 +493,13 @@ def healthz():
 async def backtest(
     request: Request,
     ticker: str = Query(..., description="Stock ticker symbol"),
+    refresh: bool = Query(False, description="Recompute predictions over the full history"),
 ):
     ticker = ticker.strip().upper()
     if not TICKER_RE.match(ticker):
         raise HTTPException(status_code=400, detail="Invalid ticker symbol.")
     try:
-        y_real, predictions = preprocess_and_predict(ticker, request.app.state.model)
+        y_real, predictions, _ = await preprocess_and_predict(ticker, get_inference(request.app), refresh)
         result = run_backtest(y_real, predictions)
         return sanitize_json({"ticker": ticker, **result})
     except Exception as e:
@@ -262,8 +507,9 @@ async def backtest(
 
 # ── News + Sentiment ───────────────────────────────────────────────────────────
 
-_news_cache: dict = {}    # ticker → {"data": [...], "ts": float}
 NEWS_TTL = 600            # 10-minute cache (news doesn't change that fast)
+NEWS_STALE = 600          # then served stale for up to 10 more while one refresh runs
+_news_cache = TTLCache("news", ttl=NEWS_TTL, stale_ttl=NEWS_STALE, max_entries=NEWS_CACHE_MAX_ENTRIES)
 
 @app.get("/news/{ticker}")
 @limiter.limit("20/minute")
@@ -272,19 +518,72 @@ async def get_news(request: Request, ticker: str):
     if not TICKER_RE.match(ticker):
         raise HTTPException(status_code=400, detail="Invalid ticker symbol.")
 
-    cached = _news_cache.get(ticker)
-    if cached and (time.time() - cached["ts"]) < NEWS_TTL:
-        return {"status": "success", "ticker": ticker, "articles": cached["data"], "cached": True}
+    try:
+        articles, cached = await get_or_refresh(_news_cache, ticker, lambda: fetch_news(ticker, limit=8), _flight)
+    except Exception:
+        articles, cached = [], False   # upstream failure: serve nothing, cache nothing
+    return {"status": "success", "ticker": ticker, "articles": articles,
+            "aggregate": aggregate_sentiment(articles), "cached": cached}
+
+
+NEWS_BATCH_MAX_TICKERS = 20
 
-    articles = fetch_news(ticker, limit=8)
-    _news_cache[ticker] = {"data": articles, "ts": time.time()}
-    return {"status": "success", "ticker": ticker, "articles": articles, "cached": False}
+@app.get("/news")
+@limiter.limit("10/minute")
+async def get_news_batch(
+    request: Request,
+    tickers: str = Query(..., description="Comma-separated tickers"),
+):
+    """
+    News, sentiment and per-ticker aggregate for several tickers. Tickers not
+    in the news cache are fetched together, and each article is scored once
+    however many of the tickers it mentions.
+    """
+    symbols = parse_tickers(tickers.split(","))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers given.")
+    if len(symbols) > NEWS_BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {NEWS_BATCH_MAX_TICKERS} tickers per request.")
+
+    found = {t: _news_cache.get(t) for t in symbols}
+    missing = [t for t, articles in found.items() if articles is None]
+    if missing:
+        # Same single-flight keys as /news/{ticker}: a ticker already being
+        # fetched there is joined, the rest are fetched (and scored) together
+        keys = {t: flight_key(_news_cache, t) for t in missing}
+        batched = [t for t in missing if not _flight.in_flight(keys[t])]
+        batch = asyncio.ensure_future(fetch_news_many(batched, limit=8)) if batched else None
+
+        async def refresh(t: str) -> list[dict]:
+            if t in batched:
+                news, errors = await batch
+                if t in errors:
+                    raise errors[t]
+                articles = news[t]
+            else:
+                articles = await fetch_news(t, limit=8)
+            _news_cache.set(t, articles)   # only reached when the fetch succeeded
+            return articles
+
+        for t in missing:
+            _flight.do_background(keys[t], lambda t=t: refresh(t))
+        results = await asyncio.gather(*(_flight.do(keys[t], lambda t=t: refresh(t)) for t in missing),
+                                       return_exceptions=True)
+        for t, articles in zip(missing, results):
+            found[t] = [] if isinstance(articles, Exception) else articles
+    return {
+        "status": "success",
+        "news": {
+            t: {"articles": articles, "aggregate": aggregate_sentiment(articles), "cached": t not in missing}
+            for t, articles in found.items()
+        },
+    }
 
 
 @app.get("/portfolio")
 async def get_portfolio(current_user: str = Depends(get_current_user)):
-    """Open positions with unrealised P&L pulled live from Alpaca paper account."""
-    result = get_positions()
+    """Open positions with unrealised P&L from the Alpaca paper account (cached for BROKER_CACHE_TTL)."""
+    result = await get_broker().positions()
     if result["status"] == "error":
         raise HTTPException(status_code=503, detail=f"Could not fetch portfolio: {result['message']}")
     return result
@@ -297,133 +596,150 @@ async def get_live_price(request: Request, ticker: str):
     if not TICKER_RE.match(ticker):
         raise HTTPException(status_code=400, detail="Invalid ticker symbol.")
 
-    import requests as req
-    from config import POLYGON_API_KEY
-
-    price = None
-    change = 0.0
-    change_pct = 0.0
-    volume = 0
+    # Tickers someone is streaming are already polled by the price hub
+    hub = getattr(request.app.state, "price_hub", None)
+    quote = hub.latest(ticker) if hub is not None else None
+    if quote is None:
+        quote = await get_quote(ticker, prev_day=get_market(request.app).bar)
+    if quote is None:
+        raise HTTPException(status_code=503, detail=f"Price data temporarily unavailable for {ticker}.")
 
-    # ── Stage 1: real-time snapshot (15-min delayed on free plan) ─────────────
+    return {k: quote[k] for k in ("ticker", "price", "change", "change_pct", "volume")}
+
+
+# ── Live prices over WebSocket ─────────────────────────────────────────────────
+
+WS_MAX_TICKERS = 50
+
+@app.websocket("/ws/prices")
+async def price_stream(websocket: WebSocket, token: str | None = None):
+    """
+    Live prices pushed from the shared price hub.
+
+    Client → server: {"subscribe": ["AAPL", ...]} / {"unsubscribe": [...]}
+    Server → client: {"type": "price", "ticker", "price", "change", "change_pct", "volume", "ts"}
+                     {"type": "alert", "alert_id", "ticker", "condition", "target_price", "price"}
+                     {"type": "error", "detail"}
+    Pass ?token=<JWT> to subscribe to any ticker and to receive your own price
+    alerts as they fire. Without a token only tickers listed in the market
+    snapshot can be subscribed, so anonymous clients cannot make the hub poll
+    arbitrary symbols. Each client address may hold WS_MAX_CONNECTIONS_PER_IP
+    sockets.
+    """
+    user_email = None
+    if token:
+        user_email = get_token_subject(token)
+        if not user_email:
+            await websocket.close(code=1008, reason="Invalid or expired token.")
+            return
+
+    hub = get_price_hub(websocket.app)
+    client = websocket.client.host if websocket.client else None
+    sub = hub.subscribe(user_email, client=client)
+    if sub is None:
+        await websocket.close(code=1013, reason="Too many connections from this address.")
+        return
+
+    def error(detail: str) -> None:
+        sub.push(json.dumps({"type": "error", "detail": detail}))
+
+    sender = None
     try:
-        snap_url = f"https://api.polygon.io/v2/snapshot/locale/us/markets/stocks/tickers/{ticker}"
-        snap_res = req.get(snap_url, params={"apiKey": POLYGON_API_KEY}, timeout=5)
-        if snap_res.ok:
-            ticker_data = snap_res.json().get("ticker", {})
-            day      = ticker_data.get("day", {})
-            prev_day = ticker_data.get("prevDay", {})
-            last_trade = ticker_data.get("lastTrade", {})
-            price  = last_trade.get("p") or day.get("c") or prev_day.get("c")
-            volume = day.get("v", 0)
-            if prev_day.get("c") and price:
-                prev_close = prev_day["c"]
-                cur_close  = day.get("c") or price
-                change     = cur_close - prev_close
-                change_pct = (change / prev_close) * 100
-        else:
-            print(f"[WARN] Snapshot {ticker} HTTP {snap_res.status_code}: {snap_res.text[:120]}")
-    except Exception as snap_err:
-        print(f"[WARN] Snapshot failed for {ticker}: {snap_err}")
-
-    # ── Stage 2: previous-day close fallback ──────────────────────────────────
-    if price is None:
-        try:
-            prev_url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/prev"
-            prev_res = req.get(prev_url, params={"adjusted": "true", "apiKey": POLYGON_API_KEY}, timeout=5)
-            if prev_res.ok:
-                results = prev_res.json().get("results", [])
-                if results:
-                    bar    = results[0]
-                    price  = bar.get("c")
-                    volume = int(bar.get("v", 0))
-            else:
-                print(f"[WARN] Prev-day {ticker} HTTP {prev_res.status_code}: {prev_res.text[:120]}")
-        except Exception as prev_err:
-            print(f"[WARN] Prev-day fallback failed for {ticker}: {prev_err}")
-
-    if price is None:
-        raise HTTPException(status_code=503, detail=f"Price data temporarily unavailable for {ticker}.")
+        await websocket.accept()
+
+        async def forward():
+            while True:
+                await websocket.send_text(await sub.queue.get())
+
+        sender = asyncio.create_task(forward())
+        while True:
+            message = await websocket.receive_json()
+            if not isinstance(message, dict):
+                error("Expected a JSON object.")
+                continue
+            for action in ("subscribe", "unsubscribe"):
+                tickers = [str(t).strip().upper() for t in message.get(action) or []]
+                invalid = [t for t in tickers if not TICKER_RE.match(t)]
+                if invalid:
+                    error(f"Invalid ticker symbol(s): {', '.join(invalid)}")
+                elif action == "unsubscribe":
+                    hub.remove_tickers(sub, tickers)
+                elif len(sub.tickers | set(tickers)) > WS_MAX_TICKERS:
+                    error(f"At most {WS_MAX_TICKERS} tickers per connection.")
+                else:
+                    if user_email is None and tickers:
+                        snapshot = await get_market(websocket.app).ensure()
+                        unlisted = [t for t in tickers if snapshot is None or t not in snapshot.index]
+                        if unlisted:
+                            error(f"Sign in to subscribe to tickers outside the market snapshot: {', '.join(unlisted)}")
+                            tickers = [t for t in tickers if t not in unlisted]
+                    rejected = hub.add_tickers(sub, tickers)
+                    if rejected:
+                        error(f"Price hub is at capacity; not streaming {', '.join(rejected)}")
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        if sender is not None:
+            sender.cancel()
+        hub.unsubscribe(sub)
 
-    return {
-        "ticker": ticker,
-        "price": round(price, 2),
-        "change": round(change, 2),
-        "change_pct": round(change_pct, 2),
-        "volume": volume,
-    }
 
 # ── Market overview ────────────────────────────────────────────────────────────
 
-def _last_trading_day() -> str:
-    """Return the most recent completed trading weekday as YYYY-MM-DD."""
-    d = datetime.today() - timedelta(days=1)
-    while d.weekday() >= 5:   # skip Saturday (5) and Sunday (6)
-        d -= timedelta(days=1)
-    return d.strftime("%Y-%m-%d")
-
-
 @app.get("/market/top")
-async def get_top_stocks():
-    """Prev-day OHLCV for the top 20 US stocks — single grouped API call, cached 5 min."""
-    import requests as req
-    from config import POLYGON_API_KEY
-
-    if _top_stocks_cache.get("data") and (time.time() - _top_stocks_cache.get("ts", 0)) < TOP_STOCKS_TTL:
-        return {"status": "success", "data": _top_stocks_cache["data"], "cached": True}
-
-    ticker_set  = {t for t, _ in TOP_TICKERS}
-    bars_by_ticker: dict = {}
-
-    # Try up to 5 days back to skip market holidays
-    for days_back in range(1, 6):
-        d = datetime.today() - timedelta(days=days_back)
-        if d.weekday() >= 5:
-            continue
-        date_str = d.strftime("%Y-%m-%d")
-        try:
-            r = req.get(
-                f"https://api.polygon.io/v2/aggs/grouped/locale/us/market/stocks/{date_str}",
-                params={"adjusted": "true", "apiKey": POLYGON_API_KEY},
-                timeout=15,
-            )
-            if r.ok:
-                raw = r.json().get("results", [])
-                bars_by_ticker = {b["T"]: b for b in raw if b["T"] in ticker_set}
-                if bars_by_ticker:
-                    print(f"[INFO] market/top: loaded {len(bars_by_ticker)} tickers from {date_str}")
-                    break
-                print(f"[WARN] market/top grouped {date_str}: no matching tickers, trying earlier date")
-            else:
-                print(f"[WARN] market/top grouped HTTP {r.status_code}: {r.text[:120]}")
-                break   # 403 / 401 won't improve with a different date
-        except Exception as e:
-            print(f"[WARN] market/top grouped: {e}")
-            break
-
+async def get_top_stocks(request: Request):
+    """Prev-day OHLCV for the top 20 US stocks, from the in-memory market snapshot."""
+    market = get_market(request.app)
+    cached = market.snapshot is not None
+    await market.ensure()
     results = []
     for ticker, name in TOP_TICKERS:
-        bar = bars_by_ticker.get(ticker)
+        bar = market.bar(ticker)
         if bar:
-            close = bar.get("c") or 0
-            open_ = bar.get("o") or close
-            chg   = round(((close - open_) / open_ * 100) if open_ else 0, 2)
             results.append({
                 "ticker":     ticker,
                 "name":       name,
-                "price":      round(close, 2),
-                "change_pct": chg,
-                "high":       round(bar.get("h") or 0, 2),
-                "low":        round(bar.get("l") or 0, 2),
-                "volume":     int(bar.get("v") or 0),
+                "price":      bar["close"],
+                "change_pct": bar["change_pct"],
+                "high":       bar["high"],
+                "low":        bar["low"],
+                "volume":     bar["volume"],
             })
         else:
             results.append({"ticker": ticker, "name": name, "price": None,
                             "change_pct": 0, "high": None, "low": None, "volume": 0})
+    return {"status": "success", "data": results, "cached": cached}
+
+
+@app.get("/market/movers")
+async def get_market_movers(
+    request: Request,
+    by: Literal["gainers", "losers", "volume"] = "gainers",
+    n: int = Query(20, ge=1, le=100),
+    min_volume: int = Query(100_000, ge=0, description="Ignore tickers that traded fewer shares"),
+):
+    """Top-n tickers across the whole market by prev-day change or volume."""
+    snapshot = await get_market(request.app).ensure()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Market data temporarily unavailable.")
+    return {"status": "success", "date": snapshot.date, "by": by,
+            "data": snapshot.top(n, by=by, min_volume=min_volume)}
+
+
+@app.get("/market/bar/{ticker}")
+async def get_market_bar(request: Request, ticker: str):
+    """Previous trading day's OHLCV for any US ticker, from the market snapshot."""
+    ticker = ticker.strip().upper()
+    if not TICKER_RE.match(ticker):
+        raise HTTPException(status_code=400, detail="Invalid ticker symbol.")
+    snapshot = await get_market(request.app).ensure()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Market data temporarily unavailable.")
+    bar = snapshot.bar(ticker)
+    if bar is None:
+        raise HTTPException(status_code=404, detail=f"No bar for {ticker} on {snapshot.date}.")
+    return {"status": "success", "data": bar}
 
-    _top_stocks_cache["data"] = results
-    _top_stocks_cache["ts"]   = time.time()
-    return {"status": "success", "data": results, "cached": False}
 
 # ── Auth endpoints ─────────────────────────────────────────────────────────────
 
@@ -433,14 +749,17 @@ async def register(user: UserCreate):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered.")
 
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
     user_data = {
         "username": user.username,
         "email": user.email,
         "password": hashed_pw,
         "full_name": user.full_name,
     }
-    await db.users.insert_one(user_data)
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:   # registered concurrently; the unique index on email caught it
+        raise HTTPException(status_code=400, detail="Email already registered.")
     return {"message": "User registered successfully."}
 
 
@@ -456,6 +775,13 @@ async def login(credentials: LoginRequest):
 
 # ── Protected endpoints (require valid JWT) ────────────────────────────────────
 
+@app.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme), current_user: str = Depends(get_current_user)):
+    """Revoke the caller's token for the rest of its lifetime."""
+    revoke_token(token)
+    return {"message": "Logged out."}
+
+
 @app.post("/execute-trade")
 @limiter.limit("5/minute")
 async def execute_trade_endpoint(
@@ -470,7 +796,7 @@ async def execute_trade_endpoint(
     if signal not in ("Buy", "Sell", "Hold"):
         raise HTTPException(status_code=400, detail="Signal must be Buy, Sell, or Hold.")
     try:
-        trade_result = execute_trade(signal, ticker)
+        trade_result = await get_broker().submit_order(signal, ticker)
         print(f"[ALPACA] {current_user} executing {signal} for {ticker}")
         return {
             "message": f"Trade {signal} executed for {ticker}",
@@ -480,6 +806,82 @@ async def execute_trade_endpoint(
         raise HTTPException(status_code=500, detail=f"Trade execution failed: {str(e)}")
 
 
+class OrderRequest(BaseModel):
+    ticker: str
+    side: str          # "Buy" | "Sell"
+    qty: float = 1
+
+
+class OrderBatch(BaseModel):
+    orders: list[OrderRequest]
+    wait: bool = True  # poll until every order is filled/rejected (up to ORDER_TRACK_TIMEOUT)
+
+
+IDEMPOTENCY_KEY_RE = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+
+@app.post("/execute-trades")
+@limiter.limit("5/minute")
+async def execute_trades_endpoint(
+    request: Request,
+    body: OrderBatch,
+    idempotency_key: str | None = Header(None, description="Retrying with the same key never places an order twice"),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    Submit up to BATCH_MAX_ITEMS market orders at once (bounded parallelism),
+    optionally wait for their final state, and record them all with one
+    insert. Every order is validated before any is sent.
+    """
+    if not body.orders or len(body.orders) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {BATCH_MAX_ITEMS} orders.")
+    if idempotency_key is not None and not IDEMPOTENCY_KEY_RE.match(idempotency_key):
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-32 letters, digits, '-' or '_'.")
+    orders = []
+    for i, order in enumerate(body.orders):
+        ticker = order.ticker.strip().upper()
+        if not TICKER_RE.match(ticker):
+            raise HTTPException(status_code=400, detail=f"orders[{i}]: invalid ticker symbol.")
+        if order.side not in ("Buy", "Sell"):
+            raise HTTPException(status_code=400, detail=f"orders[{i}]: side must be Buy or Sell.")
+        if not order.qty > 0:
+            raise HTTPException(status_code=400, detail=f"orders[{i}]: qty must be positive.")
+        orders.append((ticker, order.side, order.qty))
+
+    # client_order_ids are global to the (shared) broker account, so scope keys per user
+    user_tag = hashlib.sha256(current_user.encode()).hexdigest()[:8]
+    batch_id = f"{user_tag}-{idempotency_key or uuid.uuid4().hex[:16]}"
+    broker = get_broker()
+    results = await broker.submit_orders(orders, batch_id)
+    print(f"[ALPACA] {current_user} submitted {len(orders)} orders (batch {batch_id})")
+
+    order_ids = [r["order_id"] for r in results if r.get("order_id")]
+    states = await broker.track_orders(order_ids) if body.wait and order_ids else {}
+    transactions = []
+    for result in results:
+        state = states.get(result.get("order_id"), {})
+        result["order_status"] = state.get("status")
+        result["filled_avg_price"] = state.get("filled_avg_price")
+        if result.get("order_id"):
+            transactions.append(Transaction(
+                user_email=current_user,
+                action=result["action"],
+                ticker=result["ticker"],
+                quantity=result["qty"],
+                price=state.get("filled_avg_price"),
+                status=state.get("status") or "submitted",
+                message=result.get("message"),
+                order_id=result["order_id"],
+                client_order_id=result["client_order_id"],
+            ))
+    try:
+        recorded = await record_transactions(transactions)
+    except Exception as e:   # the orders are placed either way; report rather than fail
+        print(f"[WARN] Could not record batch {batch_id}: {e}")
+        recorded = 0
+    return {"status": "success", "batch_id": batch_id, "results": results, "recorded": recorded}
+
+
 @app.post("/record-transaction")
 async def record_transaction_endpoint(
     trade_response: dict = Body(...),
@@ -503,18 +905,35 @@ async def record_transaction_endpoint(
 
 
 @app.get("/transactions")
-async def get_transactions(current_user: str = Depends(get_current_user)):
+async def get_transactions(
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    before: str | None = Query(None, description="next_before cursor from the previous page"),
+    start: datetime | None = Query(None, description="Only transactions executed at or after this time"),
+    end: datetime | None = Query(None, description="Only transactions executed before this time"),
+    summary: bool = Query(False, description="Return per-ticker totals instead of rows"),
+    current_user: str = Depends(get_current_user),
+):
+    """
+    The caller's transactions, newest first. Pages are keyed on
+    (executed_at, _id): pass the returned `next_before` as `before` to get
+    the next page (null on the last one). With summary=true, returns
+    per-ticker counts and notional over the whole [start, end) range instead.
+    """
     try:
-        transactions = await get_user_transactions(current_user)
-        for tx in transactions:
-            tx["_id"] = str(tx["_id"])
-            if "time" in tx:
-                tx["time"] = tx["time"].isoformat()
-            if "executed_at" in tx:
-                tx["executed_at"] = tx["executed_at"].isoformat()
-        return {"status": "success", "data": transactions}
+        cursor = decode_cursor(before) if before else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if summary:
+            totals = await summarize_user_transactions(current_user, start=start, end=end)
+            return {"status": "success", "data": totals}
+        # one extra row tells us whether another page exists
+        transactions = await get_user_transactions(current_user, limit=limit + 1, before=cursor,
+                                                   start=start, end=end)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch transactions: {str(e)}")
+    next_before = encode_cursor(transactions[limit - 1]) if len(transactions) > limit else None
+    return {"status": "success", "data": transactions[:limit], "next_before": next_before}
 
 
 @app.get("/watchlist")
@@ -523,6 +942,47 @@ async def fetch_watchlist(current_user: str = Depends(get_current_user)):
     return {"status": "success", "data": items}
 
 
+@app.get("/watchlist/predict")
+async def predict_watchlist(request: Request, current_user: str = Depends(get_current_user)):
+    """/predict/batch over the current user's watchlist."""
+    items = await get_watchlist(current_user)
+    symbols = parse_tickers([item["ticker"] for item in items])
+    if not symbols:
+        return {"status": "success", "data": [], "errors": {}}
+    return sanitize_json(await scan_tickers(symbols, get_inference(request.app)))
+
+
+class WatchlistBatch(BaseModel):
+    add: list[str] = []
+    remove: list[str] = []
+
+
+def validate_batch_tickers(raw: list[str]) -> list[str]:
+    """Normalise and de-duplicate a batch's tickers; 400 listing every invalid one."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in raw))
+    invalid = [t for t in tickers if not TICKER_RE.match(t)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid ticker symbols: {', '.join(invalid)}")
+    return tickers
+
+
+# registered before /watchlist/{ticker}, which would otherwise take "BATCH" as a ticker
+@app.post("/watchlist/batch")
+async def batch_update_watchlist(body: WatchlistBatch, current_user: str = Depends(get_current_user)):
+    """
+    Add and remove up to BATCH_MAX_ITEMS tickers in one request (one bulk
+    write). Every ticker is validated before anything is written.
+    """
+    add, remove = validate_batch_tickers(body.add), validate_batch_tickers(body.remove)
+    if len(add) + len(remove) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} tickers per batch.")
+    both = set(add) & set(remove)
+    if both:
+        raise HTTPException(status_code=400, detail=f"Tickers both added and removed: {', '.join(sorted(both))}")
+    results = await apply_watchlist_changes(current_user, add, remove)
+    return {"status": "success", "results": results}
+
+
 @app.post("/watchlist/{ticker}")
 async def add_ticker_to_watchlist(
     ticker: str,
@@ -555,6 +1015,10 @@ class AlertCreate(BaseModel):
     target_price: float
     condition: str   # "above" | "below"
 
+class AlertBatch(BaseModel):
+    create: list[AlertCreate] = []
+    delete: list[str] = []
+
 @app.get("/alerts")
 async def list_alerts(current_user: str = Depends(get_current_user)):
     items = await get_alerts(current_user)
@@ -577,19 +1041,64 @@ async def add_alert(
         user_email=current_user,
     )
     alert_id = await create_alert(alert)
+    hub = getattr(app.state, "price_hub", None)
+    if hub is not None:
+        hub.add_alert({**alert.dict(), "_id": alert_id})
     return {"message": "Alert created.", "alert_id": alert_id}
 
+@app.post("/alerts/batch")
+async def batch_update_alerts(body: AlertBatch, current_user: str = Depends(get_current_user)):
+    """
+    Create and delete up to BATCH_MAX_ITEMS alerts in one request (one bulk
+    write). Every item is validated before anything is written.
+    """
+    if len(body.create) + len(body.delete) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} alerts per batch.")
+    alerts = []
+    for i, item in enumerate(body.create):
+        ticker = item.ticker.strip().upper()
+        if not TICKER_RE.match(ticker):
+            raise HTTPException(status_code=400, detail=f"create[{i}]: invalid ticker symbol.")
+        if item.condition not in ("above", "below"):
+            raise HTTPException(status_code=400, detail=f"create[{i}]: condition must be 'above' or 'below'.")
+        alerts.append(PriceAlert(ticker=ticker, target_price=item.target_price,
+                                 condition=item.condition, user_email=current_user))
+    delete = list(dict.fromkeys(body.delete))
+    bad_ids = [a for a in delete if not ObjectId.is_valid(a)]
+    if bad_ids:
+        raise HTTPException(status_code=400, detail=f"Invalid alert ids: {', '.join(bad_ids)}")
+
+    results = await apply_alert_changes(current_user, alerts, delete)
+    hub = getattr(app.state, "price_hub", None)
+    if hub is not None:
+        for alert, result in zip(alerts, results):
+            if result["status"] == "created":
+                hub.add_alert({**alert.dict(), "_id": result["alert_id"]})
+        for result in results[len(alerts):]:
+            if result["status"] == "deleted":
+                hub.remove_alert(result["alert_id"])
+    return {"status": "success", "results": results}
+
 @app.delete("/alerts/{alert_id}")
 async def remove_alert(alert_id: str, current_user: str = Depends(get_current_user)):
     removed = await delete_alert(alert_id, current_user)
     if not removed:
         raise HTTPException(status_code=404, detail="Alert not found.")
+    hub = getattr(app.state, "price_hub", None)
+    if hub is not None:
+        hub.remove_alert(alert_id)
     return {"message": "Alert deleted."}
 
 @app.post("/alerts/{alert_id}/check")
 async def check_alert(alert_id: str, current_user: str = Depends(get_current_user)):
-    """Mark an alert as triggered (called by the frontend when threshold is crossed)."""
+    """
+    Mark an alert as triggered. Kept for older clients — the price hub now
+    evaluates alerts server-side and pushes them over /ws/prices.
+    """
     await mark_alert_triggered(alert_id)
+    hub = getattr(app.state, "price_hub", None)
+    if hub is not None:
+        hub.remove_alert(alert_id)
     return {"message": "Alert marked as triggered."}
 
 
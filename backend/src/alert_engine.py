@@ -0,0 +1,115 @@
+# src/alert_engine.py
+"""
+In-memory index of untriggered price alerts.
+
+Per ticker, "above" alerts sit in a min-heap on target price and "below"
+alerts in a max-heap, so a price update only looks at the alerts it actually
+crosses: O(k log n) for k fired alerts instead of a scan over all of them.
+
+Deleting an alert just forgets its id; the stale heap entry is skipped when
+it surfaces, and a ticker's heaps are rebuilt once more than half of their
+entries are stale.
+"""
+
+import heapq
+import itertools
+
+
+class AlertEngine:
+    """Untriggered alerts indexed by ticker and target price."""
+
+    def __init__(self):
+        self._alerts: dict[str, tuple[int, dict]] = {}            # id → (seq, alert)
+        self._above: dict[str, list[tuple]] = {}                  # ticker → [(target, seq, id)]
+        self._below: dict[str, list[tuple]] = {}                  # ticker → [(-target, seq, id)]
+        self._live: dict[str, int] = {}                           # ticker → untriggered alerts
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return str(alert_id) in self._alerts
+
+    def has_ticker(self, ticker: str) -> bool:
+        return self._live.get(ticker, 0) > 0
+
+    def tickers(self) -> list[str]:
+        return [t for t, n in self._live.items() if n > 0]
+
+    def add(self, alert: dict) -> None:
+        """Index an alert ({"_id", "ticker", "target_price", "condition", ...})."""
+        alert_id = str(alert["_id"])
+        if alert_id in self._alerts:
+            self.remove(alert_id)
+        if alert["condition"] not in ("above", "below"):
+            raise ValueError(f"Unknown alert condition {alert['condition']!r}")
+
+        ticker = alert["ticker"]
+        target = float(alert["target_price"])
+        seq = next(self._seq)   # tells a re-added alert apart from its stale heap entry
+        if alert["condition"] == "above":
+            heapq.heappush(self._above.setdefault(ticker, []), (target, seq, alert_id))
+        else:
+            heapq.heappush(self._below.setdefault(ticker, []), (-target, seq, alert_id))
+        self._alerts[alert_id] = (seq, alert)
+        self._live[ticker] = self._live.get(ticker, 0) + 1
+
+    def remove(self, alert_id: str) -> dict | None:
+        """Forget an alert. Returns it, or None if it was not indexed."""
+        entry = self._alerts.pop(str(alert_id), None)
+        if entry is None:
+            return None
+        alert = entry[1]
+        ticker = alert["ticker"]
+        self._live[ticker] -= 1
+        self._maybe_compact(ticker)
+        return alert
+
+    def evaluate(self, ticker: str, price: float) -> list[dict]:
+        """Remove and return every alert on `ticker` that `price` crosses."""
+        crossed = []
+        above = self._above.get(ticker)
+        while above and above[0][0] <= price:
+            crossed.append(heapq.heappop(above))
+        below = self._below.get(ticker)
+        while below and -below[0][0] >= price:
+            crossed.append(heapq.heappop(below))
+
+        alerts = []
+        for _, seq, alert_id in crossed:
+            if self._is_live(alert_id, seq):   # skip entries deleted earlier
+                alerts.append(self._alerts.pop(alert_id)[1])
+        if alerts:
+            self._live[ticker] -= len(alerts)
+        if not self._live.get(ticker):
+            self._drop_ticker(ticker)
+        return alerts
+
+    def evaluate_many(self, prices: dict[str, float]) -> list[dict]:
+        """evaluate() for a {ticker: price} batch."""
+        fired = []
+        for ticker, price in prices.items():
+            fired.extend(self.evaluate(ticker, price))
+        return fired
+
+    def _maybe_compact(self, ticker: str) -> None:
+        live = self._live.get(ticker, 0)
+        if live == 0:
+            self._drop_ticker(ticker)
+            return
+        above, below = self._above.get(ticker, []), self._below.get(ticker, [])
+        if len(above) + len(below) > 2 * live:
+            self._above[ticker] = [e for e in above if self._is_live(e[2], e[1])]
+            self._below[ticker] = [e for e in below if self._is_live(e[2], e[1])]
+            heapq.heapify(self._above[ticker])
+            heapq.heapify(self._below[ticker])
+
+    def _is_live(self, alert_id: str, seq: int) -> bool:
+        entry = self._alerts.get(alert_id)
+        return entry is not None and entry[0] == seq
+
+    def _drop_ticker(self, ticker: str) -> None:
+        self._above.pop(ticker, None)
+        self._below.pop(ticker, None)
+        self._live.pop(ticker, None)
@@ -1,20 +1,17 @@
+import hashlib
+import os
+import threading
+import time
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import os
+from config import TOKEN_CACHE_MAX_ENTRIES
+from src.cache import TTLCache
+from src.utils import hash_password, verify_password   # re-exported; the one CryptContext lives in utils
 
 SECRET_KEY = os.getenv("SECRET_KEY", "trading")  # override via .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str):
-    return pwd_context.hash(password)
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -26,3 +23,57 @@ def decode_access_token(token: str):
         return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+
+
+# ── Verified-token cache ───────────────────────────────────────────────────────
+
+# sha256(token) → (subject, exp). Only tokens that passed signature and claim
+# checks get here, and a hit is honoured only until the token's own exp.
+_token_cache = TTLCache("tokens", ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
+# sha256(token) → exp of revoked tokens. Not an LRU: evicting an entry would
+# quietly un-revoke it, so entries leave only once the token has expired anyway.
+# In-process only — with several workers, revoke in each (or use short expiries).
+_revoked: dict[bytes, float] = {}
+_revoked_lock = threading.Lock()
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def get_token_subject(token: str) -> str | None:
+    """
+    Subject ("sub") of a valid, unexpired, unrevoked access token, else None.
+    Same answer as decode_access_token(token)["sub"], but a token already
+    verified once is answered from _token_cache instead of re-checking its
+    signature.
+    """
+    key = _token_key(token)
+    if key in _revoked:
+        return None
+    cached = _token_cache.get(key)
+    if cached is not None:
+        subject, exp = cached
+        if exp > time.time():
+            return subject
+        _token_cache.pop(key)
+        return None
+    payload = decode_access_token(token)
+    subject = payload.get("sub") if payload else None
+    if not subject or not isinstance(payload.get("exp"), (int, float)):
+        return None
+    _token_cache.set(key, (subject, payload["exp"]))
+    return subject
+
+def revoke_token(token: str) -> None:
+    """Reject `token` from now until it expires (e.g. on logout)."""
+    key = _token_key(token)
+    _token_cache.pop(key)
+    payload = decode_access_token(token)
+    exp = payload.get("exp") if payload else None
+    if not isinstance(exp, (int, float)):
+        return   # invalid or expired already — nothing to revoke
+    now = time.time()
+    with _revoked_lock:
+        for k in [k for k, e in _revoked.items() if e <= now]:
+            del _revoked[k]
+        _revoked[key] = exp
@@ -9,10 +9,44 @@ simulates trading with the same generate_signal() logic used live:
 
 Returns per-period equity for both the strategy and a buy-and-hold baseline
 so the frontend can plot cumulative returns.
+
+run_backtest() evaluates the whole series with NumPy array operations. The
+original per-bar loop is kept as _run_backtest_loop() — it is the reference
+the vectorised engine is tested against and benchmarked with.
 """
 
 import numpy as np
-from src.signal_generator import generate_signal
+from src.signal_generator import generate_signal, generate_signals, BUY, HOLD
+
+STARTING_CASH = 10_000.0
+
+
+def _round2(values: np.ndarray) -> list:
+    """
+    Equivalent of [round(v, 2) for v in values], vectorised.
+
+    np.round() rounds the binary value times 100, which disagrees with
+    Python's round() on half-cent ties. Values that land within a few ulps of
+    a tie are therefore re-rounded individually; everything else is exact.
+    """
+    scaled = values * 100.0
+    out = np.rint(scaled) / 100.0
+    ties = np.nonzero(np.abs(scaled - np.floor(scaled) - 0.5) <= 4 * np.spacing(np.abs(scaled)))[0]
+    for i in ties.tolist():
+        out[i] = round(float(values[i]), 2)
+    return out.tolist()
+
+
+def _positions(signals: np.ndarray) -> np.ndarray:
+    """
+    Long/flat state after each bar (int8, 0 or 1) from generate_signals() codes.
+
+    A Buy while flat opens the position and a Sell while long closes it, so the
+    state after bar i is simply "was the last non-Hold signal a Buy?". That is
+    a forward-fill of the Buy/Sell events, done with a running max of indices.
+    """
+    last = np.maximum.accumulate(np.where(signals != HOLD, np.arange(len(signals)), -1))
+    return np.where(last >= 0, signals[np.maximum(last, 0)] == BUY, 0).astype(np.int8)
 
 
 def run_backtest(y_real: np.ndarray, predictions: np.ndarray) -> dict:
@@ -36,7 +70,78 @@ def run_backtest(y_real: np.ndarray, predictions: np.ndarray) -> dict:
     predictions = np.asarray(predictions).flatten()
     n = min(len(y_real), len(predictions))
 
-    cash        = 10_000.0   # starting capital
+    y = y_real[:n].astype(np.float64)
+    p = predictions[:n].astype(np.float64)
+
+    position = _positions(generate_signals(p, y))
+    previous = np.concatenate(([0], position[:-1])) if n else position
+    trade_idx = np.nonzero(position != previous)[0]
+    buy_idx   = trade_idx[position[trade_idx] == 1]
+    sell_idx  = trade_idx[position[trade_idx] == 0]
+
+    # Cash moves only on fills. Accumulating from the starting balance with a
+    # sequential cumsum reproduces the loop's running float additions exactly.
+    flows = np.zeros(n + 1)
+    flows[0] = STARTING_CASH
+    flows[buy_idx + 1]  = -y[buy_idx]
+    flows[sell_idx + 1] = y[sell_idx]
+    cash = np.cumsum(flows)[1:]
+
+    # Mark-to-market equity
+    equity = _round2(cash + position * y)
+
+    actions = ("Sell", "Buy")
+    trades = [
+        {"index": i, "action": actions[side], "price": price}
+        for i, side, price in zip(trade_idx.tolist(), position[trade_idx].tolist(), _round2(y[trade_idx]))
+    ]
+
+    # Round trips, plus the open position closed at the last price
+    trade_pnls = y[sell_idx] - y[buy_idx[:len(sell_idx)]]
+    if n and position[-1] == 1:
+        trade_pnls = np.append(trade_pnls, float(y_real[n - 1]) - y[buy_idx[-1]])
+
+    start_price = float(y_real[0])
+    end_price   = float(y_real[n - 1])
+
+    bah_equity = _round2(STARTING_CASH / start_price * y)
+
+    total_return = (equity[-1] - STARTING_CASH) / STARTING_CASH * 100 if equity else 0
+    bah_return   = (end_price - start_price) / start_price * 100
+
+    # Win rate
+    wins = int(np.count_nonzero(trade_pnls > 0))
+    win_rate = (wins / len(trade_pnls) * 100) if len(trade_pnls) else 0
+
+    # Max drawdown on strategy equity (running peak)
+    max_dd = 0.0
+    if equity:
+        curve = np.asarray(equity)
+        peak  = np.maximum.accumulate(curve)
+        max_dd = max(max_dd, float(((peak - curve) / peak * 100).max()))
+
+    return {
+        "dates":            list(map(str, range(1, n + 1))),
+        "strategy_equity":  equity,
+        "bah_equity":       bah_equity,
+        "trades":           trades,
+        "metrics": {
+            "total_return_pct": round(total_return, 2),
+            "bah_return_pct":   round(bah_return, 2),
+            "num_trades":       len(trades),
+            "win_rate_pct":     round(win_rate, 2),
+            "max_drawdown_pct": round(max_dd, 2),
+        },
+    }
+
+
+def _run_backtest_loop(y_real: np.ndarray, predictions: np.ndarray) -> dict:
+    """Per-bar reference implementation of run_backtest() (same result dict)."""
+    y_real      = np.asarray(y_real).flatten()
+    predictions = np.asarray(predictions).flatten()
+    n = min(len(y_real), len(predictions))
+
+    cash        = STARTING_CASH
     position    = 0          # shares held (0 or 1)
     entry_price = 0.0
     equity      = []
@@ -74,11 +179,11 @@ def run_backtest(y_real: np.ndarray, predictions: np.ndarray) -> dict:
     end_price   = float(y_real[n - 1])
 
     bah_equity = [
-        round(10_000.0 / start_price * float(y_real[i]), 2)
+        round(STARTING_CASH / start_price * float(y_real[i]), 2)
         for i in range(n)
     ]
 
-    total_return = (equity[-1] - 10_000.0) / 10_000.0 * 100 if equity else 0
+    total_return = (equity[-1] - STARTING_CASH) / STARTING_CASH * 100 if equity else 0
     bah_return   = (end_price - start_price) / start_price * 100
 
     # Win rate
@@ -86,7 +191,7 @@ def run_backtest(y_real: np.ndarray, predictions: np.ndarray) -> dict:
     win_rate = (wins / len(trade_pnls) * 100) if trade_pnls else 0
 
     # Max drawdown on strategy equity
-    peak = equity[0] if equity else 10_000.0
+    peak = equity[0] if equity else STARTING_CASH
     max_dd = 0.0
     for v in equity:
         if v > peak:
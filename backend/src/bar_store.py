@@ -0,0 +1,174 @@
+# src/bar_store.py
+"""
+Local on-disk OHLCV bar store.
+
+Bars are kept as one NumPy segment per ticker / interval / trading day:
+
+    {BAR_STORE_DIR}/{TICKER}/{interval}/{YYYY-MM-DD}.npy
+    {BAR_STORE_DIR}/{TICKER}/{interval}/coverage.json
+
+Segments are read back memory-mapped, so loading a range only touches the
+days it spans. coverage.json records the date ranges that have been fetched
+in full. A day only counts as covered once it is over (US/Eastern), so the
+current session is always re-requested while history is served from disk.
+"""
+
+import json
+import os
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from config import BAR_STORE_DIR
+
+STORE_DIR = BAR_STORE_DIR
+MARKET_TZ = ZoneInfo("America/New_York")
+
+BAR_DTYPE = np.dtype([
+    ("t", "<i8"),   # bar open, ms since epoch (UTC)
+    ("o", "<f8"),
+    ("h", "<f8"),
+    ("l", "<f8"),
+    ("c", "<f8"),
+    ("v", "<f8"),
+])
+
+
+# ── Paths and small helpers ────────────────────────────────────────────────────
+
+def _series_dir(ticker: str, interval: str) -> str:
+    return os.path.join(STORE_DIR, ticker.upper(), str(interval))
+
+
+def _coverage_path(ticker: str, interval: str) -> str:
+    return os.path.join(_series_dir(ticker, interval), "coverage.json")
+
+
+def _atomic_write(path: str, write) -> None:
+    """Write via a temp file + rename so concurrent readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def market_today() -> date:
+    return datetime.now(MARKET_TZ).date()
+
+
+def _days(start: date, end: date):
+    d = start
+    while d <= end:
+        yield d
+        d += timedelta(days=1)
+
+
+def _market_dates(t_ms: np.ndarray) -> np.ndarray:
+    """Trading date (US/Eastern) of each bar timestamp, as datetime64[D]."""
+    local = pd.to_datetime(t_ms, unit="ms", utc=True).tz_convert(MARKET_TZ)
+    return local.tz_localize(None).normalize().values.astype("datetime64[D]")
+
+
+# ── Bars ───────────────────────────────────────────────────────────────────────
+
+def bars_from_polygon(results: list[dict]) -> np.ndarray:
+    """Convert Polygon aggregate results into a BAR_DTYPE array."""
+    bars = np.empty(len(results), dtype=BAR_DTYPE)
+    for name in BAR_DTYPE.names:
+        bars[name] = [r.get(name, np.nan) for r in results]
+    return bars
+
+
+def last_day(bars: np.ndarray) -> str:
+    """Trading date (YYYY-MM-DD, US/Eastern) of the newest bar in a non-empty `bars`."""
+    return str(_market_dates(np.asarray(bars["t"]).max(keepdims=True))[0])
+
+
+def write_bars(ticker: str, interval: str, bars: np.ndarray) -> None:
+    """
+    Merge `bars` into the per-day segments. Bars that share a timestamp with
+    stored ones replace them, so re-fetching a partial day is safe.
+    """
+    if not len(bars):
+        return
+    bars = np.asarray(bars, dtype=BAR_DTYPE)
+    days = _market_dates(bars["t"])
+
+    for day in np.unique(days):
+        path = os.path.join(_series_dir(ticker, interval), f"{day}.npy")
+        segment = bars[days == day]
+        if os.path.exists(path):
+            stored = np.load(path)
+            segment = np.concatenate([stored[~np.isin(stored["t"], segment["t"])], segment])
+        segment = np.sort(segment, order="t")
+        _atomic_write(path, lambda f: np.save(f, segment))
+
+
+def read_bars(ticker: str, interval: str, start: str, end: str) -> np.ndarray:
+    """Return the stored bars for trading days start..end (inclusive), oldest first."""
+    directory = _series_dir(ticker, interval)
+    segments = []
+    for day in _days(date.fromisoformat(start), date.fromisoformat(end)):
+        path = os.path.join(directory, f"{day.isoformat()}.npy")
+        if os.path.exists(path):
+            segments.append(np.load(path, mmap_mode="r"))
+    if not segments:
+        return np.empty(0, dtype=BAR_DTYPE)
+    return np.concatenate(segments)
+
+
+# ── Coverage metadata ──────────────────────────────────────────────────────────
+
+def coverage(ticker: str, interval: str) -> list[tuple[str, str]]:
+    """Date ranges (inclusive, YYYY-MM-DD) that are fully stored locally."""
+    try:
+        with open(_coverage_path(ticker, interval)) as f:
+            return [tuple(r) for r in json.load(f)["ranges"]]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return []
+
+
+def mark_covered(ticker: str, interval: str, start: str, end: str) -> None:
+    """
+    Record start..end as fetched in full. Days that are not over yet are
+    clipped off, since more bars can still arrive for them.
+    """
+    last_complete = market_today() - timedelta(days=1)
+    start_d = date.fromisoformat(start)
+    end_d   = min(date.fromisoformat(end), last_complete)
+    if end_d < start_d:
+        return
+
+    spans = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in coverage(ticker, interval)]
+    spans.append((start_d, end_d))
+    spans.sort()
+
+    merged = [spans[0]]
+    for s, e in spans[1:]:
+        last_s, last_e = merged[-1]
+        if s <= last_e + timedelta(days=1):
+            merged[-1] = (last_s, max(last_e, e))
+        else:
+            merged.append((s, e))
+
+    payload = {"ranges": [[s.isoformat(), e.isoformat()] for s, e in merged]}
+    _atomic_write(_coverage_path(ticker, interval), lambda f: f.write(json.dumps(payload).encode()))
+
+
+def missing_ranges(ticker: str, interval: str, start: str, end: str) -> list[tuple[str, str]]:
+    """Sub-ranges of start..end that still have to come from the provider."""
+    spans = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in coverage(ticker, interval)]
+    missing, gap_start = [], None
+    end_d = date.fromisoformat(end)
+
+    for day in _days(date.fromisoformat(start), end_d):
+        covered = any(s <= day <= e for s, e in spans)
+        if not covered and gap_start is None:
+            gap_start = day
+        elif covered and gap_start is not None:
+            missing.append((gap_start.isoformat(), (day - timedelta(days=1)).isoformat()))
+            gap_start = None
+    if gap_start is not None:
+        missing.append((gap_start.isoformat(), end_d.isoformat()))
+    return missing
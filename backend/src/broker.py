@@ -0,0 +1,268 @@
+# src/broker.py
+"""
+Async access to the brokerage account.
+
+The Alpaca SDK is blocking (requests under the hood), so AsyncBroker runs its
+calls on a small dedicated thread pool instead of on the event loop. Account
+and position snapshots are cached for a short TTL and fetched through
+single-flight, so however many users refresh the dashboard at once, the
+broker sees at most one call per snapshot per TTL. Submitting an order drops
+both snapshots, and a fetch that started before the order cannot put its
+(now stale) result back.
+
+FakeBroker is an in-memory stand-in with the same interface as Alpaca's REST
+client, for tests, benchmarks and BROKER=fake local runs.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from config import BROKER, BROKER_CACHE_TTL, BROKER_WORKERS, ORDER_MAX_PARALLEL, ORDER_TRACK_TIMEOUT
+from src import trader
+from src.cache import TTLCache
+from src.singleflight import SingleFlight
+
+
+class AsyncBroker:
+    """
+    Args:
+        client: Object with Alpaca's REST interface (list_positions,
+            get_account, submit_order, get_order, get_order_by_client_order_id), or None for the shared Alpaca client
+            (created on first use).
+        ttl (float): Seconds an account/positions snapshot is served from cache.
+        workers (int): Threads running blocking broker calls.
+    """
+
+    def __init__(self, client=None, ttl: float = BROKER_CACHE_TTL, workers: int = BROKER_WORKERS):
+        self.client = client
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="broker")
+        self._cache = TTLCache("broker", ttl=ttl, max_entries=2)
+        self._flight = SingleFlight()
+        self._generation = 0   # bumped by invalidate(); fetches from older generations are discarded
+        self.upstream_calls = 0
+
+    async def positions(self) -> dict:
+        """trader.get_positions(), cached."""
+        return await self._snapshot("positions", trader.get_positions)
+
+    async def account(self) -> dict:
+        """trader.get_account_status(), cached."""
+        return await self._snapshot("account", trader.get_account_status)
+
+    async def submit_order(self, signal: str, ticker: str, qty: int = 1) -> dict:
+        """trader.execute_trade(); invalidates the cached snapshots unless nothing was sent."""
+        result = await self._run(trader.execute_trade, signal, ticker, qty)
+        if result.get("status") != "skipped":
+            self.invalidate()
+        return result
+
+    async def submit_orders(self, orders: list[tuple[str, str, float]], batch_id: str,
+                            max_parallel: int = ORDER_MAX_PARALLEL) -> list[dict]:
+        """
+        Submit (ticker, "Buy"/"Sell", qty) orders concurrently, at most
+        max_parallel at a time. Order i gets client_order_id f"{batch_id}-{i}",
+        so resubmitting the same batch_id returns the orders already placed
+        rather than placing them twice.
+
+        Returns:
+            list[dict]: execute_trade() results in input order, each with its
+            "client_order_id".
+        """
+        sem = asyncio.Semaphore(max_parallel)
+
+        async def submit(i: int, ticker: str, signal: str, qty: float) -> dict:
+            client_order_id = f"{batch_id}-{i}"
+            async with sem:
+                result = await self._run(trader.execute_trade, signal, ticker, qty, client_order_id=client_order_id)
+            return {**result, "client_order_id": client_order_id}
+
+        results = await asyncio.gather(*(submit(i, *order) for i, order in enumerate(orders)))
+        self.invalidate()
+        return list(results)
+
+    async def track_orders(self, order_ids: list[str], timeout: float = ORDER_TRACK_TIMEOUT,
+                           interval: float = 0.5) -> dict[str, dict]:
+        """
+        Poll orders until each reaches a terminal state or `timeout` passes.
+
+        Returns:
+            dict: order_id → trader.get_order_status() result from the last
+            poll ({"status": "unknown", "error"} if it could not be read).
+        """
+        states: dict[str, dict] = {}
+        pending = list(dict.fromkeys(order_ids))
+        deadline = asyncio.get_running_loop().time() + timeout
+
+        async def poll(order_id: str) -> dict:
+            try:
+                return await self._run(trader.get_order_status, order_id)
+            except Exception as e:
+                return {"order_id": order_id, "status": "unknown", "error": str(e)}
+
+        while pending:
+            for state in await asyncio.gather(*(poll(o) for o in pending)):
+                states[state["order_id"]] = state
+            pending = [o for o in pending if states[o]["status"] not in trader.TERMINAL_ORDER_STATUSES]
+            if not pending or asyncio.get_running_loop().time() + interval > deadline:
+                break
+            await asyncio.sleep(interval)
+        if any(s["status"] == "filled" for s in states.values()):
+            self.invalidate()   # fills after submission moved positions again
+        return states
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"upstream_calls": self.upstream_calls, "generation": self._generation, **self._cache.stats()}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    async def _snapshot(self, name: str, fetch) -> dict:
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+        generation = self._generation
+
+        async def load():
+            result = await self._run(fetch)
+            # errors are not cached; neither is anything an order has made stale
+            if result.get("status") == "success" and generation == self._generation:
+                self._cache.set(name, result)
+            return result
+
+        return await self._flight.do((name, generation), load)
+
+    async def _run(self, fn, *args, **kwargs):
+        self.upstream_calls += 1
+        client = self.client or await asyncio.get_running_loop().run_in_executor(self._pool, trader.get_api)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, lambda: fn(*args, api=client, **kwargs))
+
+
+_broker: AsyncBroker | None = None
+
+def get_broker() -> AsyncBroker:
+    """The process-wide AsyncBroker (Alpaca, or FakeBroker when BROKER=fake)."""
+    global _broker
+    if _broker is None:
+        _broker = AsyncBroker(FakeBroker() if BROKER == "fake" else None)
+    return _broker
+
+
+# ── Fake broker ────────────────────────────────────────────────────────────────
+
+class FakeBroker:
+    """
+    In-memory paper account with Alpaca's REST interface. Market orders fill
+    at `prices[ticker]` (default 100); holdings change at submission, while
+    get_order() reports "accepted" until fill_delay seconds have passed and
+    "filled" after. Counts calls per method.
+
+    Args:
+        cash (float): Starting cash.
+        prices (dict): {ticker: fill/mark price}.
+        latency (float): Seconds each call sleeps, to imitate the network.
+        fill_delay (float): Seconds before a submitted order reports filled.
+        reject (set): Tickers whose orders are refused.
+    """
+
+    def __init__(self, cash: float = 100_000.0, prices: dict[str, float] | None = None, latency: float = 0.0,
+                 fill_delay: float = 0.0, reject: set[str] | None = None):
+        self.cash = cash
+        self.prices = dict(prices or {})
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.reject = set(reject or ())
+        self.holdings: dict[str, tuple[float, float]] = {}   # ticker → (qty, avg cost)
+        self.orders: list[SimpleNamespace] = []
+        self._by_id: dict[str, SimpleNamespace] = {}
+        self._by_client_id: dict[str, SimpleNamespace] = {}
+        self.calls = {"list_positions": 0, "get_account": 0, "submit_order": 0, "get_order": 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        if self.latency:
+            threading.Event().wait(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+
+    def list_positions(self) -> list[SimpleNamespace]:
+        self._call("list_positions")
+        with self._lock:
+            positions = []
+            for ticker, (qty, avg) in self.holdings.items():
+                price = self.prices.get(ticker, 100.0)
+                pnl = (price - avg) * qty
+                positions.append(SimpleNamespace(
+                    symbol=ticker, qty=str(qty), avg_entry_price=str(avg), current_price=str(price),
+                    market_value=str(price * qty), unrealized_pl=str(pnl),
+                    unrealized_plpc=str(pnl / (avg * qty) if avg * qty else 0.0),
+                    side="long" if qty > 0 else "short",
+                ))
+            return positions
+
+    def get_account(self) -> SimpleNamespace:
+        self._call("get_account")
+        with self._lock:
+            equity = self.cash + sum(self.prices.get(t, 100.0) * q for t, (q, _) in self.holdings.items())
+            return SimpleNamespace(status="ACTIVE", buying_power=str(self.cash), equity=str(equity),
+                                   cash=str(self.cash))
+
+    def submit_order(self, symbol: str, qty: float, side: str, type: str = "market",
+                     time_in_force: str = "gtc", client_order_id: str | None = None) -> SimpleNamespace:
+        self._call("submit_order")
+        with self._lock:
+            if client_order_id is not None and client_order_id in self._by_client_id:
+                raise ValueError("client_order_id must be unique")
+            if symbol in self.reject:
+                raise ValueError(f"asset {symbol} is not tradable")
+            price = self.prices.get(symbol, 100.0)
+            held, avg = self.holdings.get(symbol, (0.0, 0.0))
+            delta = qty if side == "buy" else -qty
+            new_qty = held + delta
+            if new_qty == 0:
+                self.holdings.pop(symbol, None)
+            else:
+                new_avg = (held * avg + delta * price) / new_qty if side == "buy" else avg
+                self.holdings[symbol] = (new_qty, new_avg)
+            self.cash -= delta * price
+            order = SimpleNamespace(id=str(uuid.UUID(int=next(self._ids))), client_order_id=client_order_id,
+                                    symbol=symbol, qty=qty, side=side, type=type, time_in_force=time_in_force,
+                                    submitted_at=time.monotonic(), fill_price=price)
+            self.orders.append(order)
+            self._by_id[order.id] = order
+            if client_order_id is not None:
+                self._by_client_id[client_order_id] = order
+            return self._snapshot(order)
+
+    def get_order(self, order_id: str) -> SimpleNamespace:
+        self._call("get_order")
+        with self._lock:
+            return self._snapshot(self._by_id[order_id])
+
+    def get_order_by_client_order_id(self, client_order_id: str) -> SimpleNamespace:
+        self._call("get_order")
+        with self._lock:
+            return self._snapshot(self._by_client_id[client_order_id])
+
+    def _snapshot(self, order: SimpleNamespace) -> SimpleNamespace:
+        filled = time.monotonic() - order.submitted_at >= self.fill_delay
+        return SimpleNamespace(
+            id=order.id, client_order_id=order.client_order_id, symbol=order.symbol, qty=str(order.qty),
+            side=order.side, status="filled" if filled else "accepted",
+            filled_qty=str(order.qty if filled else 0),
+            filled_avg_price=str(order.fill_price) if filled else None,
+        )
@@ -0,0 +1,171 @@
+# src/cache.py
+"""
+Bounded in-memory cache shared by the data, news and market endpoints.
+
+Each TTLCache is one namespace with its own TTL, entry limit and byte budget.
+Entries are evicted least-recently-used first once either limit is exceeded,
+and dropped for good once they are older than ttl + stale_ttl (the stale
+window lets single-flight refreshes serve the old value while they run).
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+import numpy as np
+import pandas as pd
+
+
+def sizeof(value: Any) -> int:
+    """Approximate memory footprint of a cached value, in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "ts", "size")
+
+    def __init__(self, value: Any, ts: float, size: int):
+        self.value = value
+        self.ts = ts
+        self.size = size
+
+
+class TTLCache:
+    """
+    LRU cache with per-entry TTL, an entry limit and a byte budget.
+
+    Args:
+        name (str): Namespace, used as the key in all_stats().
+        ttl (float): Seconds an entry counts as fresh.
+        max_entries (int): Entry limit (None = unbounded).
+        max_bytes (int): Total size limit as measured by sizeof() (None = unbounded).
+        stale_ttl (float): Extra seconds an expired entry is kept for get_stale().
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int | None = None,
+                 max_bytes: int | None = None, stale_ttl: float = 0):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable) -> Any | None:
+        """Fresh value for `key`, or None."""
+        with self._lock:
+            entry, age = self._lookup(key)
+            if entry is None or age >= self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.value
+
+    def get_stale(self, key: Hashable) -> tuple[Any, float | None]:
+        """(value, age_seconds) for `key` even if past its TTL, or (None, None)."""
+        with self._lock:
+            entry, age = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            if age < self.ttl:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry.value, age
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                print(f"[WARN] cache {self.name}: {key!r} ({size} bytes) exceeds max_bytes, not cached")
+                return
+            self._data[key] = _Entry(value, time.monotonic(), size)
+            self._bytes += size
+            while ((self.max_entries is not None and len(self._data) > self.max_entries)
+                   or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _lookup(self, key: Hashable) -> tuple[_Entry | None, float | None]:
+        # caller holds the lock
+        entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        age = time.monotonic() - entry.ts
+        if age >= self.ttl + self.stale_ttl:
+            self._remove(key)
+            self.expirations += 1
+            return None, None
+        self._data.move_to_end(key)
+        return entry, age
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._data.pop(key).size
+
+
+# ── Registry ───────────────────────────────────────────────────────────────────
+
+_registry: dict[str, TTLCache] = {}
+
+
+def all_stats() -> dict[str, dict]:
+    """stats() of every cache created in this process, by name."""
+    return {name: cache.stats() for name, cache in _registry.items()}
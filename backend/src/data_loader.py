@@ -1,74 +1,104 @@
 # src/data_loader.py
 
-import os
-import requests
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from datetime import datetime
-from config import POLYGON_API_KEY
+from src import bar_store, polygon_client
+from src.cache import TTLCache
+from src.singleflight import SingleFlight
+from config import DATA_CACHE_MAX_ENTRIES, DATA_CACHE_MAX_BYTES
 
 # ── In-memory cache ────────────────────────────────────────────────────────────
-_cache: dict = {}
+# Keyed by (ticker, interval, start, end); sits in front of the on-disk bar store.
 CACHE_TTL_SECONDS = 300  # 5 minutes
+_cache = TTLCache("data", ttl=CACHE_TTL_SECONDS, max_entries=DATA_CACHE_MAX_ENTRIES, max_bytes=DATA_CACHE_MAX_BYTES)
 
+# Concurrent misses for the same key share one store read / Polygon fetch
+_flight = SingleFlight()
 
-def _is_cache_valid(ticker: str) -> bool:
-    if ticker not in _cache:
-        return False
-    age = (datetime.now() - _cache[ticker]["ts"]).total_seconds()
-    return age < CACHE_TTL_SECONDS
+# The bar store does blocking file I/O (np.load/np.save, coverage rewrites). It
+# runs off the event loop on one thread, which also serialises the read-merge-
+# write of a day segment between loads of overlapping ranges.
+_store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bar-store")
 
 
-def _get_cached(ticker: str) -> pd.DataFrame | None:
-    if _is_cache_valid(ticker):
-        print(f"[CACHE] Returning cached data for {ticker}")
-        return _cache[ticker]["df"]
-    return None
+async def _in_store(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_store_pool, fn, *args)
+
+
+# ── Provider ───────────────────────────────────────────────────────────────────
+
+async def _fetch_polygon(ticker: str, start: str, end: str, interval: str) -> list[dict]:
+    """Every bar Polygon has for the range, following next_url past the 50,000-result page limit."""
+    print(f"[INFO] Fetching {interval}min data for {ticker} from Polygon ({start} → {end})...")
+
+    url = f"/v2/aggs/ticker/{ticker}/range/{interval}/minute/{start}/{end}"
+    params = {
+        "adjusted": "true",
+        "sort": "asc",
+        "limit": 50000,
+    }
 
+    data = _checked(ticker, await polygon_client.get_json(url, params=params))
+    results = list(data.get("results", []))
+    while data.get("next_url"):
+        data = _checked(ticker, await polygon_client.get_json(data["next_url"]))
+        results.extend(data.get("results", []))
+    return results
 
-def _set_cache(ticker: str, df: pd.DataFrame) -> None:
-    _cache[ticker] = {"df": df, "ts": datetime.now()}
+
+def _checked(ticker: str, page: dict) -> dict:
+    # An error status with a 200 must not read as "no bars": the range would be marked covered
+    status = page.get("status", "OK")
+    if status not in ("OK", "DELAYED"):
+        raise ValueError(f"Polygon returned {status} for {ticker}: {page.get('error') or page.get('message', '')}")
+    return page
 
 
 # ── Loader ─────────────────────────────────────────────────────────────────────
 
-def load_data(ticker="AAPL", start="2025-01-01", end="2025-04-01", interval="5", save_csv=True):
+async def load_data(ticker="AAPL", start="2025-01-01", end="2025-04-01", interval="5"):
     """
-    Fetch historical 5-min bar data from Polygon.
-    Results are cached in memory for 5 minutes to avoid redundant API calls.
+    Fetch historical 5-min bar data.
+
+    Bars are served from the local bar store; Polygon is only asked for the
+    days the store does not cover yet (typically just the current session).
+    Results are also cached in memory for 5 minutes per (ticker, interval,
+    start, end), and concurrent misses for the same key share one load.
     """
-    cached = _get_cached(ticker)
+    key = (ticker, str(interval), start, end)
+    cached = _cache.get(key)
     if cached is not None:
+        print(f"[CACHE] Returning cached data for {ticker}")
         return cached
+    return await _flight.do(key, lambda: _load_uncached(key, ticker, start, end, interval))
 
-    print(f"[INFO] Fetching {interval}min data for {ticker} from Polygon ({start} → {end})...")
 
-    url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/{interval}/minute/{start}/{end}"
-    params = {
-        "adjusted": "true",
-        "sort": "asc",
-        "limit": 50000,
-        "apiKey": POLYGON_API_KEY
-    }
+def _store_fetched(ticker: str, interval: str, gap_start: str, gap_end: str, results: list[dict]) -> None:
+    fetched = bar_store.bars_from_polygon(results)
+    bar_store.write_bars(ticker, interval, fetched)
+    # A gap that ended before today is complete once every page has been read,
+    # bars or not (weekends, holidays), so it is never asked for again. A gap
+    # reaching today is only vouched for up to its last bar.
+    if gap_end < bar_store.market_today().isoformat():
+        bar_store.mark_covered(ticker, interval, gap_start, gap_end)
+    elif len(fetched):
+        bar_store.mark_covered(ticker, interval, gap_start, min(gap_end, bar_store.last_day(fetched)))
 
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
 
-    data = response.json().get("results", [])
-    if not data:
-        raise ValueError(f"No data returned from Polygon for {ticker}.")
+async def _load_uncached(key: tuple, ticker: str, start: str, end: str, interval: str) -> pd.DataFrame:
+    gaps = await _in_store(bar_store.missing_ranges, ticker, interval, start, end)
+    for gap_start, gap_end in gaps:
+        results = await _fetch_polygon(ticker, gap_start, gap_end, interval)
+        await _in_store(_store_fetched, ticker, interval, gap_start, gap_end, results)
 
-    df = pd.DataFrame(data)
-    df['t'] = pd.to_datetime(df['t'], unit='ms')
-    df.set_index('t', inplace=True)
-    df.rename(columns={"c": "Close"}, inplace=True)
-    df = df[['Close']]
+    bars = await _in_store(bar_store.read_bars, ticker, interval, start, end)
+    if not len(bars):
+        raise ValueError(f"No data returned from Polygon for {ticker}.")
 
-    if save_csv:
-        os.makedirs("data", exist_ok=True)
-        filepath = f"data/{ticker}_polygon_data.csv"
-        df.to_csv(filepath)
-        print(f"[INFO] Saved data to {filepath}")
+    df = pd.DataFrame({"Close": bars["c"]}, index=pd.to_datetime(bars["t"], unit="ms"))
+    df.index.name = "t"
 
-    _set_cache(ticker, df)
+    _cache.set(key, df)
     print(f"[INFO] Cached data for {ticker} ({len(df)} rows)")
     return df
@@ -0,0 +1,236 @@
+# src/indicators.py
+"""
+RSI, SMA and MACD without recomputing the whole history.
+
+Two modes, both matching the `ta` library's definitions (fillna=False):
+
+  - compute_indicators(): batch mode over a (bars,) series or a
+    (bars, tickers) matrix of aligned closes, one ticker per column. The
+    exponential averages run as IIR filters (scipy.signal.lfilter) along the
+    time axis, so there is no Python loop over bars or tickers.
+  - IndicatorState: O(1) streaming state for one ticker. Seed it from history
+    with IndicatorState.from_history() (one batch pass) and feed it each new
+    close with update(). latest_indicators() keeps one per ticker, so
+    repeated calls only stream the bars that arrived in between.
+
+  RSI          Wilder smoothing (alpha = 1/14) of gains and losses; 100 when
+               there have been no losses. Defined from the 14th bar.
+  SMA          14-bar simple mean. Defined from the 14th bar.
+  MACD         EMA(12) - EMA(26) of closes. Defined from the 26th bar.
+  MACD signal  EMA(9) of MACD, started at the first MACD value. Defined from
+               the 34th bar.
+
+Bars before an indicator is defined are NaN, as in `ta`.
+"""
+
+from collections import deque
+import numpy as np
+from scipy.signal import lfilter
+from config import INDICATOR_CACHE_MAX_ENTRIES
+from src.cache import TTLCache
+
+RSI_WINDOW = 14
+SMA_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+COLUMNS = ("rsi", "sma", "macd", "macd_signal")
+
+
+def _ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """y[0] = x[0]; y[t] = alpha * x[t] + (1 - alpha) * y[t - 1], along axis 0."""
+    zi = (1 - alpha) * x[:1]   # makes the first output equal x[0]
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=0, zi=zi)
+    return y
+
+
+def _rsi(avg_up, avg_down):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_down))
+
+
+def _batch(closes: np.ndarray, rsi_window: int, sma_window: int, fast: int, slow: int, signal: int) -> tuple[dict, dict]:
+    """(indicators, raw running averages) for aligned closes; see compute_indicators()."""
+    n = len(closes)
+    diff = np.diff(closes, axis=0, prepend=closes[:1])   # first bar counts as no change, as in ta
+    avg_up = _ema(np.maximum(diff, 0.0), 1 / rsi_window)
+    avg_down = _ema(np.maximum(-diff, 0.0), 1 / rsi_window)
+    ema_fast = _ema(closes, 2 / (fast + 1))
+    ema_slow = _ema(closes, 2 / (slow + 1))
+
+    rsi = _rsi(avg_up, avg_down)
+    rsi[:rsi_window - 1] = np.nan
+
+    sma = np.full_like(closes, np.nan)
+    if n >= sma_window:
+        sma[sma_window - 1:] = np.lib.stride_tricks.sliding_window_view(closes, sma_window, axis=0).mean(axis=-1)
+
+    macd = ema_fast - ema_slow
+    macd[:slow - 1] = np.nan
+    ema_signal = np.full_like(closes, np.nan)
+    if n >= slow:
+        ema_signal[slow - 1:] = _ema(macd[slow - 1:], 2 / (signal + 1))
+    macd_signal = ema_signal.copy()
+    macd_signal[:slow + signal - 2] = np.nan
+
+    raw = {"avg_up": avg_up, "avg_down": avg_down, "ema_fast": ema_fast, "ema_slow": ema_slow, "ema_signal": ema_signal}
+    return {"rsi": rsi, "sma": sma, "macd": macd, "macd_signal": macd_signal}, raw
+
+
+def compute_indicators(closes, rsi_window: int = RSI_WINDOW, sma_window: int = SMA_WINDOW,
+                       fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL) -> dict[str, np.ndarray]:
+    """
+    RSI, SMA, MACD and MACD signal for every bar.
+
+    Args:
+        closes: Close prices, oldest first — shape (bars,) for one ticker or
+            (bars, tickers) for several aligned tickers. Must not contain NaN.
+
+    Returns:
+        dict: {"rsi", "sma", "macd", "macd_signal"}, each shaped like `closes`.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if not len(closes):
+        return {name: closes.copy() for name in COLUMNS}
+    if np.isnan(closes).any():
+        raise ValueError("Closes must not contain NaN.")
+    return _batch(closes, rsi_window, sma_window, fast, slow, signal)[0]
+
+
+class IndicatorState:
+    """
+    Streaming RSI / SMA / MACD for one ticker: each update() is O(1).
+
+    Args:
+        rsi_window, sma_window, fast, slow, signal (int): Indicator periods.
+    """
+
+    __slots__ = ("rsi_window", "sma_window", "fast", "slow", "signal", "count", "last_close",
+                 "avg_up", "avg_down", "window", "window_sum", "ema_fast", "ema_slow", "ema_signal")
+
+    def __init__(self, rsi_window: int = RSI_WINDOW, sma_window: int = SMA_WINDOW,
+                 fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL):
+        self.rsi_window, self.sma_window = rsi_window, sma_window
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.count = 0                                   # bars seen
+        self.last_close = None
+        self.avg_up = self.avg_down = 0.0
+        self.window: deque[float] = deque(maxlen=sma_window)
+        self.window_sum = 0.0
+        self.ema_fast = self.ema_slow = self.ema_signal = None
+
+    @classmethod
+    def from_history(cls, closes, **periods) -> "IndicatorState":
+        """State after `closes` (oldest first), from one batch pass instead of a per-bar loop."""
+        closes = np.asarray(closes, dtype=np.float64)
+        state = cls(**periods)
+        if not len(closes):
+            return state
+        if closes.ndim != 1 or np.isnan(closes).any():
+            raise ValueError("Seed closes must be a 1-D series without NaN.")
+        _, raw = _batch(closes, state.rsi_window, state.sma_window, state.fast, state.slow, state.signal)
+        state.count = len(closes)
+        state.last_close = float(closes[-1])
+        state.avg_up, state.avg_down = float(raw["avg_up"][-1]), float(raw["avg_down"][-1])
+        state.window.extend(closes[-state.sma_window:].tolist())
+        state.window_sum = float(sum(state.window))
+        state.ema_fast, state.ema_slow = float(raw["ema_fast"][-1]), float(raw["ema_slow"][-1])
+        if state.count >= state.slow:
+            state.ema_signal = float(raw["ema_signal"][-1])
+        return state
+
+    def update(self, close: float) -> dict[str, float]:
+        """Add the next bar's close; returns the indicators for that bar (NaN until defined)."""
+        close = float(close)
+        change = 0.0 if self.last_close is None else close - self.last_close
+        self.last_close = close
+        self.count += 1
+
+        a = 1 / self.rsi_window
+        if self.count == 1:
+            self.avg_up, self.avg_down = max(change, 0.0), max(-change, 0.0)
+        else:
+            self.avg_up += a * (max(change, 0.0) - self.avg_up)
+            self.avg_down += a * (max(-change, 0.0) - self.avg_down)
+
+        if len(self.window) == self.sma_window:
+            self.window_sum -= self.window[0]
+        self.window.append(close)
+        self.window_sum += close
+
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += 2 / (self.fast + 1) * (close - self.ema_fast)
+            self.ema_slow += 2 / (self.slow + 1) * (close - self.ema_slow)
+        if self.count >= self.slow:
+            macd = self.ema_fast - self.ema_slow
+            if self.ema_signal is None:
+                self.ema_signal = macd
+            else:
+                self.ema_signal += 2 / (self.signal + 1) * (macd - self.ema_signal)
+        return self.current()
+
+    def copy(self) -> "IndicatorState":
+        clone = IndicatorState.__new__(IndicatorState)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.window = deque(self.window, maxlen=self.sma_window)
+        return clone
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self.window.__sizeof__()
+
+    def current(self) -> dict[str, float]:
+        """Indicators as of the last bar, without advancing."""
+        nan = float("nan")
+        return {
+            "rsi": float(_rsi(self.avg_up, self.avg_down)) if self.count >= self.rsi_window else nan,
+            "sma": self.window_sum / self.sma_window if self.count >= self.sma_window else nan,
+            "macd": self.ema_fast - self.ema_slow if self.count >= self.slow else nan,
+            "macd_signal": self.ema_signal if self.count >= self.slow + self.signal - 1 else nan,
+        }
+
+
+# ── Per-ticker states ──────────────────────────────────────────────────────────
+
+STATE_TTL = 24 * 3600   # a ticker idle for a day is re-seeded from history
+
+# ticker → (timestamp of the last bar folded in, state). The newest bar is never
+# folded in: Polygon may return the in-progress bar with a different close next time.
+_states = TTLCache("indicators", ttl=STATE_TTL, max_entries=INDICATOR_CACHE_MAX_ENTRIES)
+
+
+def latest_indicators(ticker: str, closes, timestamps) -> dict[str, float]:
+    """
+    Indicators as of the newest bar, streaming only the bars since the last
+    call for `ticker` (a full seed on the first call or if the history no
+    longer contains the last bar seen).
+
+    Args:
+        closes: Close prices, oldest first.
+        timestamps: Bar timestamps matching `closes`.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    timestamps = np.asarray(timestamps)
+    if not len(closes):
+        raise ValueError(f"No bars for {ticker}.")
+    entry = _states.get(ticker)
+    matches = np.nonzero(timestamps[:-1] == entry[0])[0] if entry is not None else ()
+    if len(matches):
+        state = entry[1]
+        for close in closes[matches[0] + 1:-1]:
+            state.update(close)
+    else:
+        state = IndicatorState.from_history(closes[:-1])
+    if len(closes) > 1:
+        _states.set(ticker, (timestamps[-2], state))
+    return state.copy().update(closes[-1])
+
+
+def reset_indicators(ticker: str | None = None) -> None:
+    """Drop the stored state for one ticker (or all)."""
+    if ticker is None:
+        _states.clear()
+    else:
+        _states.pop(ticker)
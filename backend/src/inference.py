@@ -0,0 +1,187 @@
+# src/inference.py
+"""
+Batched model inference off the event loop.
+
+A single worker thread owns the Keras model. Async callers enqueue their input
+windows and await a future; the worker drains the queue, coalescing whatever
+arrives within `max_wait_ms` (up to `max_batch_size` rows) into one
+model.predict call, then hands each caller back its own slice of the output.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("X", "loop", "future", "enqueued")
+
+    def __init__(self, X: np.ndarray, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.X = X
+        self.loop = loop
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+def _resolve(future: asyncio.Future, result=None, error: BaseException | None = None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent predict requests into batched model.predict calls.
+
+    Args:
+        model: Object with a Keras-style predict(X) method.
+        max_batch_size (int): Most rows passed to a single predict call.
+        max_wait_ms (float): How long the worker waits for more requests after
+            the first one arrives before running the batch.
+    """
+
+    _STOP = object()
+
+    def __init__(self, model, max_batch_size: int = 2048, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._max_batch_rows = 0
+        self._latencies = deque(maxlen=1000)     # seconds, enqueue → result
+        self._predict_times = deque(maxlen=1000)
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+            self._thread = None
+        self._fail_pending(RuntimeError("inference batcher stopped"))
+
+    def _fail_pending(self, error: BaseException) -> None:
+        # Whatever the worker didn't pick up before _STOP would otherwise never resolve
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not self._STOP:
+                self._deliver(request, None, error)
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    async def predict(self, X) -> np.ndarray:
+        """Run the model on X (rows = windows) and return its output for those rows."""
+        X = np.asarray(X)
+        if not len(X):
+            return np.empty((0, 1))
+        self.start()
+        loop = asyncio.get_running_loop()
+        request = _Request(X, loop, loop.create_future())
+        self._queue.put(request)
+        return await request.future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            latencies = np.array(self._latencies) * 1000
+            predict_times = np.array(self._predict_times) * 1000
+        return {
+            "queue_depth":       self._queue.qsize(),
+            "batches":           self._batches,
+            "requests":          self._requests,
+            "rows":              self._rows,
+            "avg_batch_rows":    round(self._rows / self._batches, 2) if self._batches else 0,
+            "max_batch_rows":    self._max_batch_rows,
+            "avg_batch_requests": round(self._requests / self._batches, 2) if self._batches else 0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                "p95": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+                "p99": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+            },
+            "avg_predict_ms": round(float(predict_times.mean()), 2) if len(predict_times) else None,
+            "max_batch_size":    self.max_batch_size,
+            "max_wait_ms":       self.max_wait * 1000,
+        }
+
+    # ── Worker thread ──────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is self._STOP:
+                return
+
+            batch, rows = [first], len(first.X)
+            deadline = time.perf_counter() + self.max_wait
+            stopping = False
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is self._STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+                rows += len(request.X)
+
+            self._run_batch(batch)
+            if stopping:
+                return
+
+    def _run_batch(self, batch: list[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            X = np.concatenate([r.X for r in batch])
+            outputs = [
+                np.asarray(self.model.predict(X[i:i + self.max_batch_size], verbose=0))
+                for i in range(0, len(X), self.max_batch_size)
+            ]
+            predictions = np.concatenate(outputs)
+        except Exception as e:
+            for r in batch:
+                self._deliver(r, None, e)
+            return
+
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._rows += len(X)
+            self._max_batch_rows = max(self._max_batch_rows, len(X))
+            self._predict_times.append(finished - started)
+            self._latencies.extend(finished - r.enqueued for r in batch)
+
+        offset = 0
+        for r in batch:
+            self._deliver(r, predictions[offset:offset + len(r.X)])
+            offset += len(r.X)
+
+    @staticmethod
+    def _deliver(request: _Request, result, error: BaseException | None = None) -> None:
+        try:
+            request.loop.call_soon_threadsafe(_resolve, request.future, result, error)
+        except RuntimeError:
+            pass   # caller's event loop is already closed
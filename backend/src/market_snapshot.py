@@ -0,0 +1,194 @@
+# src/market_snapshot.py
+"""
+The whole US market's previous-day bars, held in memory.
+
+Polygon's grouped-daily endpoint returns every US stock's OHLCV for a date in
+one call. MarketSnapshotService fetches it on a schedule and keeps it as a
+MarketSnapshot — one NumPy array per field plus a ticker → row index — so a
+previous-day bar for any ticker, or a top-N list over ~10k tickers, is answered
+from memory in microseconds with no upstream call.
+
+A refresh builds a new snapshot and swaps it in whole; readers never see a
+half-built table, and a failed refresh keeps serving the last good one.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+import httpx
+import numpy as np
+from config import MARKET_SNAPSHOT_INTERVAL
+from src import polygon_client
+from src.singleflight import SingleFlight
+
+FIELDS = ("open", "high", "low", "close", "volume")
+RANKINGS = {
+    # name → (column, largest first)
+    "gainers": ("change_pct", True),
+    "losers":  ("change_pct", False),
+    "volume":  ("volume", True),
+}
+
+
+class MarketSnapshot:
+    """
+    Columnar table of one trading day's grouped aggregates.
+
+    Args:
+        date (str): Trading day, YYYY-MM-DD.
+        results (list[dict]): Polygon grouped-daily results ({"T", "o", "h", "l", "c", "v", ...}).
+    """
+
+    def __init__(self, date: str, results: list[dict]):
+        rows = [r for r in results if r.get("T") and r.get("c") is not None]
+        self.date = date
+        self.loaded_at = time.time()
+        self.tickers = np.array([r["T"] for r in rows], dtype=object)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        self.close = np.array([r["c"] for r in rows], dtype=np.float64)
+        self.open = np.array([r.get("o") or r["c"] for r in rows], dtype=np.float64)
+        self.high = np.array([r.get("h") or r["c"] for r in rows], dtype=np.float64)
+        self.low = np.array([r.get("l") or r["c"] for r in rows], dtype=np.float64)
+        self.volume = np.array([r.get("v") or 0 for r in rows], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.change_pct = np.where(self.open > 0, (self.close - self.open) / self.open * 100, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def bar(self, ticker: str) -> dict | None:
+        """{"ticker", "date", "open", "high", "low", "close", "volume", "change_pct"}, or None if not listed."""
+        i = self.index.get(ticker)
+        return None if i is None else self._row(i)
+
+    def top(self, n: int = 20, by: str = "gainers", min_volume: float = 0) -> list[dict]:
+        """
+        The n rows ranked by `by` ("gainers", "losers" or "volume"), among
+        tickers that traded at least `min_volume` shares.
+        """
+        column, largest = RANKINGS[by]
+        values = getattr(self, column)
+        candidates = np.flatnonzero(self.volume >= min_volume) if min_volume else np.arange(len(self))
+        if n <= 0 or not len(candidates):
+            return []
+        keys = -values[candidates] if largest else values[candidates]
+        if n < len(candidates):
+            part = np.argpartition(keys, n - 1)[:n]
+            candidates, keys = candidates[part], keys[part]
+        return [self._row(i) for i in candidates[np.argsort(keys, kind="stable")]]
+
+    def _row(self, i: int) -> dict:
+        return {
+            "ticker":     self.tickers[i],
+            "date":       self.date,
+            "open":       round(float(self.open[i]), 2),
+            "high":       round(float(self.high[i]), 2),
+            "low":        round(float(self.low[i]), 2),
+            "close":      round(float(self.close[i]), 2),
+            "volume":     int(self.volume[i]),
+            "change_pct": round(float(self.change_pct[i]), 2),
+        }
+
+
+async def fetch_grouped(date: str) -> list[dict]:
+    """Polygon grouped-daily results for every US stock on `date`."""
+    grouped = await polygon_client.get_json(
+        f"/v2/aggs/grouped/locale/us/market/stocks/{date}",
+        params={"adjusted": "true"},
+    )
+    return grouped.get("results", [])
+
+
+class MarketSnapshotService:
+    """
+    Keeps the latest MarketSnapshot loaded.
+
+    Args:
+        fetch: Async callable returning grouped-daily results for a
+            YYYY-MM-DD date (defaults to fetch_grouped).
+        interval (float): Seconds between scheduled refreshes.
+        lookback (int): Calendar days searched back for the last trading
+            day with data (covers weekends and market holidays).
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[list[dict]]] = fetch_grouped,
+                 interval: float = MARKET_SNAPSHOT_INTERVAL, lookback: int = 5):
+        self.fetch = fetch
+        self.interval = interval
+        self.lookback = lookback
+        self.snapshot: MarketSnapshot | None = None
+        self._flight = SingleFlight()
+        self._task: asyncio.Task | None = None
+        self.upstream_calls = 0
+        self.refreshes = 0
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        # in the background: Polygon being slow or down must not hold up startup
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    # ── Loading ────────────────────────────────────────────────────────────────
+
+    async def refresh(self) -> MarketSnapshot | None:
+        """Load the most recent trading day's bars; concurrent callers share one load."""
+        return await self._flight.do("refresh", self._load)
+
+    async def ensure(self) -> MarketSnapshot | None:
+        """The current snapshot, loading one first if none has been loaded yet."""
+        return self.snapshot or await self.refresh()
+
+    async def _load(self) -> MarketSnapshot | None:
+        for days_back in range(1, self.lookback + 1):
+            d = datetime.today() - timedelta(days=days_back)
+            if d.weekday() >= 5:   # skip Saturday (5) and Sunday (6)
+                continue
+            date_str = d.strftime("%Y-%m-%d")
+            if self.snapshot is not None and self.snapshot.date >= date_str:
+                return self.snapshot   # already have the latest available day
+            try:
+                self.upstream_calls += 1
+                results = await self.fetch(date_str)
+            except httpx.HTTPStatusError as e:
+                print(f"[WARN] market snapshot grouped HTTP {e.response.status_code}: {e.response.text[:120]}")
+                break   # 403 / 401 won't improve with a different date
+            except Exception as e:
+                print(f"[WARN] market snapshot grouped: {e}")
+                break
+            if results:
+                self.snapshot = MarketSnapshot(date_str, results)
+                self.refreshes += 1
+                print(f"[INFO] market snapshot: loaded {len(self.snapshot)} tickers from {date_str}")
+                break
+            print(f"[WARN] market snapshot grouped {date_str}: no results, trying earlier date")
+        return self.snapshot
+
+    # ── Lookups (memory only) ──────────────────────────────────────────────────
+
+    def bar(self, ticker: str) -> dict | None:
+        """Previous-day bar for `ticker` from the loaded snapshot, or None."""
+        return self.snapshot.bar(ticker) if self.snapshot is not None else None
+
+    def stats(self) -> dict:
+        snap = self.snapshot
+        return {
+            "date": snap.date if snap else None,
+            "tickers": len(snap) if snap else 0,
+            "age_seconds": round(time.time() - snap.loaded_at, 1) if snap else None,
+            "bytes": sum(getattr(snap, f).nbytes for f in (*FIELDS, "change_pct")) if snap else 0,
+            "refreshes": self.refreshes,
+            "upstream_calls": self.upstream_calls,
+        }
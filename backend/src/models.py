@@ -28,6 +28,7 @@ class Transaction(BaseModel):
     status: Optional[str] = None   # e.g. "success"
     message: Optional[str] = None  # e.g. "Buy order submitted..."
     order_id: Optional[str] = None # order identifier
+    client_order_id: Optional[str] = None  # idempotency key sent with batch orders
     executed_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -1,6 +1,68 @@
+import base64
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from src.db import db
 from src.models import User, Transaction, WatchlistItem, PriceAlert
-from src.utils import verify_password
+from src.utils import verify_and_update_async
+
+# ── Indexes ────────────────────────────────────────────────────────────────────
+
+# Every query below filters on one of these, so none of them scans a collection.
+INDEXES = {
+    "users": [IndexModel([("email", ASCENDING)], unique=True, name="email_unique")],
+    "watchlist": [
+        IndexModel([("user_email", ASCENDING), ("ticker", ASCENDING)], unique=True, name="user_ticker_unique"),
+    ],
+    "transactions": [
+        IndexModel([("user_email", ASCENDING), ("executed_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_executed_at_id"),
+        # a retried order batch must not record its fills twice
+        IndexModel([("client_order_id", ASCENDING)], unique=True, name="client_order_id_unique",
+                   partialFilterExpression={"client_order_id": {"$type": "string"}}),
+    ],
+    "alerts": [
+        IndexModel([("user_email", ASCENDING)], name="user_untriggered",
+                   partialFilterExpression={"triggered": False}),
+    ],
+}
+
+# Superseded indexes, dropped by ensure_indexes if still present.
+RETIRED_INDEXES = {
+    "transactions": ["user_executed_at"],   # replaced by user_executed_at_id (keyset pagination)
+}
+
+# Fields each query returns — password hashes and owner emails stay in the database.
+USER_LOGIN_FIELDS = {"email": 1, "username": 1, "full_name": 1, "password": 1}
+TRANSACTION_FIELDS = {"user_email": 0}
+WATCHLIST_FIELDS = {"ticker": 1, "added_at": 1}
+ALERT_FIELDS = {"ticker": 1, "target_price": 1, "condition": 1, "triggered": 1, "created_at": 1}
+ACTIVE_ALERT_FIELDS = {"ticker": 1, "target_price": 1, "condition": 1, "user_email": 1}
+
+
+async def ensure_indexes() -> None:
+    """
+    Create the indexes in INDEXES (a no-op for ones that already exist).
+    Called once at startup; failures are logged, not raised, so the API still
+    starts when the database is unreachable or holds duplicates that block a
+    unique index.
+    """
+    for collection, names in RETIRED_INDEXES.items():
+        for name in names:
+            try:
+                await db[collection].drop_index(name)
+            except OperationFailure:   # already gone
+                pass
+            except Exception as e:
+                print(f"[WARN] Could not drop index {collection}.{name}: {e}")
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            print(f"[WARN] Could not create indexes on {collection}: {e}")
+            continue
+        print(f"[INFO] Indexes ready on {collection}")
 
 # ── Users ──────────────────────────────────────────────────────────────────────
 
@@ -8,50 +70,239 @@ async def create_user(user: User):
     return await db.users.insert_one(user.dict(exclude={"id"}))
 
 async def get_user_by_email(email: str):
-    return await db.users.find_one({"email": email})
+    """Returns {"_id"} when the email is registered, else None."""
+    return await db.users.find_one({"email": email}, {"_id": 1})
 
 async def authenticate_user(email: str, password: str):
-    user = await db.users.find_one({"email": email})
-    if user and verify_password(password, user.get("password")):
-        user.pop("password", None)
-        return user
-    return None
+    user = await db.users.find_one({"email": email}, USER_LOGIN_FIELDS)
+    if not user:
+        return None
+    ok, new_hash = await verify_and_update_async(password, user.get("password"))
+    if not ok:
+        return None
+    if new_hash:   # stored with another bcrypt cost — upgrade it now we know the password
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
+    user.pop("password", None)
+    return user
 
 # ── Transactions ───────────────────────────────────────────────────────────────
 
 async def record_transaction(transaction: Transaction):
     return await db.transactions.insert_one(transaction.dict(exclude={"id"}))
 
-async def get_user_transactions(user_email: str) -> list:
-    """Return only transactions that belong to the given user."""
-    cursor = db.transactions.find({"user_email": user_email})
-    return await cursor.to_list(length=100)
+async def record_transactions(transactions: list[Transaction]) -> int:
+    """
+    Insert many transactions with one insert_many. Rows whose client_order_id
+    is already recorded (a retried batch) are skipped. Returns the number inserted.
+    """
+    if not transactions:
+        return 0
+    docs = [t.dict(exclude={"id"}) for t in transactions]
+    try:
+        result = await db.transactions.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+def _transactions_match(user_email: str, start: datetime | None, end: datetime | None) -> dict:
+    match = {"user_email": user_email}
+    if start is not None or end is not None:
+        match["executed_at"] = {}
+        if start is not None:
+            match["executed_at"]["$gte"] = start
+        if end is not None:
+            match["executed_at"]["$lt"] = end
+    return match
+
+def encode_cursor(tx: dict) -> str:
+    """
+    Opaque `before` cursor for a serialised transaction (its executed_at and
+    _id; _id only for legacy rows written without executed_at).
+    """
+    return base64.urlsafe_b64encode(f"{tx.get('executed_at') or ''}|{tx['_id']}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, ObjectId]:
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        executed_at, tx_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(executed_at) if executed_at else None), ObjectId(tx_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+async def get_user_transactions(
+    user_email: str,
+    limit: int = 100,
+    before: tuple[datetime, ObjectId] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list:
+    """
+    A user's transactions, newest first, one keyset page at a time.
+
+    Args:
+        limit (int): Page size.
+        before: (executed_at, _id) of the last row of the previous page
+            (see decode_cursor); the page starts right after it. Legacy rows
+            without executed_at sort after every dated row, ordered by _id.
+        start / end (datetime): Only transactions executed in [start, end).
+
+    Returns:
+        list: JSON-ready rows — _id and executed_at already strings, converted
+        by the database in the same pipeline rather than row by row here.
+    """
+    match = _transactions_match(user_email, start, end)
+    if before is not None:
+        executed_at, tx_id = before
+        if executed_at is None:
+            match["$or"] = [{"executed_at": None, "_id": {"$lt": tx_id}}]
+        else:
+            match["$or"] = [
+                {"executed_at": {"$lt": executed_at}},
+                {"executed_at": executed_at, "_id": {"$lt": tx_id}},
+                {"executed_at": None},   # undated legacy rows come last
+            ]
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"executed_at": DESCENDING, "_id": DESCENDING}},   # served by user_executed_at_id
+        {"$limit": limit},
+        {"$project": TRANSACTION_FIELDS},
+        {"$set": {
+            "_id": {"$toString": "$_id"},
+            "executed_at": {"$dateToString": {"date": "$executed_at", "format": "%Y-%m-%dT%H:%M:%S.%L"}},
+        }},
+    ]
+    return await db.transactions.aggregate(pipeline).to_list(length=None)
+
+async def summarize_user_transactions(
+    user_email: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list:
+    """
+    Per-ticker totals of a user's transactions, computed in the database.
+
+    Returns:
+        list[dict]: {"ticker", "trades", "buys", "sells", "bought_qty",
+        "sold_qty", "notional", "last_executed_at"}, largest notional first.
+        notional sums quantity × price over the rows that carry a price.
+    """
+    pipeline = [
+        {"$match": _transactions_match(user_email, start, end)},
+        {"$group": {
+            "_id": "$ticker",
+            "trades": {"$sum": 1},
+            "buys": {"$sum": {"$cond": [{"$eq": ["$action", "Buy"]}, 1, 0]}},
+            "sells": {"$sum": {"$cond": [{"$eq": ["$action", "Sell"]}, 1, 0]}},
+            "bought_qty": {"$sum": {"$cond": [{"$eq": ["$action", "Buy"]}, "$quantity", 0]}},
+            "sold_qty": {"$sum": {"$cond": [{"$eq": ["$action", "Sell"]}, "$quantity", 0]}},
+            "notional": {"$sum": {"$multiply": [{"$ifNull": ["$quantity", 0]}, {"$ifNull": ["$price", 0]}]}},
+            "last_executed_at": {"$max": "$executed_at"},
+        }},
+        {"$sort": {"notional": DESCENDING, "_id": ASCENDING}},
+        {"$project": {
+            "_id": 0,
+            "ticker": "$_id",
+            "trades": 1, "buys": 1, "sells": 1, "bought_qty": 1, "sold_qty": 1, "notional": 1,
+            "last_executed_at": {"$dateToString": {"date": "$last_executed_at", "format": "%Y-%m-%dT%H:%M:%S.%L"}},
+        }},
+    ]
+    return await db.transactions.aggregate(pipeline).to_list(length=None)
 
 # ── Watchlist ──────────────────────────────────────────────────────────────────
 
 async def get_watchlist(user_email: str) -> list:
-    cursor = db.watchlist.find({"user_email": user_email})
+    cursor = db.watchlist.find({"user_email": user_email}, WATCHLIST_FIELDS)
     items = await cursor.to_list(length=100)
     for item in items:
         item["_id"] = str(item["_id"])
     return items
 
 async def add_to_watchlist(ticker: str, user_email: str) -> bool:
-    existing = await db.watchlist.find_one({"ticker": ticker, "user_email": user_email})
-    if existing:
-        return False
+    """Add `ticker` unless it is already watched (one upsert). Returns True if it was added."""
     item = WatchlistItem(ticker=ticker)
-    await db.watchlist.insert_one({**item.dict(), "user_email": user_email})
-    return True
+    try:
+        result = await db.watchlist.update_one(
+            {"user_email": user_email, "ticker": ticker},
+            {"$setOnInsert": {"added_at": item.added_at}},
+            upsert=True,
+        )
+    except DuplicateKeyError:   # a concurrent request inserted it first
+        return False
+    return result.upserted_id is not None
 
 async def remove_from_watchlist(ticker: str, user_email: str) -> bool:
     result = await db.watchlist.delete_one({"ticker": ticker, "user_email": user_email})
     return result.deleted_count > 0
 
+async def _bulk_write(collection, ops: list) -> tuple[dict, dict]:
+    """
+    Run `ops` as one unordered bulk_write.
+
+    Returns:
+        tuple: ({op index: upserted/inserted _id}, {op index: error message})
+        — ordered=False keeps going past failed operations, so one bad item
+        does not sink the rest.
+    """
+    if not ops:
+        return {}, {}
+    try:
+        result = await collection.bulk_write(ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+    errors = {err["index"]: err for err in details.get("writeErrors", [])}
+    upserted = {u["index"]: u["_id"] for u in details.get("upserted", [])}
+    return upserted, errors
+
+async def apply_watchlist_changes(user_email: str, add: list[str], remove: list[str]) -> list[dict]:
+    """
+    Add and remove many tickers in one bulk_write (plus one find when there
+    are removals, to tell which tickers were actually watched).
+
+    Returns:
+        list[dict]: One {"ticker", "op", "status"} per ticker, adds first.
+        status is "added" / "exists" for adds and "removed" / "not_found"
+        for removals, or "error" (+ "detail") when the write itself failed.
+    """
+    watched = set()
+    if remove:
+        cursor = db.watchlist.find({"user_email": user_email, "ticker": {"$in": remove}}, {"ticker": 1, "_id": 0})
+        watched = {item["ticker"] for item in await cursor.to_list(length=None)}
+
+    added_at = datetime.utcnow()
+    ops = [UpdateOne({"user_email": user_email, "ticker": t}, {"$setOnInsert": {"added_at": added_at}}, upsert=True)
+           for t in add]
+    delete_index = {}   # ticker → index of its DeleteOne in ops
+    for t in remove:
+        if t in watched and t not in delete_index:
+            delete_index[t] = len(ops)
+            ops.append(DeleteOne({"user_email": user_email, "ticker": t}))
+    upserted, errors = await _bulk_write(db.watchlist, ops)
+
+    results = []
+    for i, ticker in enumerate(add):
+        if i in upserted:
+            results.append({"ticker": ticker, "op": "add", "status": "added"})
+        elif i not in errors or errors[i].get("code") == 11000:   # matched, or lost an insert race
+            results.append({"ticker": ticker, "op": "add", "status": "exists"})
+        else:
+            results.append({"ticker": ticker, "op": "add", "status": "error", "detail": errors[i].get("errmsg")})
+    for ticker in remove:
+        i = delete_index.get(ticker)
+        if i is None:
+            results.append({"ticker": ticker, "op": "remove", "status": "not_found"})
+        elif i in errors:
+            results.append({"ticker": ticker, "op": "remove", "status": "error", "detail": errors[i].get("errmsg")})
+        else:
+            results.append({"ticker": ticker, "op": "remove", "status": "removed"})
+    return results
+
 # ── Price Alerts ───────────────────────────────────────────────────────────────
 
 async def get_alerts(user_email: str) -> list:
-    cursor = db.alerts.find({"user_email": user_email, "triggered": False})
+    cursor = db.alerts.find({"user_email": user_email, "triggered": False}, ALERT_FIELDS)
     items = await cursor.to_list(length=100)
     for item in items:
         item["_id"] = str(item["_id"])
@@ -62,10 +313,69 @@ async def create_alert(alert: PriceAlert) -> str:
     return str(result.inserted_id)
 
 async def delete_alert(alert_id: str, user_email: str) -> bool:
-    from bson import ObjectId
     result = await db.alerts.delete_one({"_id": ObjectId(alert_id), "user_email": user_email})
     return result.deleted_count > 0
 
+async def apply_alert_changes(user_email: str, create: list[PriceAlert], delete: list[str]) -> list[dict]:
+    """
+    Create and delete many of a user's alerts in one bulk_write (plus one
+    find when there are deletions, to tell which ids the user owns).
+
+    Returns:
+        list[dict]: Creates first — {"op": "create", "ticker", "status":
+        "created", "alert_id"} (or "error" + "detail") — then one
+        {"op": "delete", "alert_id", "status": "deleted" / "not_found"} per id
+        ("error" + "detail" if its delete failed).
+    """
+    owned = set()
+    if delete:
+        cursor = db.alerts.find({"user_email": user_email, "_id": {"$in": [ObjectId(a) for a in delete]}}, {"_id": 1})
+        owned = {str(item["_id"]) for item in await cursor.to_list(length=None)}
+
+    docs = [{**alert.dict(), "_id": ObjectId()} for alert in create]
+    ops = [InsertOne(doc) for doc in docs]
+    delete_index = {}   # alert id → index of its DeleteOne in ops
+    for a in delete:
+        if a in owned and a not in delete_index:
+            delete_index[a] = len(ops)
+            ops.append(DeleteOne({"_id": ObjectId(a), "user_email": user_email}))
+    _, errors = await _bulk_write(db.alerts, ops)
+
+    results = []
+    for i, doc in enumerate(docs):
+        if i in errors:
+            results.append({"op": "create", "ticker": doc["ticker"], "status": "error",
+                            "detail": errors[i].get("errmsg")})
+        else:
+            results.append({"op": "create", "ticker": doc["ticker"], "status": "created",
+                            "alert_id": str(doc["_id"])})
+    for alert_id in delete:
+        i = delete_index.get(alert_id)
+        if i is None:
+            results.append({"op": "delete", "alert_id": alert_id, "status": "not_found"})
+        elif i in errors:
+            results.append({"op": "delete", "alert_id": alert_id, "status": "error", "detail": errors[i].get("errmsg")})
+        else:
+            results.append({"op": "delete", "alert_id": alert_id, "status": "deleted"})
+    return results
+
 async def mark_alert_triggered(alert_id: str) -> None:
-    from bson import ObjectId
     await db.alerts.update_one({"_id": ObjectId(alert_id)}, {"$set": {"triggered": True}})
+
+async def mark_alerts_triggered(alert_ids: list[str]) -> int:
+    """Mark many alerts as triggered with a single update_many. Returns the number modified."""
+    if not alert_ids:
+        return 0
+    result = await db.alerts.update_many(
+        {"_id": {"$in": [ObjectId(a) for a in alert_ids]}},
+        {"$set": {"triggered": True}},
+    )
+    return result.modified_count
+
+async def get_active_alerts() -> list:
+    """Every untriggered alert, across users (loaded by the price hub at startup)."""
+    cursor = db.alerts.find({"triggered": False}, ACTIVE_ALERT_FIELDS)
+    items = await cursor.to_list(length=None)
+    for item in items:
+        item["_id"] = str(item["_id"])
+    return items
@@ -1,5 +1,10 @@
 """
-Fetch recent news for a ticker from Polygon and score each article with VADER.
+Fetch recent news for tickers from Polygon and score each article with VADER.
+
+Scores are cached per article (Polygon's article id, else a hash of its URL),
+not per ticker: the same story shows up under several tickers and across
+refreshes, and is scored once. Unseen articles are scored together in one job
+on a worker thread, off the event loop.
 
 VADER (Valence Aware Dictionary and sEntiment Reasoner) is specifically designed
 for short social/news texts. compound score ranges -1 (most negative) to +1 (most
@@ -9,9 +14,16 @@ positive). Thresholds used:
   otherwise         → Neutral
 """
 
-import requests
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import httpx
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from config import POLYGON_API_KEY
+from config import SENTIMENT_CACHE_MAX_ENTRIES, SENTIMENT_HALF_LIFE_HOURS
+from src import polygon_client
+from src.cache import TTLCache
 
 _analyzer = SentimentIntensityAnalyzer()
 
@@ -36,45 +48,150 @@ def _label(compound: float) -> str:
     return "Neutral"
 
 
-def fetch_news(ticker: str, limit: int = 8) -> list[dict]:
+# ── Per-article score cache ────────────────────────────────────────────────────
+
+# An article's text does not change, so a day-long TTL only bounds staleness
+# of the lexicon, not of the score.
+_score_cache = TTLCache("sentiment", ttl=24 * 3600, max_entries=SENTIMENT_CACHE_MAX_ENTRIES)
+
+# VADER is pure Python: a process pool would spend more on pickling than on
+# scoring, so one thread keeps it off the event loop and scores in batches.
+_score_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+
+
+def article_key(article: dict) -> str:
+    """Stable cache key for a Polygon news article: its id, else a hash of its URL (or title)."""
+    if article.get("id"):
+        return f"id:{article['id']}"
+    ref = article.get("article_url") or article.get("title", "")
+    return "url:" + hashlib.sha1(ref.encode()).hexdigest()
+
+
+def _article_text(article: dict) -> str:
+    return f"{article.get('title', '')}. {article.get('description', '')}"
+
+
+def score_texts(texts: list[str]) -> list[float]:
+    """VADER compound score (rounded to 3 dp) for each text."""
+    return [round(_analyzer.polarity_scores(text)["compound"], 3) for text in texts]
+
+
+async def score_articles(articles: list[dict]) -> list[float]:
     """
-    Return up to `limit` recent news articles for `ticker` with sentiment scores.
-    Each item: title, description, url, published_utc, source, sentiment, compound
+    Compound score per article, scoring only articles not already in
+    _score_cache — all of them in one batch on the sentiment thread.
+    """
+    keys = [article_key(a) for a in articles]
+    scores = {k: _score_cache.get(k) for k in dict.fromkeys(keys)}
+    unseen = [k for k, v in scores.items() if v is None]
+    if unseen:
+        texts = {k: _article_text(a) for k, a in zip(keys, articles) if k in unseen}
+        batch = await asyncio.get_running_loop().run_in_executor(_score_pool, score_texts, list(texts.values()))
+        for k, compound in zip(texts, batch):
+            _score_cache.set(k, compound)
+            scores[k] = compound
+    return [scores[k] for k in keys]
+
+
+def _format(article: dict, compound: float) -> dict:
+    return {
+        "title":         article.get("title", ""),
+        "description":   article.get("description", ""),
+        "url":           article.get("article_url", ""),
+        "published_utc": article.get("published_utc", ""),
+        "source":        article.get("publisher", {}).get("name", ""),
+        "sentiment":     _label(compound),
+        "compound":      compound,
+    }
+
+
+# ── Aggregates ─────────────────────────────────────────────────────────────────
+
+def _age_hours(published_utc: str, now: float) -> float | None:
+    try:
+        published = datetime.fromisoformat(published_utc.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return max(0.0, (now - published.timestamp()) / 3600)
+
+
+def aggregate_sentiment(articles: list[dict], half_life_hours: float = SENTIMENT_HALF_LIFE_HOURS,
+                        now: float | None = None) -> dict:
     """
+    Summarise scored articles (fetch_news() items) for one ticker.
+
+    Returns:
+        dict: {"count", "mean", "weighted", "sentiment"} — mean is the plain
+        average compound; weighted halves an article's weight every
+        `half_life_hours` of age (undated articles count as brand new), and
+        sentiment is the label of the weighted score.
+    """
+    if not articles:
+        return {"count": 0, "mean": None, "weighted": None, "sentiment": "Neutral"}
+    now = time.time() if now is None else now
+    total = weight_sum = 0.0
+    for a in articles:
+        age = _age_hours(a.get("published_utc", ""), now)
+        weight = 0.5 ** ((age or 0.0) / half_life_hours)
+        total += weight * a["compound"]
+        weight_sum += weight
+    weighted = round(total / weight_sum, 3)
+    return {
+        "count": len(articles),
+        "mean": round(sum(a["compound"] for a in articles) / len(articles), 3),
+        "weighted": weighted,
+        "sentiment": _label(weighted),
+    }
+
+
+# ── Fetching ───────────────────────────────────────────────────────────────────
+
+async def _fetch_raw(ticker: str, limit: int) -> list[dict]:
     try:
-        r = requests.get(
-            "https://api.polygon.io/v2/reference/news",
+        payload = await polygon_client.get_json(
+            "/v2/reference/news",
             params={
                 "ticker":  ticker.upper(),
                 "limit":   limit,
                 "order":   "desc",
                 "sort":    "published_utc",
-                "apiKey":  POLYGON_API_KEY,
             },
-            timeout=8,
         )
-        if not r.ok:
-            print(f"[WARN] news {ticker}: HTTP {r.status_code}")
-            return []
-
-        articles = r.json().get("results", [])
+    except httpx.HTTPStatusError as e:
+        print(f"[WARN] news {ticker}: HTTP {e.response.status_code}")
+        raise
     except Exception as e:
         print(f"[WARN] news {ticker}: {e}")
-        return []
+        raise
+    return payload.get("results", [])
 
-    results = []
-    for a in articles:
-        text     = f"{a.get('title', '')}. {a.get('description', '')}"
-        scores   = _analyzer.polarity_scores(text)
-        compound = round(scores["compound"], 3)
-        results.append({
-            "title":         a.get("title", ""),
-            "description":   a.get("description", ""),
-            "url":           a.get("article_url", ""),
-            "published_utc": a.get("published_utc", ""),
-            "source":        a.get("publisher", {}).get("name", ""),
-            "sentiment":     _label(compound),
-            "compound":      compound,
-        })
-
-    return results
+
+async def fetch_news(ticker: str, limit: int = 8) -> list[dict]:
+    """
+    Return up to `limit` recent news articles for `ticker` with sentiment scores.
+    Each item: title, description, url, published_utc, source, sentiment, compound
+    Raises if Polygon could not be reached, so a failure is never mistaken for
+    (and cached as) a ticker without news.
+    """
+    news, errors = await fetch_news_many([ticker], limit)
+    if ticker in errors:
+        raise errors[ticker]
+    return news[ticker]
+
+
+async def fetch_news_many(tickers: list[str], limit: int = 8) -> tuple[dict[str, list[dict]], dict[str, Exception]]:
+    """
+    fetch_news() for several tickers: the Polygon requests run concurrently
+    (the news endpoint filters on one ticker per request) and every unseen
+    article across all of them is scored in a single batch.
+
+    Returns:
+        (dict, dict): {ticker: [article, ...]} in the order given for tickers
+        that were fetched, and {ticker: exception} for those that failed.
+    """
+    raw = await asyncio.gather(*(_fetch_raw(t, limit) for t in tickers), return_exceptions=True)
+    errors = {t: r for t, r in zip(tickers, raw) if isinstance(r, Exception)}
+    fetched = [(t, articles) for t, articles in zip(tickers, raw) if t not in errors]
+    flat = [a for _, articles in fetched for a in articles]
+    scores = iter(await score_articles(flat))
+    return {t: [_format(a, next(scores)) for a in articles] for t, articles in fetched}, errors
@@ -0,0 +1,127 @@
+# src/plotting.py
+"""
+Chart data for /predict.
+
+By default the endpoint returns the actual/predicted series downsampled to
+roughly the chart's pixel width and the browser draws them. A PNG is only
+rendered when explicitly requested: in a separate process (matplotlib's
+pyplot state machine is not thread-safe, and rasterising holds the GIL), with
+the object-oriented Figure API, and cached per (ticker, data version).
+"""
+
+import asyncio
+import base64
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import PLOT_WORKERS, PLOT_CACHE_MAX_ENTRIES
+from src.cache import TTLCache
+from src.singleflight import SingleFlight
+
+DEFAULT_POINTS = 600   # roughly the dashboard chart width in pixels
+
+
+# ── Series ─────────────────────────────────────────────────────────────────────
+
+def downsample_indices(values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of at most `points` samples that keep the shape of `values`.
+
+    The series is cut into points // 2 buckets and the min and max of each
+    bucket are kept (so spikes survive), plus the first and last sample.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    n = len(values)
+    if n <= points:
+        return np.arange(n)
+
+    buckets = max(points // 2 - 1, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    # sort by value within each bucket; buckets stay contiguous, in order
+    order = np.lexsort((values, bucket_of))
+    keep = np.concatenate([[0, n - 1], order[edges[:-1]], order[edges[1:] - 1]])
+    return np.unique(keep)
+
+
+def series_payload(y_real: np.ndarray, predictions: np.ndarray, points: int = DEFAULT_POINTS) -> dict:
+    """Actual/predicted closes at the downsampled bar positions, as JSON lists."""
+    actual = np.asarray(y_real).ravel()
+    predicted = np.asarray(predictions).ravel()
+    idx = downsample_indices(actual, points)
+    return {
+        "index": idx.tolist(),
+        "actual": actual[idx].tolist(),
+        "predicted": predicted[idx].tolist(),
+        "length": len(actual),
+    }
+
+
+# ── PNG ────────────────────────────────────────────────────────────────────────
+
+def render_png(ticker: str, y_real: np.ndarray, predictions: np.ndarray) -> str:
+    """Render the predicted-vs-actual chart and return it as base64 PNG."""
+    # Figure + Agg canvas directly: no pyplot global state, no GUI backend
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(y_real, label="Actual")
+    ax.plot(predictions, label="Predicted")
+    ax.legend()
+    ax.set_title(f"{ticker.upper()} - Predicted vs Actual")
+    ax.grid(True)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+_pool: ProcessPoolExecutor | None = None
+_png_cache = TTLCache("plots", ttl=3600, max_entries=PLOT_CACHE_MAX_ENTRIES)
+_flight = SingleFlight()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs TensorFlow threads, which fork() does not copy safely
+        _pool = ProcessPoolExecutor(max_workers=PLOT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def render_png_cached(ticker: str, version, y_real: np.ndarray, predictions: np.ndarray) -> str:
+    """
+    render_png() in the worker pool, cached per (ticker, version).
+
+    `version` must change whenever the series does (see TickerState.version);
+    pass None to skip the cache.
+    """
+    async def render():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), render_png, ticker, np.asarray(y_real), np.asarray(predictions))
+
+    if version is None:
+        return await render()
+
+    key = (ticker, version)
+    cached = _png_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def render_and_store():
+        png = await render()
+        _png_cache.set(key, png)
+        return png
+
+    return await _flight.do(key, render_and_store)
@@ -0,0 +1,133 @@
+# src/polygon_client.py
+"""
+Shared async HTTP client for every Polygon call.
+
+- one httpx.AsyncClient per event loop, so keep-alive connections are reused
+- a per-host semaphore caps concurrent upstream requests
+- 429 / 5xx responses and transport errors are retried with exponential
+  backoff (honouring Retry-After when Polygon sends it)
+- identical concurrent GETs share one in-flight request
+"""
+
+import asyncio
+import weakref
+from urllib.parse import urlsplit
+import httpx
+from config import (
+    POLYGON_API_KEY, POLYGON_BASE_URL, POLYGON_MAX_CONCURRENCY, POLYGON_TIMEOUT, POLYGON_MAX_RETRIES,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PolygonClient:
+    """
+    Async Polygon client with pooling, per-host limits, retries and de-duplication.
+
+    Args:
+        base_url (str): API root, e.g. https://api.polygon.io
+        api_key (str): Added as the apiKey query parameter on every request.
+        max_concurrency (int): Concurrent in-flight requests allowed per host.
+        timeout (float): Per-request timeout in seconds.
+        max_retries (int): Retries after the first attempt for retryable failures.
+        backoff (float): Base delay in seconds; attempt n waits backoff * 2**n.
+    """
+
+    def __init__(self, base_url: str, api_key: str | None = None, max_concurrency: int = 8,
+                 timeout: float = 10.0, max_retries: int = 3, backoff: float = 0.5):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency),
+        )
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[tuple, asyncio.Task] = {}
+
+    async def get_json(self, url: str, params: dict | None = None) -> dict:
+        """
+        GET `url` (absolute, or relative to base_url) and return the decoded JSON.
+        Raises httpx.HTTPStatusError for non-2xx responses once retries are spent.
+        """
+        params = dict(params or {})
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._get_with_retries(url, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel everyone else's request
+        return await asyncio.shield(task)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(str(self._client.base_url.join(url))).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_concurrency)
+        return self._host_limits[host]
+
+    async def _get_with_retries(self, url: str, params: dict) -> dict:
+        if self.api_key:
+            params["apiKey"] = self.api_key
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._host_limit(url):
+                    response = await self._client.get(url, params=params)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = response.headers.get("Retry-After")
+                print(f"[WARN] Polygon {url} HTTP {response.status_code}, retrying ({attempt + 1}/{self.max_retries})")
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"[WARN] Polygon {url}: {e!r}, retrying ({attempt + 1}/{self.max_retries})")
+
+            delay = self.backoff * 2 ** attempt
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+
+# ── Shared instance ────────────────────────────────────────────────────────────
+# httpx connection pools belong to the event loop that opened them, so keep one
+# client per running loop (in production that is exactly one).
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, PolygonClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> PolygonClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = PolygonClient(
+            base_url=POLYGON_BASE_URL,
+            api_key=POLYGON_API_KEY,
+            max_concurrency=POLYGON_MAX_CONCURRENCY,
+            timeout=POLYGON_TIMEOUT,
+            max_retries=POLYGON_MAX_RETRIES,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def get_json(url: str, params: dict | None = None) -> dict:
+    """Shortcut for get_client().get_json(...)."""
+    return await get_client().get_json(url, params)
@@ -0,0 +1,204 @@
+# src/predictor.py
+"""
+Incremental per-ticker prediction state.
+
+/predict only needs the newest prediction, yet a cold run has to scale the
+whole history and push every window through the model. Once that has been
+done for a ticker we keep:
+
+  - the fitted scaler (its min/max bounds),
+  - the last TIME_STEP + 1 scaled closes,
+  - the actual and predicted series produced so far (for the plot/backtest).
+
+When the next fetch brings new bars, only windows ending on those bars are
+predicted. The last known bar is always re-evaluated too, because Polygon may
+return the in-progress bar with a different close on the next call.
+
+A full recompute happens on the first call, on an explicit refresh, when the
+stored history no longer lines up with the fetched one, when a new close
+falls outside the scaler bounds, or when the re-evaluated bar was the high or
+low and has been revised inward (either would change every scaled value).
+
+States live in a bounded TTLCache ("predictor"), so tickers that stop being
+requested are evicted and the memory shows up in /admin/cache-stats.
+"""
+
+from typing import Awaitable, Callable
+import numpy as np
+from config import TIME_STEP, PREDICTOR_CACHE_MAX_ENTRIES, PREDICTOR_CACHE_MAX_BYTES
+from src.cache import TTLCache
+from src.preprocessing import create_sequences
+from src.scaler import StreamingMinMaxScaler
+
+Predict = Callable[[np.ndarray], Awaitable[np.ndarray]]
+
+
+class TickerState:
+    """Everything needed to extend a ticker's predictions by the newest bars."""
+
+    __slots__ = ("scaler", "last_ts", "last_close", "scaled_tail", "y_real", "predictions")
+
+    def __init__(self, scaler, last_ts, last_close, scaled_tail, y_real, predictions):
+        self.scaler = scaler
+        self.last_ts = last_ts            # timestamp of the newest bar seen
+        self.last_close = last_close      # its close, as fetched
+        self.scaled_tail = scaled_tail    # last TIME_STEP + 1 scaled closes
+        self.y_real = y_real              # (N, 1) actual closes with a prediction
+        self.predictions = predictions    # (N, 1) predicted closes, same order
+
+    @property
+    def version(self) -> tuple:
+        """Changes whenever the series does — usable as a cache key."""
+        return (str(self.last_ts), len(self.y_real), float(self.y_real[-1][0]))
+
+    @property
+    def data_min(self) -> float:
+        return float(self.scaler.data_min_[0])
+
+    @property
+    def data_max(self) -> float:
+        return float(self.scaler.data_max_[0])
+
+    def __sizeof__(self) -> int:
+        # what sizeof() charges against the cache's byte budget
+        return object.__sizeof__(self) + self.scaled_tail.nbytes + self.y_real.nbytes + self.predictions.nbytes
+
+
+STATE_TTL = 24 * 3600   # a ticker nobody has predicted for a day is recomputed from scratch
+
+_states = TTLCache("predictor", ttl=STATE_TTL, max_entries=PREDICTOR_CACHE_MAX_ENTRIES,
+                   max_bytes=PREDICTOR_CACHE_MAX_BYTES)
+
+
+def get_state(ticker: str) -> TickerState | None:
+    return _states.get(ticker)
+
+
+def reset_state(ticker: str | None = None) -> None:
+    """Drop the stored state for one ticker (or all), forcing a full recompute."""
+    if ticker is None:
+        _states.clear()
+    else:
+        _states.pop(ticker)
+
+
+async def _full_recompute(closes: np.ndarray, timestamps: np.ndarray, predict: Predict,
+                          time_step: int) -> TickerState:
+    scaler = StreamingMinMaxScaler(feature_range=(0, 1))
+    scaled = scaler.fit_transform(closes)
+    X, y_scaled = create_sequences(scaled, time_step=time_step)
+
+    predictions_scaled = await predict(X)
+    return TickerState(
+        scaler=scaler,
+        last_ts=timestamps[-1],
+        last_close=float(closes[-1]),
+        scaled_tail=scaled[-(time_step + 1):].copy(),
+        y_real=scaler.inverse_transform(y_scaled.reshape(-1, 1)),
+        predictions=scaler.inverse_transform(np.asarray(predictions_scaled).reshape(-1, 1)),
+    )
+
+
+async def _extend(state: TickerState, closes: np.ndarray, timestamps: np.ndarray, predict: Predict,
+                  time_step: int) -> TickerState | None:
+    """Predict only the bars from state.last_ts on. Returns None if a full recompute is needed."""
+    (matches,) = np.nonzero(timestamps == state.last_ts)
+    if not len(matches) or len(state.scaled_tail) != time_step + 1:
+        return None
+    fresh = closes[matches[0]:]
+
+    if fresh.min() < state.data_min or fresh.max() > state.data_max:
+        return None
+    # The re-evaluated bar set a bound and moved inward: the bound is stale
+    if fresh[0] != state.last_close and state.last_close in (state.data_min, state.data_max):
+        return None
+
+    fresh_scaled = state.scaler.transform(fresh)
+    sequence = np.concatenate([state.scaled_tail[:-1], fresh_scaled])
+    X, y_scaled = create_sequences(sequence, time_step=time_step)
+
+    predictions_scaled = await predict(X)
+
+    # Keep the series the same length a full recompute would produce
+    keep = len(closes) - time_step
+    y_real = np.concatenate([state.y_real[:-1], state.scaler.inverse_transform(y_scaled.reshape(-1, 1))])
+    predictions = np.concatenate([
+        state.predictions[:-1],
+        state.scaler.inverse_transform(np.asarray(predictions_scaled).reshape(-1, 1)),
+    ])
+    return TickerState(
+        scaler=state.scaler,
+        last_ts=timestamps[-1],
+        last_close=float(closes[-1]),
+        scaled_tail=sequence[-(time_step + 1):].copy(),
+        y_real=y_real[-keep:],
+        predictions=predictions[-keep:],
+    )
+
+
+async def predict_incremental(ticker: str, closes: np.ndarray, timestamps: np.ndarray, predict: Predict,
+                              time_step: int = TIME_STEP, refresh: bool = False):
+    """
+    Return (y_real, predictions_real) for the whole history, running the model
+    only on windows that were not predicted before.
+
+    Args:
+        ticker (str): Key for the stored state.
+        closes (np.ndarray): Close prices, oldest first.
+        timestamps (np.ndarray): Bar timestamps matching `closes`.
+        predict: Async callable mapping windows (N, time_step) to predictions.
+        refresh (bool): Ignore any stored state and recompute from scratch.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    timestamps = np.asarray(timestamps)
+    if len(closes) <= time_step:
+        raise ValueError(f"Need more than {time_step} bars to predict {ticker}, got {len(closes)}.")
+
+    state = None if refresh else _states.get(ticker)
+    new_state = None
+    if state is not None:
+        new_state = await _extend(state, closes, timestamps, predict, time_step)
+    if new_state is None:
+        print(f"[INFO] Full prediction recompute for {ticker} ({len(closes)} bars)")
+        new_state = await _full_recompute(closes, timestamps, predict, time_step)
+
+    # Replace rather than mutate, so concurrent callers never see a half-updated state
+    _states.set(ticker, new_state)
+    return new_state.y_real, new_state.predictions
+
+
+# ── Multi-ticker scan ──────────────────────────────────────────────────────────
+
+async def predict_latest(closes_by_ticker: dict[str, np.ndarray], predict: Predict,
+                         time_step: int = TIME_STEP) -> dict[str, tuple[float, float]]:
+    """
+    Latest (actual, predicted) close for many tickers with a single model call.
+
+    Each ticker contributes only the window ending on its last bar — the value
+    /predict compares against — scaled the way a full recompute would (min-max
+    over that ticker's history). All windows are stacked into one batch.
+
+    Args:
+        closes_by_ticker (dict): ticker → close prices, oldest first; each needs
+            more than `time_step` bars.
+        predict: Async callable mapping windows (N, time_step) to predictions.
+    """
+    tickers = list(closes_by_ticker)
+    if not tickers:
+        return {}
+    for ticker in tickers:
+        if len(closes_by_ticker[ticker]) <= time_step:
+            raise ValueError(f"Need more than {time_step} bars to predict {ticker}, "
+                             f"got {len(closes_by_ticker[ticker])}.")
+
+    lo = np.array([np.min(closes_by_ticker[t]) for t in tickers])
+    hi = np.array([np.max(closes_by_ticker[t]) for t in tickers])
+    span = hi - lo
+    span[span == 0] = 1.0   # MinMaxScaler treats a constant series the same way
+
+    windows = np.stack([np.asarray(closes_by_ticker[t][-(time_step + 1):-1], dtype=np.float64) for t in tickers])
+    X = (windows - lo[:, None]) / span[:, None]
+
+    predicted = np.asarray(await predict(X), dtype=np.float64).reshape(-1) * span + lo
+    actual = [float(closes_by_ticker[t][-1]) for t in tickers]
+    return {t: (a, float(p)) for t, a, p in zip(tickers, actual, predicted)}
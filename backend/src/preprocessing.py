@@ -1,40 +1,15 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from numpy.lib.stride_tricks import sliding_window_view
 
-def scale_data(df: pd.DataFrame, column_name: str = "Close"):
-    """
-    Scales a single column between 0 and 1 using MinMaxScaler.
-
-    Args:
-        df (pd.DataFrame): DataFrame containing the target column
-        column_name (str): Name of the column to scale (default is 'Close')
-
-    Returns:
-        scaler (MinMaxScaler): Fitted scaler
-        df_scaled (pd.DataFrame): DataFrame with scaled column and original index
-    """
-    if column_name not in df.columns:
-        alt_close = [col for col in df.columns if col.lower().startswith("close")]
-        if alt_close:
-            column_name = alt_close[0]
-        else:
-            raise KeyError(f"No 'Close' or 'close_' column found in DataFrame.")
-
-    print(f"[INFO] Scaling column: {column_name}")
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled = scaler.fit_transform(df[[column_name]])
-
-    # Maintain index and column name for compatibility
-    df_scaled = df.copy()
-    df_scaled[column_name] = scaled
-
-    return scaler, df_scaled
 
 def create_sequences(data: np.ndarray, time_step: int = 50):
     """
     Converts time-series data into sequences for LSTM input.
 
+    X is a read-only strided view over `data` (row i is data[i:i + time_step]),
+    so no N×time_step matrix is allocated; call np.array(X) if you need a
+    writable copy.
+
     Args:
         data (np.ndarray): 1D array of scaled prices
         time_step (int): Number of time steps per sequence
@@ -42,8 +17,24 @@ def create_sequences(data: np.ndarray, time_step: int = 50):
     Returns:
         Tuple[np.ndarray, np.ndarray]: Sequences X and corresponding targets y
     """
-    X, y = [], []
-    for i in range(time_step, len(data)):
-        X.append(data[i - time_step:i])
-        y.append(data[i])
-    return np.array(X), np.array(y)
+    data = np.asarray(data)
+    if len(data) <= time_step:
+        return np.empty((0, time_step), dtype=data.dtype), np.empty(0, dtype=data.dtype)
+
+    X = sliding_window_view(data[:-1], time_step)
+    y = data[time_step:]
+    y.flags.writeable = False
+    return X, y
+
+
+def iter_sequences(data: np.ndarray, time_step: int = 50, batch_size: int = 4096):
+    """
+    Chunked form of create_sequences() for very long histories.
+
+    Yields (X, y) pairs of at most `batch_size` sequences each, in order. Every
+    chunk is a view into `data`, so memory stays bounded by the batch the
+    caller materialises (e.g. the tensor handed to model.predict).
+    """
+    X, y = create_sequences(data, time_step)
+    for start in range(0, len(y), batch_size):
+        yield X[start:start + batch_size], y[start:start + batch_size]
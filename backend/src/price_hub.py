@@ -0,0 +1,289 @@
+# src/price_hub.py
+"""
+Server-side live-price fan-out.
+
+Clients subscribe to tickers over /ws/prices instead of polling /price. The
+hub runs one upstream poll loop per distinct ticker — however many clients
+watch it — and pushes each new quote to every subscriber. Untriggered price
+alerts are evaluated as quotes arrive, so alerts fire even when their owner
+has no browser open; owners that are connected get an "alert" message.
+
+Upstream request volume therefore scales with distinct tickers (subscribed or
+alerted), not with connected users. Both are capped: max_tickers bounds how
+many tickers subscriptions can make the hub poll, and max_connections_per_client
+bounds the sockets one client address may hold open.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Iterable
+from src.alert_engine import AlertEngine
+
+FetchQuote = Callable[[str], Awaitable[dict | None]]
+
+
+class Subscription:
+    """
+    One connected client: its tickers and a bounded outbox of JSON messages.
+
+    A client that stops reading loses its oldest queued messages rather than
+    growing the queue (prices are superseded by the next tick anyway).
+    """
+
+    def __init__(self, user_email: str | None = None, max_queue: int = 256, client: str | None = None):
+        self.user_email = user_email
+        self.client = client
+        self.tickers: set[str] = set()
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def push(self, message: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class PriceHub:
+    """
+    Args:
+        fetch_quote: Async callable returning the latest quote dict for a
+            ticker (see src.quotes.get_quote), or None.
+        interval (float): Seconds between upstream polls of one ticker.
+        load_alerts: Async callable returning every untriggered alert document;
+            called once by start().
+        on_alerts: Async callable run with a list of fired alert documents
+            (e.g. to persist triggered=True with one update_many).
+        flush_interval (float): Fired alerts are handed to on_alerts in
+            batches collected over this many seconds.
+        max_tickers (int): Subscriptions may not start polling a new ticker once
+            this many are polled (None = unbounded). Stored alerts are always
+            watched, but count towards it.
+        max_connections_per_client (int): Open subscriptions allowed per
+            client address (None = unbounded).
+    """
+
+    def __init__(self, fetch_quote: FetchQuote, interval: float = 5.0,
+                 load_alerts: Callable[[], Awaitable[list]] | None = None,
+                 on_alerts: Callable[[list[dict]], Awaitable[None]] | None = None,
+                 flush_interval: float = 0.25, max_tickers: int | None = None,
+                 max_connections_per_client: int | None = None):
+        self.fetch_quote = fetch_quote
+        self.interval = interval
+        self.load_alerts = load_alerts
+        self.on_alerts = on_alerts
+        self.flush_interval = flush_interval
+        self.max_tickers = max_tickers
+        self.max_connections_per_client = max_connections_per_client
+        self._subs: dict[str, set[Subscription]] = {}        # ticker → subscribers
+        self._user_subs: dict[str, set[Subscription]] = {}   # email → subscriptions
+        self._alerts = AlertEngine()
+        self._fired: list[dict] = []                         # waiting for on_alerts
+        self._flusher: asyncio.Task | None = None
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._latest: dict[str, dict] = {}
+        self._connections = 0
+        self._client_connections: dict[str, int] = {}
+        self._loader: asyncio.Task | None = None
+        self.upstream_calls = 0
+        self.messages = 0
+        self.alerts_triggered = 0
+        self.tickers_rejected = 0
+        self.connections_rejected = 0
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        # in the background: an unreachable database must not hold up startup
+        if self.load_alerts is not None:
+            self._loader = asyncio.ensure_future(self._load_alerts())
+
+    async def _load_alerts(self) -> None:
+        try:
+            alerts = await self.load_alerts()
+        except Exception as e:
+            print(f"[WARN] price hub: could not load alerts: {e}")
+            return
+        for alert in alerts:
+            self.add_alert(alert)
+        print(f"[INFO] price hub: watching {len(alerts)} alerts")
+
+    async def stop(self) -> None:
+        tasks = list(self._pollers.values())
+        if self._loader is not None:
+            tasks.append(self._loader)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pollers.clear()
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush_alerts()
+
+    # ── Subscribers ────────────────────────────────────────────────────────────
+
+    def subscribe(self, user_email: str | None = None, max_queue: int = 256,
+                  client: str | None = None) -> Subscription | None:
+        """
+        Register a connection. Returns None (and registers nothing) if `client`
+        already holds max_connections_per_client subscriptions.
+        """
+        if client is not None and self.max_connections_per_client is not None \
+                and self._client_connections.get(client, 0) >= self.max_connections_per_client:
+            self.connections_rejected += 1
+            return None
+        sub = Subscription(user_email, max_queue, client)
+        self._connections += 1
+        if client is not None:
+            self._client_connections[client] = self._client_connections.get(client, 0) + 1
+        if user_email:
+            self._user_subs.setdefault(user_email, set()).add(sub)
+        return sub
+
+    def add_tickers(self, sub: Subscription, tickers: Iterable[str]) -> list[str]:
+        """Subscribe `sub` to `tickers`; returns those refused because max_tickers are already polled."""
+        rejected = []
+        for ticker in tickers:
+            if ticker in sub.tickers:
+                continue
+            if ticker not in self._pollers and self.max_tickers is not None \
+                    and len(self._pollers) >= self.max_tickers:
+                rejected.append(ticker)
+                continue
+            sub.tickers.add(ticker)
+            self._subs.setdefault(ticker, set()).add(sub)
+            if ticker in self._latest:
+                sub.push(json.dumps({"type": "price", **self._latest[ticker]}))
+            self._ensure_poller(ticker)
+        self.tickers_rejected += len(rejected)
+        return rejected
+
+    def remove_tickers(self, sub: Subscription, tickers: Iterable[str]) -> None:
+        for ticker in tickers:
+            sub.tickers.discard(ticker)
+            subs = self._subs.get(ticker)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[ticker]
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self.remove_tickers(sub, list(sub.tickers))
+        self._connections -= 1
+        if sub.client is not None:
+            remaining = self._client_connections.get(sub.client, 1) - 1
+            if remaining > 0:
+                self._client_connections[sub.client] = remaining
+            else:
+                self._client_connections.pop(sub.client, None)
+        if sub.user_email in self._user_subs:
+            self._user_subs[sub.user_email].discard(sub)
+            if not self._user_subs[sub.user_email]:
+                del self._user_subs[sub.user_email]
+
+    # ── Alerts ─────────────────────────────────────────────────────────────────
+
+    def add_alert(self, alert: dict) -> None:
+        """Track an untriggered alert ({"_id", "ticker", "target_price", "condition", "user_email"})."""
+        self._alerts.add(alert)
+        self._ensure_poller(alert["ticker"])
+
+    def remove_alert(self, alert_id: str) -> None:
+        self._alerts.remove(alert_id)
+
+    async def flush_alerts(self) -> None:
+        """Hand every fired alert not yet recorded to on_alerts, in one call."""
+        fired, self._fired = self._fired, []
+        if not fired or self.on_alerts is None:
+            return
+        try:
+            await self.on_alerts(fired)
+        except Exception as e:
+            print(f"[WARN] price hub: could not record {len(fired)} fired alerts: {e}")
+
+    # ── Prices ─────────────────────────────────────────────────────────────────
+
+    def latest(self, ticker: str) -> dict | None:
+        """Most recent quote published for `ticker`, if it is being watched."""
+        return self._latest.get(ticker)
+
+    async def publish(self, quote: dict) -> None:
+        """Fan a quote out to subscribers and evaluate alerts on its ticker."""
+        ticker = quote["ticker"]
+        self._latest[ticker] = quote
+        subs = self._subs.get(ticker)
+        if subs:
+            message = json.dumps({"type": "price", **quote})   # serialised once for everyone
+            for sub in subs:
+                sub.push(message)
+            self.messages += len(subs)
+        if self._alerts.has_ticker(ticker):
+            self._check_alerts(ticker, quote["price"])
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._connections,
+            "tickers_subscribed": len(self._subs),
+            "subscriptions": sum(len(s) for s in self._subs.values()),
+            "tickers_polled": len(self._pollers),
+            "max_tickers": self.max_tickers,
+            "tickers_rejected": self.tickers_rejected,
+            "max_connections_per_client": self.max_connections_per_client,
+            "connections_rejected": self.connections_rejected,
+            "alerts_active": len(self._alerts),
+            "alerts_triggered": self.alerts_triggered,
+            "upstream_calls": self.upstream_calls,
+            "messages": self.messages,
+            "interval": self.interval,
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _wanted(self, ticker: str) -> bool:
+        return bool(self._subs.get(ticker)) or self._alerts.has_ticker(ticker)
+
+    def _ensure_poller(self, ticker: str) -> None:
+        if ticker not in self._pollers:
+            self._pollers[ticker] = asyncio.ensure_future(self._poll(ticker))
+
+    async def _poll(self, ticker: str) -> None:
+        try:
+            while self._wanted(ticker):
+                self.upstream_calls += 1
+                try:
+                    quote = await self.fetch_quote(ticker)
+                    if quote is not None:
+                        await self.publish(quote)
+                except Exception as e:
+                    print(f"[WARN] price hub: {ticker} poll failed: {e}")
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._pollers.get(ticker) is asyncio.current_task():
+                del self._pollers[ticker]
+            if not self._wanted(ticker):
+                self._latest.pop(ticker, None)
+
+    def _check_alerts(self, ticker: str, price: float) -> None:
+        fired = self._alerts.evaluate(ticker, price)
+        if not fired:
+            return
+        self.alerts_triggered += len(fired)
+        self._fired.extend(fired)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_later())
+
+        for alert in fired:
+            message = json.dumps({
+                "type": "alert",
+                "alert_id": str(alert["_id"]),
+                "ticker": ticker,
+                "condition": alert["condition"],
+                "target_price": alert["target_price"],
+                "price": price,
+            })
+            for sub in self._user_subs.get(alert.get("user_email"), ()):
+                sub.push(message)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush_alerts()
@@ -0,0 +1,80 @@
+# src/quotes.py
+"""
+Latest price for one ticker, shared by /price/{ticker} and the price hub.
+"""
+
+import time
+from typing import Callable
+import httpx
+from src import polygon_client
+
+
+async def get_quote(ticker: str, prev_day: Callable[[str], dict | None] | None = None) -> dict | None:
+    """
+    Latest price for `ticker`: the real-time snapshot (15-min delayed on the
+    free plan), falling back to the previous day's close.
+
+    Args:
+        prev_day: In-memory lookup of a ticker's previous-day bar (e.g.
+            MarketSnapshotService.bar); the /prev endpoint is only called
+            when it has none.
+
+    Returns:
+        dict | None: {"ticker", "price", "change", "change_pct", "volume", "ts"},
+        or None when neither source has a price.
+    """
+    price = None
+    change = 0.0
+    change_pct = 0.0
+    volume = 0
+
+    # ── Stage 1: real-time snapshot ───────────────────────────────────────────
+    try:
+        snap = await polygon_client.get_json(f"/v2/snapshot/locale/us/markets/stocks/tickers/{ticker}")
+        ticker_data = snap.get("ticker", {})
+        day      = ticker_data.get("day", {})
+        prev     = ticker_data.get("prevDay", {})
+        last_trade = ticker_data.get("lastTrade", {})
+        price  = last_trade.get("p") or day.get("c") or prev.get("c")
+        volume = day.get("v", 0)
+        if prev.get("c") and price:
+            prev_close = prev["c"]
+            cur_close  = day.get("c") or price
+            change     = cur_close - prev_close
+            change_pct = (change / prev_close) * 100
+    except httpx.HTTPStatusError as snap_err:
+        print(f"[WARN] Snapshot {ticker} HTTP {snap_err.response.status_code}: {snap_err.response.text[:120]}")
+    except Exception as snap_err:
+        print(f"[WARN] Snapshot failed for {ticker}: {snap_err}")
+
+    # ── Stage 2: previous-day close fallback ──────────────────────────────────
+    if price is None and prev_day is not None:
+        bar = prev_day(ticker)
+        if bar:
+            price  = bar["close"]
+            volume = bar["volume"]
+
+    if price is None:
+        try:
+            prev = await polygon_client.get_json(f"/v2/aggs/ticker/{ticker}/prev", params={"adjusted": "true"})
+            results = prev.get("results", [])
+            if results:
+                bar    = results[0]
+                price  = bar.get("c")
+                volume = int(bar.get("v", 0))
+        except httpx.HTTPStatusError as prev_err:
+            print(f"[WARN] Prev-day {ticker} HTTP {prev_err.response.status_code}: {prev_err.response.text[:120]}")
+        except Exception as prev_err:
+            print(f"[WARN] Prev-day fallback failed for {ticker}: {prev_err}")
+
+    if price is None:
+        return None
+
+    return {
+        "ticker": ticker,
+        "price": round(price, 2),
+        "change": round(change, 2),
+        "change_pct": round(change_pct, 2),
+        "volume": volume,
+        "ts": time.time(),
+    }
@@ -0,0 +1,132 @@
+# src/scaler.py
+"""
+Min-max scaling of one price series, incrementally and without copies.
+
+StreamingMinMaxScaler is a MinMaxScaler: it has the same fitted attributes
+(data_min_, data_max_, scale_, min_, ...), so it pickles, inverse-transforms
+and passes isinstance checks like one. Its methods skip sklearn's per-call
+input validation and work directly on NumPy arrays:
+
+  - partial_fit() only widens the running min/max, so folding in new bars
+    costs O(new bars) and earlier scaled values stay valid unless a bound moves;
+  - transform() / inverse_transform() take 1-D or (n, 1) arrays, keep the
+    input's shape, and write into `out=` when given (out=x scales in place);
+  - to_dict() / from_dict(), save_scaler() / load_scaler() persist one scaler
+    per ticker as JSON under SCALER_DIR, next to the model.
+
+Only a single feature is supported — these are close prices.
+"""
+
+import json
+import os
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.utils.validation import check_is_fitted
+from config import SCALER_DIR
+
+_FITTED = ("data_min_", "data_max_", "data_range_", "scale_", "min_", "n_samples_seen_", "n_features_in_")
+
+
+def _values(X) -> np.ndarray:
+    x = np.asarray(X, dtype=np.float64)
+    if x.ndim > 2 or (x.ndim == 2 and x.shape[1] != 1):
+        raise ValueError(f"Expected a 1-D series or a single column, got shape {x.shape}.")
+    return x
+
+
+class StreamingMinMaxScaler(MinMaxScaler, auto_wrap_output_keys=None):
+    """
+    Args:
+        feature_range (tuple): (min, max) of the scaled values.
+        clip (bool): Clip transformed values to feature_range.
+    """
+
+    def fit(self, X, y=None):
+        for name in _FITTED:
+            self.__dict__.pop(name, None)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        """Widen the running min/max to cover X (NaNs ignored)."""
+        x = _values(X)
+        if not x.size or np.isnan(x).all():
+            return self
+        lo, hi = float(np.nanmin(x)), float(np.nanmax(x))
+        if hasattr(self, "n_samples_seen_"):
+            lo, hi = min(lo, float(self.data_min_[0])), max(hi, float(self.data_max_[0]))
+            self.n_samples_seen_ += x.size
+        else:
+            self.n_samples_seen_ = x.size
+            self.n_features_in_ = 1
+        self._set_bounds(lo, hi)
+        return self
+
+    def _set_bounds(self, lo: float, hi: float) -> None:
+        low, high = self.feature_range
+        span = hi - lo
+        self.data_min_, self.data_max_ = np.array([lo]), np.array([hi])
+        self.data_range_ = np.array([span])
+        self.scale_ = np.array([(high - low) / (span if span != 0 else 1.0)])   # constant series → 1, as sklearn
+        self.min_ = np.array([low - lo * self.scale_[0]])
+
+    def transform(self, X, out: np.ndarray | None = None) -> np.ndarray:
+        check_is_fitted(self, "scale_")
+        x = _values(X)
+        out = np.multiply(x, self.scale_[0], out=out)
+        out += self.min_[0]
+        if self.clip:
+            np.clip(out, *self.feature_range, out=out)
+        return out
+
+    def inverse_transform(self, X, out: np.ndarray | None = None) -> np.ndarray:
+        check_is_fitted(self, "scale_")
+        x = _values(X)
+        out = np.subtract(x, self.min_[0], out=out)
+        out /= self.scale_[0]
+        return out
+
+    def fit_transform(self, X, y=None, out: np.ndarray | None = None) -> np.ndarray:
+        return self.fit(X).transform(X, out=out)
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        check_is_fitted(self, "scale_")
+        return {
+            "feature_range": list(self.feature_range),
+            "clip": self.clip,
+            "data_min": float(self.data_min_[0]),
+            "data_max": float(self.data_max_[0]),
+            "n_samples_seen": int(self.n_samples_seen_),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingMinMaxScaler":
+        scaler = cls(feature_range=tuple(state["feature_range"]), clip=state.get("clip", False))
+        scaler.n_samples_seen_ = state["n_samples_seen"]
+        scaler.n_features_in_ = 1
+        scaler._set_bounds(state["data_min"], state["data_max"])
+        return scaler
+
+
+def _scaler_path(ticker: str, directory: str) -> str:
+    return os.path.join(directory, f"{ticker.upper()}.json")
+
+
+def save_scaler(ticker: str, scaler: StreamingMinMaxScaler, directory: str = SCALER_DIR) -> None:
+    """Write `scaler` for `ticker` (temp file + rename, so readers never see a partial file)."""
+    os.makedirs(directory, exist_ok=True)
+    path = _scaler_path(ticker, directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(scaler.to_dict(), f)
+    os.replace(tmp, path)
+
+
+def load_scaler(ticker: str, directory: str = SCALER_DIR) -> StreamingMinMaxScaler | None:
+    """The scaler saved for `ticker`, or None if there is none."""
+    try:
+        with open(_scaler_path(ticker, directory)) as f:
+            return StreamingMinMaxScaler.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
@@ -1,5 +1,58 @@
 # src/signal_generator.py
 
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Compact codes returned by generate_signals()
+HOLD = np.int8(0)
+BUY  = np.int8(1)
+SELL = np.int8(-1)
+
+SIGNAL_LABELS = {int(HOLD): "Hold", int(BUY): "Buy", int(SELL): "Sell"}
+
+# Indexed by code + 1 → "Sell", "Hold", "Buy"
+_LABEL_LOOKUP = np.array(["Sell", "Hold", "Buy"], dtype=object)
+
+
+def generate_signals(predicted, current, threshold=0.01) -> np.ndarray:
+    """
+    Vectorised form of generate_signal().
+
+    Args:
+        predicted (array-like): Predicted prices.
+        current (array-like): Actual prices, same shape as `predicted`.
+        threshold (float | array-like): Percentage threshold, either one value
+            for every element or one per element.
+
+    Returns:
+        np.ndarray: int8 codes — BUY (1), SELL (-1) or HOLD (0). Use
+        signal_labels() to map them back to strings.
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    current   = np.asarray(current, dtype=np.float64)
+    threshold = np.asarray(threshold, dtype=np.float64)
+
+    upper_bound = current * (1 + threshold)
+    lower_bound = current * (1 - threshold)
+
+    codes = np.zeros(np.broadcast(predicted, upper_bound).shape, dtype=np.int8)
+    codes[predicted > upper_bound] = BUY
+    codes[predicted < lower_bound] = SELL
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Signals for %d prices: %d Buy, %d Sell, %d Hold",
+                     codes.size, np.count_nonzero(codes == BUY),
+                     np.count_nonzero(codes == SELL), np.count_nonzero(codes == HOLD))
+    return codes
+
+
+def signal_labels(codes) -> np.ndarray:
+    """Map int8 signal codes to an object array of "Buy" / "Sell" / "Hold"."""
+    return _LABEL_LOOKUP[np.asarray(codes, dtype=np.int64) + 1]
+
+
 def generate_signal(predicted: float, current: float, threshold: float = 0.01) -> str:
     """
     Generates a trading signal based on predicted and current price.
@@ -12,16 +65,8 @@ def generate_signal(predicted: float, current: float, threshold: float = 0.01) -
     Returns:
         str: One of ["Buy", "Sell", "Hold"]
     """
-    upper_bound = current * (1 + threshold)
-    lower_bound = current * (1 - threshold)
-
-    print(f"[DEBUG] Predicted: {predicted:.2f}, Current: {current:.2f}, "
-          f"Buy if > {upper_bound:.2f}, Sell if < {lower_bound:.2f}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Predicted: %.2f, Current: %.2f, Buy if > %.2f, Sell if < %.2f",
+                     predicted, current, current * (1 + threshold), current * (1 - threshold))
 
-    # ✅ FIXED
-    if predicted > upper_bound:
-        return "Buy"
-    elif predicted < lower_bound:
-        return "Sell"
-    else:
-        return "Hold"   # ← now actually works
+    return SIGNAL_LABELS[int(generate_signals(predicted, current, threshold))]
@@ -0,0 +1,78 @@
+# src/singleflight.py
+"""
+Stampede protection for cache misses.
+
+SingleFlight runs at most one computation per key at a time: callers that
+arrive while it is in flight await the same task instead of starting their
+own. get_or_refresh() puts that in front of a TTLCache and can serve an
+expired entry immediately while a single background refresh runs
+(stale-while-revalidate).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+from src.cache import TTLCache
+
+
+class SingleFlight:
+    """One in-flight call per key; concurrent callers share its result."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[WARN] single-flight {key!r} failed: {task.exception()}")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() — or the call already in flight for `key`."""
+        # shield: a caller disconnecting must not cancel the work others await
+        return await asyncio.shield(self._start(key, fn))
+
+    def do_background(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> None:
+        """Start fn() for `key` unless it is already running; do not wait for it."""
+        self._start(key, fn)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+
+def flight_key(cache: TTLCache, key: Hashable) -> tuple:
+    """The SingleFlight key get_or_refresh() uses for `key` in `cache`."""
+    return (cache.name, key)
+
+
+async def get_or_refresh(cache: TTLCache, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                         flight: SingleFlight) -> tuple[Any, bool]:
+    """
+    Return (value, from_cache) for `key`, computing it at most once at a time.
+
+    Args:
+        cache (TTLCache): Fresh entries are returned as-is; entries inside the
+            cache's stale window are returned while one background refresh
+            replaces them.
+        fetch: Async callable producing a fresh value.
+        flight (SingleFlight): Coalesces concurrent fetches for the same key.
+    """
+    async def refresh():
+        data = await fetch()
+        cache.set(key, data)
+        return data
+
+    value, age = cache.get_stale(key)
+    if age is not None:
+        if age >= cache.ttl:
+            flight.do_background(flight_key(cache, key), refresh)
+        return value, True
+
+    return await flight.do(flight_key(cache, key), refresh), False
@@ -1,19 +1,48 @@
-import requests
+# src/stock_stats.py
+"""
+Daily returns and risk metrics.
+
+Daily closes come from one cached frame per ticker: a request for a range the
+cached frame already covers is a slice, and a wider range re-fetches the union
+once. /predict does not fetch at all — it derives daily returns from the 5-min
+bars it has just loaded (daily_returns_from_bars).
+
+The metric functions are plain NumPy and vectorised both ways: `confidence`
+may be a scalar or a sequence of levels, and `returns` may be one series
+(shape (days,)) or a days × tickers matrix with NaN where a ticker has no bar.
+VaR and CVaR follow the existing /predict convention: they are return
+quantiles, so a 2% one-day loss at 95% confidence is -0.02.
+"""
+
+import asyncio
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
-from config import POLYGON_API_KEY
+from src import polygon_client
+from src.cache import TTLCache
+from src.singleflight import SingleFlight
+
+TRADING_DAYS = 252
+RETURNS_TTL = 3600                 # daily bars only change once a day
+RETURNS_CACHE_MAX_ENTRIES = 512
+
+# ticker → (start, end, DataFrame[Close, Daily Return]) for the widest range fetched so far
+_returns_cache = TTLCache("returns", ttl=RETURNS_TTL, max_entries=RETURNS_CACHE_MAX_ENTRIES)
+_flight = SingleFlight()
 
-def get_daily_return(ticker: str, start: str, end: str) -> pd.DataFrame:
-    url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{start}/{end}"
+
+# ── Daily returns ──────────────────────────────────────────────────────────────
+
+async def _fetch_daily(ticker: str, start: str, end: str) -> tuple[str, str, pd.DataFrame]:
+    url = f"/v2/aggs/ticker/{ticker}/range/1/day/{start}/{end}"
     params = {
         "adjusted": "true",
         "sort": "asc",
         "limit": 50000,
-        "apiKey": POLYGON_API_KEY
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    payload = await polygon_client.get_json(url, params=params)
 
-    data = response.json().get("results", [])
+    data = payload.get("results", [])
     if not data:
         raise ValueError(f"No daily data returned from Polygon for {ticker}.")
 
@@ -22,8 +51,185 @@ def get_daily_return(ticker: str, start: str, end: str) -> pd.DataFrame:
     df.set_index('t', inplace=True)
     df.rename(columns={"c": "Close"}, inplace=True)
     df['Daily Return'] = df['Close'].pct_change()
-    return df[['Close', 'Daily Return']].dropna()
+    entry = (start, end, df[['Close', 'Daily Return']].dropna())
+    _returns_cache.set(ticker, entry)
+    return entry
+
+
+async def get_daily_return(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """
+    Daily closes and close-to-close returns for `ticker` between start and end
+    (YYYY-MM-DD, inclusive), served from the per-ticker cache when it covers
+    the range.
+    """
+    ticker = ticker.upper()
+    entry = _returns_cache.get(ticker)
+    if entry is None or not (entry[0] <= start and end <= entry[1]):
+        lo, hi = (min(start, entry[0]), max(end, entry[1])) if entry else (start, end)
+        entry = await _flight.do((ticker, lo, hi), lambda: _fetch_daily(ticker, lo, hi))
+    df = entry[2].loc[start:end]
+    if df.empty:
+        raise ValueError(f"No daily data for {ticker} between {start} and {end}.")
+    return df
+
+
+async def get_daily_returns(tickers: list[str], start: str, end: str) -> tuple[pd.DataFrame, dict[str, str]]:
+    """
+    get_daily_return() for many tickers, fetched concurrently.
+
+    Returns:
+        (DataFrame, dict): daily returns with one column per loaded ticker
+        (dates aligned, NaN where a ticker has no bar), and {ticker: error}
+        for tickers that could not be loaded.
+    """
+    frames = await asyncio.gather(*(get_daily_return(t, start, end) for t in tickers), return_exceptions=True)
+    columns, errors = {}, {}
+    for ticker, frame in zip(tickers, frames):
+        if isinstance(frame, Exception):
+            errors[ticker] = str(frame)
+        else:
+            columns[ticker] = frame['Daily Return']
+    return pd.DataFrame(columns), errors
+
+
+def daily_returns_from_bars(df: pd.DataFrame) -> np.ndarray:
+    """
+    Close-to-close daily returns from intraday bars (a load_data() frame:
+    UTC-naive index, "Close" column). Each day's close is its last bar inside
+    regular hours (9:30-16:00 US/Eastern), or its last bar if it has none there.
+    """
+    et = df.index.tz_localize("UTC").tz_convert("America/New_York")
+    minutes = et.hour * 60 + et.minute
+    regular = (minutes >= 9 * 60 + 30) & (minutes < 16 * 60)
+    days = pd.Series(et.date, index=df.index)
+    closes = df["Close"]
+    if regular.any():
+        closes, days = closes[regular], days[regular]
+    daily = closes.groupby(days.values).last()
+    return daily.pct_change().dropna().to_numpy()
+
+
+async def calculate_var(ticker: str, start: str, end: str, confidence_level: float = 0.95) -> float:
+    df = await get_daily_return(ticker, start, end)
+    return float(historical_var(df['Daily Return'].to_numpy(), confidence_level))
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────────
+
+def _levels(confidence) -> np.ndarray:
+    levels = np.asarray(confidence, dtype=np.float64)
+    if np.any((levels <= 0) | (levels >= 1)):
+        raise ValueError("Confidence levels must be between 0 and 1.")
+    return levels
+
+
+def historical_var(returns, confidence=0.95) -> np.ndarray:
+    """Empirical (1 - confidence) quantile of returns; shape confidence.shape + returns.shape[1:]."""
+    returns = np.asarray(returns, dtype=np.float64)
+    # nanquantile falls back to a per-column Python loop; only pay for it when there are gaps
+    quantile = np.nanquantile if np.isnan(returns).any() else np.quantile
+    return quantile(returns, 1 - _levels(confidence), axis=0)
+
+
+def parametric_var(returns, confidence=0.95) -> np.ndarray:
+    """Gaussian VaR: mean + z(1 - confidence) * standard deviation."""
+    returns = np.asarray(returns, dtype=np.float64)
+    levels = _levels(confidence)
+    z = np.array([NormalDist().inv_cdf(1 - p) for p in levels.ravel()])
+    z = z.reshape(levels.shape + (1,) * (returns.ndim - 1))   # one row per level, broadcast over tickers
+    return np.nanmean(returns, axis=0) + z * np.nanstd(returns, axis=0, ddof=1)
+
+
+def expected_shortfall(returns, confidence=0.95) -> np.ndarray:
+    """CVaR: mean return over the days at or below the historical VaR."""
+    returns = np.asarray(returns, dtype=np.float64)
+    levels = _levels(confidence)
+    var = historical_var(returns, levels)
+    if levels.ndim:
+        var = np.expand_dims(var, axis=1)   # (levels, 1, ...) against (days, ...)
+    tail = returns <= var                   # NaN days compare False
+    with np.errstate(invalid="ignore"):
+        return np.where(tail, returns, 0.0).sum(axis=levels.ndim) / tail.sum(axis=levels.ndim)
+
+
+def volatility(returns, annualize: bool = True) -> np.ndarray:
+    """Standard deviation of returns, annualised over TRADING_DAYS by default."""
+    vol = np.nanstd(np.asarray(returns, dtype=np.float64), axis=0, ddof=1)
+    return vol * np.sqrt(TRADING_DAYS) if annualize else vol
+
+
+METRICS = {
+    "var_historical": historical_var,
+    "var_parametric": parametric_var,
+    "cvar": expected_shortfall,
+}
+
+
+def risk_metrics(returns, confidence=(0.95, 0.99)) -> dict:
+    """
+    Every metric at every confidence level in one pass.
+
+    Returns:
+        dict: {"observations", "volatility", "var_historical", "var_parametric",
+        "cvar"}; the last three are arrays with a leading confidence axis when
+        `confidence` is a sequence.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    return {
+        "observations": np.sum(~np.isnan(returns), axis=0),
+        "volatility": volatility(returns),
+        **{name: fn(returns, confidence) for name, fn in METRICS.items()},
+    }
+
+
+def rolling_risk_metrics(returns, window: int = 20, confidence=0.95) -> dict:
+    """
+    risk_metrics() over every `window`-day trailing window of a 1-D return
+    series, computed on a strided view (no per-window Python loop).
+
+    Returns:
+        dict: the risk_metrics() keys, each an array with one entry per window
+        end (len(returns) - window + 1), after any confidence axis.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < window:
+        raise ValueError(f"Need at least {window} returns for a {window}-day window.")
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window).T   # (window, n_windows)
+    return risk_metrics(windows, confidence)
+
+
+def portfolio_var(holdings: list[dict], returns: pd.DataFrame, confidence=0.95) -> dict:
+    """
+    One-day VaR of the current holdings, in dollars and as a return.
+
+    Short positions (negative market_value) are supported: daily dollar P&L is
+    returns @ market values, and the return form divides it by the gross
+    exposure (sum of |market_value|), which stays positive for hedged or
+    net-short books.
+
+    Args:
+        holdings (list[dict]): trader.get_positions() "holdings" (ticker, market_value).
+        returns (DataFrame): Daily returns, one column per ticker; only dates
+            where every held ticker has a return are used.
 
-def calculate_var(ticker: str, start: str, end: str, confidence_level: float = 0.95) -> float:
-    df = get_daily_return(ticker, start, end)
-    return df['Daily Return'].quantile(1 - confidence_level)
+    Returns:
+        dict: {"value" (net), "gross_exposure", "observations",
+        "var_historical", "var_parametric", "cvar"} (returns on gross
+        exposure) plus the same three in dollars under "*_dollars".
+    """
+    values = pd.Series({h["ticker"]: float(h["market_value"]) for h in holdings})
+    missing = [t for t in values.index if t not in returns.columns]
+    if missing:
+        raise ValueError(f"No daily returns for {', '.join(missing)}.")
+    aligned = returns[list(values.index)].dropna()
+    gross = values.abs().sum()
+    if not gross or aligned.empty:
+        raise ValueError("Not enough overlapping history to value the portfolio.")
+    pnl = aligned.to_numpy() @ values.to_numpy()   # portfolio dollar P&L per day
+    result = {"value": round(float(values.sum()), 2), "gross_exposure": round(float(gross), 2),
+              "observations": len(pnl)}
+    for name, fn in METRICS.items():
+        dollars = fn(pnl, confidence)
+        result[name] = dollars / gross
+        result[f"{name}_dollars"] = dollars
+    return result
@@ -3,10 +3,10 @@
 from src.data_loader import load_data
 import pandas as pd
 
-def get_stock_summary(limit: int = 100) -> dict:
+async def get_stock_summary(limit: int = 100) -> dict:
     # Example: hardcoded or test ticker
     ticker = "AAPL"
-    df = load_data(ticker, start="2023-01-01", end="2023-12-31", interval="1d")
+    df = await load_data(ticker, start="2023-01-01", end="2023-12-31", interval="1d")
     df = df.tail(limit)
 
     summary = {
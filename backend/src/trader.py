@@ -1,17 +1,30 @@
-from alpaca_trade_api.rest import REST
+import threading
 from config import ALPACA_API_KEY, ALPACA_SECRET_KEY, ALPACA_BASE_URL
 
-# Initialize Alpaca API
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=ALPACA_BASE_URL)
+# Blocking Alpaca calls. Request handlers go through src.broker, which runs
+# these on a thread pool and caches the snapshots; `api` may be any object
+# with Alpaca's REST interface (e.g. src.broker.FakeBroker).
 
-def get_positions() -> dict:
+_api = None
+_api_lock = threading.Lock()
+
+def get_api():
+    """The shared Alpaca REST client, created on first use rather than at import."""
+    global _api
+    with _api_lock:
+        if _api is None:
+            from alpaca_trade_api.rest import REST
+            _api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=ALPACA_BASE_URL)
+        return _api
+
+def get_positions(api=None) -> dict:
     """
     Return all open positions from Alpaca with cost basis and unrealised P&L.
     unrealized_plpc is returned as a decimal by Alpaca (0.05 = 5%), so we
     multiply by 100 to store it as a percentage.
     """
     try:
-        positions = api.list_positions()
+        positions = (api or get_api()).list_positions()
         holdings = []
         total_value = 0.0
         total_cost  = 0.0
@@ -55,9 +68,9 @@ def get_positions() -> dict:
         return {"status": "error", "message": str(e), "holdings": [], "summary": {}}
 
 
-def get_account_status():
+def get_account_status(api=None):
     try:
-        account = api.get_account()
+        account = (api or get_api()).get_account()
         return {
             "status": "success",
             "account_status": account.status,
@@ -71,10 +84,17 @@ def get_account_status():
             "message": str(e)
         }
 
-def execute_trade(signal: str, ticker: str, qty: int = 1):
+# Alpaca order states after which nothing more will fill.
+TERMINAL_ORDER_STATUSES = {"filled", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+
+def execute_trade(signal: str, ticker: str, qty: int = 1, api=None, client_order_id: str | None = None):
     """
     Executes a real trade via Alpaca API if signal is 'Buy' or 'Sell'.
     Returns message for 'Hold' signal.
+
+    With a client_order_id the submission is idempotent: Alpaca refuses a
+    second order with the same id, and the existing order is returned
+    instead (with "duplicate": True).
     """
     if signal == "Hold":
         return {
@@ -88,13 +108,16 @@ def execute_trade(signal: str, ticker: str, qty: int = 1):
     if signal not in ["Buy", "Sell"]:
         raise ValueError("Signal must be 'Buy' or 'Sell' or 'Hold'.")
 
+    api = api or get_api()
+    extra = {"client_order_id": client_order_id} if client_order_id else {}
     try:
         order = api.submit_order(
             symbol=ticker,
             qty=qty,
             side=signal.lower(),
             type='market',
-            time_in_force='gtc'
+            time_in_force='gtc',
+            **extra
         )
 
         return {
@@ -107,6 +130,17 @@ def execute_trade(signal: str, ticker: str, qty: int = 1):
         }
 
     except Exception as e:
+        existing = _order_by_client_id(api, client_order_id) if client_order_id else None
+        if existing is not None:   # retried submission — the first one went through
+            return {
+                "status": "success",
+                "action": signal,
+                "ticker": ticker,
+                "qty": qty,
+                "message": f"{signal} order for {ticker} already submitted",
+                "order_id": existing.id,
+                "duplicate": True,
+            }
         return {
             "status": "error",
             "message": f"Trade execution failed: {str(e)}",
@@ -114,5 +148,19 @@ def execute_trade(signal: str, ticker: str, qty: int = 1):
             "action": signal,
             "qty": qty
         }
-    
 
+def _order_by_client_id(api, client_order_id: str):
+    try:
+        return api.get_order_by_client_order_id(client_order_id)
+    except Exception:
+        return None
+
+def get_order_status(order_id: str, api=None) -> dict:
+    """Current state of one order: {"order_id", "status", "filled_qty", "filled_avg_price"}."""
+    order = (api or get_api()).get_order(order_id)
+    return {
+        "order_id": order.id,
+        "status": order.status,
+        "filled_qty": float(order.filled_qty or 0),
+        "filled_avg_price": float(order.filled_avg_price) if order.filled_avg_price else None,
+    }
@@ -1,9 +1,40 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# The one password context. min = max = default rounds, so any stored hash with
+# a different cost is flagged by verify_and_update and re-hashed on next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so these threads hash in parallel without stalling
+# the event loop; the pool size caps how many cores a login burst can take.
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bcrypt pool (for use in request handlers)."""
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Check a password on the bcrypt pool.
+
+    Returns:
+        tuple: (matches, new_hash). new_hash is a replacement hash at the
+        current BCRYPT_ROUNDS when the password matched but the stored hash
+        uses another cost; otherwise None.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_pool, pwd_context.verify_and_update, plain_password, hashed_password)
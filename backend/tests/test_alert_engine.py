@@ -0,0 +1,83 @@
+import pytest
+from src.alert_engine import AlertEngine
+
+
+def alert(alert_id, ticker, target, condition):
+    return {"_id": alert_id, "ticker": ticker, "target_price": target, "condition": condition}
+
+
+def ids(alerts):
+    return sorted(a["_id"] for a in alerts)
+
+
+def test_only_crossed_alerts_fire():
+    engine = AlertEngine()
+    for i, target in enumerate([100, 110, 120]):
+        engine.add(alert(f"a{i}", "AAPL", target, "above"))
+    for i, target in enumerate([90, 80]):
+        engine.add(alert(f"b{i}", "AAPL", target, "below"))
+
+    assert engine.evaluate("AAPL", 95) == []
+    assert ids(engine.evaluate("AAPL", 110)) == ["a0", "a1"]
+    assert ids(engine.evaluate("AAPL", 85)) == ["b0"]
+    assert len(engine) == 2
+
+
+def test_fired_alerts_are_removed():
+    engine = AlertEngine()
+    engine.add(alert("1", "AAPL", 100, "above"))
+    assert ids(engine.evaluate("AAPL", 101)) == ["1"]
+    assert engine.evaluate("AAPL", 150) == []
+    assert not engine.has_ticker("AAPL")
+    assert "1" not in engine
+
+
+def test_alerts_on_other_tickers_are_untouched():
+    engine = AlertEngine()
+    engine.add(alert("1", "AAPL", 100, "above"))
+    engine.add(alert("2", "MSFT", 100, "above"))
+    assert ids(engine.evaluate("AAPL", 200)) == ["1"]
+    assert engine.tickers() == ["MSFT"]
+
+
+def test_removed_alert_never_fires():
+    engine = AlertEngine()
+    engine.add(alert("1", "AAPL", 100, "above"))
+    engine.add(alert("2", "AAPL", 105, "above"))
+    assert engine.remove("1")["_id"] == "1"
+    assert engine.remove("1") is None
+    assert ids(engine.evaluate("AAPL", 200)) == ["2"]
+
+
+def test_readding_an_alert_replaces_it():
+    engine = AlertEngine()
+    engine.add(alert("1", "AAPL", 100, "above"))
+    engine.add(alert("1", "AAPL", 50, "below"))
+    assert len(engine) == 1
+    assert engine.evaluate("AAPL", 150) == []
+    assert ids(engine.evaluate("AAPL", 40)) == ["1"]
+
+
+def test_heaps_are_compacted_after_many_removals():
+    engine = AlertEngine()
+    for i in range(100):
+        engine.add(alert(str(i), "AAPL", 100 + i, "above"))
+    for i in range(90):
+        engine.remove(str(i))
+    assert len(engine._above["AAPL"]) <= 2 * len(engine)
+    assert ids(engine.evaluate("AAPL", 1000)) == [str(i) for i in range(90, 100)]
+
+
+def test_unknown_condition_is_rejected():
+    engine = AlertEngine()
+    with pytest.raises(ValueError):
+        engine.add(alert("1", "AAPL", 100, "sideways"))
+    assert len(engine) == 0
+
+
+def test_evaluate_many():
+    engine = AlertEngine()
+    engine.add(alert("1", "AAPL", 100, "above"))
+    engine.add(alert("2", "MSFT", 100, "below"))
+    engine.add(alert("3", "TSLA", 100, "above"))
+    assert ids(engine.evaluate_many({"AAPL": 101, "MSFT": 99, "TSLA": 99})) == ["1", "2"]
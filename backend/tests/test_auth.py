@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.auth import hash_password, verify_password, create_access_token, decode_access_token
 
 
@@ -61,3 +62,95 @@ def test_decode_access_token_tampered():
     token = create_access_token({"sub": "user@example.com"})
     tampered = token[:-5] + "XXXXX"
     assert decode_access_token(tampered) is None
+
+
+# ── Password hashing off the event loop ────────────────────────────────────────
+
+def low_cost_hash(password):
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(password)
+
+
+def test_auth_and_utils_share_one_context():
+    from src import auth, utils
+    assert auth.hash_password is utils.hash_password
+    assert f"${utils.BCRYPT_ROUNDS:02d}$" in hash_password("secret123")
+
+
+@pytest.mark.asyncio
+async def test_hash_password_async_runs_in_pool():
+    import threading
+    from src import utils
+    seen = []
+    original = utils.hash_password
+
+    def spy(password):
+        seen.append(threading.current_thread().name)
+        return original(password)
+
+    with patch("src.utils.hash_password", spy):
+        hashed = await utils.hash_password_async("secret123")
+    assert verify_password("secret123", hashed)
+    assert seen[0].startswith("bcrypt")
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_flags_other_cost():
+    from src.utils import verify_and_update_async
+    stale = low_cost_hash("secret123")
+    assert await verify_and_update_async("wrong", stale) == (False, None)
+    ok, new_hash = await verify_and_update_async("secret123", stale)
+    assert ok and new_hash and verify_password("secret123", new_hash)
+    assert await verify_and_update_async("secret123", new_hash) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_stale_password():
+    from src import mongo_crud
+    db = MagicMock()
+    db.users.find_one = AsyncMock(return_value={"_id": 1, "email": "a@example.com",
+                                                "password": low_cost_hash("secret123")})
+    db.users.update_one = AsyncMock()
+    with patch("src.mongo_crud.db", db):
+        user = await mongo_crud.authenticate_user("a@example.com", "secret123")
+    assert user == {"_id": 1, "email": "a@example.com"}
+    query, update = db.users.update_one.await_args.args
+    assert query == {"_id": 1} and verify_password("secret123", update["$set"]["password"])
+
+
+# ── Verified-token cache ───────────────────────────────────────────────────────
+
+def test_token_subject_is_cached_after_first_verification():
+    from src import auth
+    token = create_access_token({"sub": "cached@example.com"})
+    assert auth.get_token_subject(token) == "cached@example.com"
+    with patch("src.auth.decode_access_token") as decode:
+        assert auth.get_token_subject(token) == "cached@example.com"
+    decode.assert_not_called()
+
+
+def test_cached_token_still_expires():
+    from datetime import timedelta
+    from src import auth
+    token = create_access_token({"sub": "short@example.com"}, expires_delta=timedelta(seconds=60))
+    assert auth.get_token_subject(token) == "short@example.com"
+    with patch("src.auth.time.time", return_value=10**10):
+        assert auth.get_token_subject(token) is None
+
+
+def test_invalid_tokens_are_not_cached():
+    from src import auth
+    token = create_access_token({"sub": "user@example.com"})
+    tampered = token[:-5] + "XXXXX"
+    assert auth.get_token_subject(tampered) is None
+    assert auth._token_key(tampered) not in auth._token_cache
+    assert auth.get_token_subject(create_access_token({"role": "no-subject"})) is None
+
+
+def test_revoked_token_is_rejected():
+    from src import auth
+    token = create_access_token({"sub": "revoked@example.com"})
+    assert auth.get_token_subject(token) == "revoked@example.com"
+    auth.revoke_token(token)
+    assert auth.get_token_subject(token) is None
+    assert auth.get_token_subject(create_access_token({"sub": "other@example.com"})) == "other@example.com"
@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from src.backtester import run_backtest, _run_backtest_loop
+
+
+def make_series(n=500, seed=0, noise=0.02):
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    predictions = prices * (1 + rng.normal(0, noise, n))
+    return prices, predictions
+
+
+# ── Parity with the per-bar reference ─────────────────────────────────────────
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_on_random_walk(seed):
+    y, p = make_series(seed=seed)
+    assert run_backtest(y, p) == _run_backtest_loop(y, p)
+
+
+def test_matches_reference_with_2d_inputs():
+    # preprocess_and_predict hands over (N, 1) arrays
+    y, p = make_series(300, seed=7)
+    assert run_backtest(y.reshape(-1, 1), p.reshape(-1, 1)) == \
+        _run_backtest_loop(y.reshape(-1, 1), p.reshape(-1, 1))
+
+
+def test_matches_reference_on_half_cent_prices():
+    # Half-cent prices are where np.round and Python's round() disagree
+    y = 100 + np.arange(400) * 0.005
+    p = np.where(np.arange(400) % 3 == 0, y * 1.02, y * 0.98)
+    assert run_backtest(y, p) == _run_backtest_loop(y, p)
+
+
+def test_matches_reference_with_mismatched_lengths():
+    y, p = make_series(200, seed=3)
+    assert run_backtest(y, p[:150]) == _run_backtest_loop(y, p[:150])
+
+
+def test_matches_reference_with_float32_predictions():
+    y, p = make_series(200, seed=4)
+    p = p.astype(np.float32)
+    assert run_backtest(y, p) == _run_backtest_loop(y, p)
+
+
+# ── Behaviour ─────────────────────────────────────────────────────────────────
+
+def test_no_trades_when_always_hold():
+    y = np.linspace(100, 110, 50)
+    result = run_backtest(y, y)
+    assert result["trades"] == []
+    assert result["strategy_equity"] == [10_000.0] * 50
+    assert result["metrics"]["win_rate_pct"] == 0
+
+
+def test_buy_then_sell_round_trip():
+    y = np.array([100.0, 105.0, 110.0, 108.0])
+    p = np.array([110.0, 105.0, 90.0, 108.0])   # Buy, Hold, Sell, Hold
+    result = run_backtest(y, p)
+    assert [t["action"] for t in result["trades"]] == ["Buy", "Sell"]
+    assert result["strategy_equity"] == [10_000.0, 10_005.0, 10_010.0, 10_010.0]
+    assert result["metrics"]["win_rate_pct"] == 100.0
+
+
+def test_open_position_counts_towards_win_rate():
+    y = np.array([100.0, 95.0, 90.0])
+    p = np.array([110.0, 95.0, 90.0])            # Buy and never sell
+    result = run_backtest(y, p)
+    assert result["metrics"]["num_trades"] == 1
+    assert result["metrics"]["win_rate_pct"] == 0
+    assert result["metrics"]["max_drawdown_pct"] == pytest.approx(0.1, abs=0.01)
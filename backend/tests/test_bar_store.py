@@ -0,0 +1,197 @@
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+from src import bar_store, data_loader
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "STORE_DIR", str(tmp_path))
+    data_loader._cache.clear()
+    yield tmp_path
+    data_loader._cache.clear()
+
+
+def polygon_bars(day: str, n: int = 3, base: float = 100.0) -> list[dict]:
+    # 14:30 UTC = 09:30/10:30 ET, safely inside the trading day
+    t0 = int(pd.Timestamp(f"{day} 14:30", tz="UTC").timestamp() * 1000)
+    return [{"t": t0 + i * 300_000, "o": base, "h": base + 1, "l": base - 1,
+             "c": base + i, "v": 1000.0} for i in range(n)]
+
+
+# ── Store ──────────────────────────────────────────────────────────────────────
+
+def test_write_and_read_round_trip():
+    bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars("2025-03-03")))
+    bars = bar_store.read_bars("AAPL", "5", "2025-03-01", "2025-03-05")
+    assert bars.dtype == bar_store.BAR_DTYPE
+    assert bars["c"].tolist() == [100.0, 101.0, 102.0]
+
+
+def test_write_merges_and_replaces_same_timestamps():
+    bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars("2025-03-03", n=2)))
+    bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars("2025-03-03", n=4, base=200.0)))
+    bars = bar_store.read_bars("AAPL", "5", "2025-03-03", "2025-03-03")
+    assert bars["c"].tolist() == [200.0, 201.0, 202.0, 203.0]
+    assert np.all(np.diff(bars["t"]) > 0)
+
+
+def test_read_only_returns_requested_days():
+    for day in ("2025-03-03", "2025-03-04", "2025-03-05"):
+        bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars(day)))
+    assert len(bar_store.read_bars("AAPL", "5", "2025-03-04", "2025-03-04")) == 3
+
+
+def test_coverage_merges_adjacent_ranges():
+    bar_store.mark_covered("AAPL", "5", "2025-01-01", "2025-01-10")
+    bar_store.mark_covered("AAPL", "5", "2025-01-11", "2025-01-20")
+    bar_store.mark_covered("AAPL", "5", "2025-02-01", "2025-02-05")
+    assert bar_store.coverage("AAPL", "5") == [("2025-01-01", "2025-01-20"), ("2025-02-01", "2025-02-05")]
+
+
+def test_coverage_is_per_interval():
+    bar_store.mark_covered("AAPL", "5", "2025-01-01", "2025-01-10")
+    assert bar_store.coverage("AAPL", "15") == []
+
+
+def test_coverage_excludes_current_session():
+    today = date.today()
+    bar_store.mark_covered("AAPL", "5", (today - timedelta(days=5)).isoformat(), (today + timedelta(days=1)).isoformat())
+    (_, end), = bar_store.coverage("AAPL", "5")
+    assert date.fromisoformat(end) < bar_store.market_today()
+
+
+def test_missing_ranges_reports_gaps():
+    bar_store.mark_covered("AAPL", "5", "2025-01-05", "2025-01-10")
+    assert bar_store.missing_ranges("AAPL", "5", "2025-01-01", "2025-01-15") == [
+        ("2025-01-01", "2025-01-04"), ("2025-01-11", "2025-01-15"),
+    ]
+    assert bar_store.missing_ranges("AAPL", "5", "2025-01-06", "2025-01-09") == []
+
+
+# ── load_data on top of the store ──────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_load_data_serves_history_from_disk_after_restart():
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock,
+               return_value=polygon_bars("2025-03-03") + polygon_bars("2025-03-05")) as fetch:
+        first = await data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-05", interval="5")
+    assert fetch.await_count == 1
+
+    data_loader._cache.clear()   # simulate a fresh worker
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock) as fetch:
+        second = await data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-05", interval="5")
+    fetch.assert_not_awaited()
+    pd.testing.assert_frame_equal(first, second)
+
+
+@pytest.mark.asyncio
+async def test_load_data_only_fetches_missing_tail():
+    today = bar_store.market_today()
+    start = (today - timedelta(days=10)).isoformat()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    bar_store.mark_covered("AAPL", "5", start, yesterday)
+    bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars(yesterday)))
+
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=[]) as fetch:
+        df = await data_loader.load_data("AAPL", start=start, end=today.isoformat(), interval="5")
+    fetch.assert_awaited_once_with("AAPL", today.isoformat(), today.isoformat(), "5")
+    assert list(df.columns) == ["Close"] and len(df) == 3
+
+
+@pytest.mark.asyncio
+async def test_load_data_memory_cache_key_includes_range():
+    for day in ("2025-03-03", "2025-03-04"):
+        bar_store.write_bars("AAPL", "5", bar_store.bars_from_polygon(polygon_bars(day)))
+    bar_store.mark_covered("AAPL", "5", "2025-03-01", "2025-03-10")
+
+    narrow = await data_loader.load_data("AAPL", start="2025-03-03", end="2025-03-03", interval="5")
+    wide   = await data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-10", interval="5")
+    assert len(narrow) == 3 and len(wide) == 6
+
+
+@pytest.mark.asyncio
+async def test_load_data_raises_when_no_bars():
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=[]):
+        with pytest.raises(ValueError):
+            await data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-05", interval="5")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_load_data_misses_fetch_once():
+    async def slow_fetch(*args):
+        await asyncio.sleep(0.05)
+        return polygon_bars("2025-03-03")
+
+    with patch("src.data_loader._fetch_polygon", new=AsyncMock(side_effect=slow_fetch)) as fetch:
+        frames = await asyncio.gather(*(data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-05",
+                                                              interval="5") for _ in range(10)))
+    assert fetch.await_count == 1
+    assert all(f is frames[0] for f in frames)
+
+
+@pytest.mark.asyncio
+async def test_past_gap_is_covered_even_without_bars():
+    # 2025-03-08/09 is a weekend: nothing to fetch, but it must not be asked for again
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=polygon_bars("2025-03-07")):
+        await data_loader.load_data("AAPL", start="2025-03-07", end="2025-03-09", interval="5")
+    assert bar_store.coverage("AAPL", "5") == [("2025-03-07", "2025-03-09")]
+
+    data_loader._cache.clear()
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock) as fetch:
+        await data_loader.load_data("AAPL", start="2025-03-07", end="2025-03-09", interval="5")
+    fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_gap_reaching_today_is_only_covered_up_to_last_bar():
+    today = bar_store.market_today()
+    start = (today - timedelta(days=6)).isoformat()
+    last = (today - timedelta(days=4)).isoformat()
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=polygon_bars(last)):
+        await data_loader.load_data("AAPL", start=start, end=today.isoformat(), interval="5")
+    assert bar_store.coverage("AAPL", "5") == [(start, last)]
+
+    data_loader._cache.clear()
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=[]):
+        await data_loader.load_data("AAPL", start=start, end=today.isoformat(), interval="5")
+    assert bar_store.coverage("AAPL", "5") == [(start, last)]   # empty answer marks nothing
+
+
+@pytest.mark.asyncio
+async def test_fetch_polygon_rejects_error_status():
+    with patch("src.polygon_client.get_json", new=AsyncMock(return_value={"status": "NOT_AUTHORIZED", "results": []})):
+        with pytest.raises(ValueError):
+            await data_loader._fetch_polygon("AAPL", "2025-03-01", "2025-03-05", "5")
+
+
+@pytest.mark.asyncio
+async def test_fetch_polygon_follows_next_url():
+    pages = [
+        {"results": polygon_bars("2025-03-03"), "next_url": "https://api.polygon.io/v2/aggs/next?cursor=a"},
+        {"results": polygon_bars("2025-03-04"), "next_url": "https://api.polygon.io/v2/aggs/next?cursor=b"},
+        {"results": polygon_bars("2025-03-05")},
+    ]
+    with patch("src.polygon_client.get_json", new=AsyncMock(side_effect=pages)) as get_json:
+        results = await data_loader._fetch_polygon("AAPL", "2025-03-01", "2025-03-05", "5")
+    assert len(results) == 9 and get_json.await_count == 3
+    assert get_json.await_args_list[2].args == ("https://api.polygon.io/v2/aggs/next?cursor=b",)
+
+
+@pytest.mark.asyncio
+async def test_load_data_keeps_store_io_off_the_event_loop():
+    import threading
+    seen = []
+    read_bars = bar_store.read_bars
+
+    def spy(*args):
+        seen.append(threading.current_thread() is threading.main_thread())
+        return read_bars(*args)
+
+    with patch("src.data_loader._fetch_polygon", new_callable=AsyncMock, return_value=polygon_bars("2025-03-05")), \
+         patch("src.bar_store.read_bars", side_effect=spy):
+        await data_loader.load_data("AAPL", start="2025-03-01", end="2025-03-05", interval="5")
+    assert seen == [False]
@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from src.broker import AsyncBroker, FakeBroker
+
+
+def make_broker(ttl=60.0, **fake):
+    client = FakeBroker(prices={"AAPL": 150.0}, **fake)
+    return AsyncBroker(client, ttl=ttl, workers=2), client
+
+
+@pytest.mark.asyncio
+async def test_positions_are_cached_for_ttl():
+    broker, client = make_broker()
+    first = await broker.positions()
+    second = await broker.positions()
+    assert first == second and first["status"] == "success"
+    assert client.calls["list_positions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_call():
+    broker, client = make_broker(latency=0.05)
+    results = await asyncio.gather(*(broker.account() for _ in range(20)))
+    assert all(r == results[0] for r in results)
+    assert client.calls["get_account"] == 1
+
+
+@pytest.mark.asyncio
+async def test_order_invalidates_snapshots():
+    broker, client = make_broker()
+    assert (await broker.positions())["holdings"] == []
+    result = await broker.submit_order("Buy", "AAPL", 2)
+    assert result["status"] == "success" and result["order_id"]
+    holdings = (await broker.positions())["holdings"]
+    assert [(h["ticker"], h["quantity"], h["avg_cost"]) for h in holdings] == [("AAPL", 2.0, 150.0)]
+    assert client.calls["list_positions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_overlapping_an_order_is_not_cached():
+    broker, client = make_broker(latency=0.05)
+    stale = asyncio.ensure_future(broker.positions())
+    await asyncio.sleep(0.01)   # the fetch is in flight
+    await broker.submit_order("Buy", "AAPL", 1)
+    await stale
+    assert (await broker.positions())["holdings"][0]["ticker"] == "AAPL"
+
+
+@pytest.mark.asyncio
+async def test_hold_does_not_invalidate():
+    broker, client = make_broker()
+    await broker.positions()
+    assert (await broker.submit_order("Hold", "AAPL"))["status"] == "skipped"
+    await broker.positions()
+    assert client.calls == {"list_positions": 1, "get_account": 0, "submit_order": 0, "get_order": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached():
+    broker, client = make_broker()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ConnectionError("broker down")
+
+    client.list_positions = failing
+    assert (await broker.positions())["status"] == "error"
+    assert (await broker.positions())["status"] == "error"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_broker_calls_run_off_the_event_loop():
+    import threading
+    broker, client = make_broker()
+    seen = []
+    original = client.get_account
+
+    def spy():
+        seen.append(threading.current_thread().name)
+        return original()
+
+    client.get_account = spy
+    await broker.account()
+    assert seen[0].startswith("broker")
+
+
+# ── Batch orders ───────────────────────────────────────────────────────────────
+
+ORDERS = [("AAPL", "Buy", 2), ("MSFT", "Buy", 1), ("TSLA", "Sell", 1), ("NVDA", "Buy", 3)]
+
+
+@pytest.mark.asyncio
+async def test_submit_orders_bounds_parallelism():
+    broker, client = make_broker(latency=0.02)
+    results = await broker.submit_orders(ORDERS, "batch1", max_parallel=2)
+    assert [r["ticker"] for r in results] == ["AAPL", "MSFT", "TSLA", "NVDA"]
+    assert all(r["status"] == "success" for r in results)
+    assert [r["client_order_id"] for r in results] == [f"batch1-{i}" for i in range(4)]
+    assert client.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_batch_places_nothing_twice():
+    broker, client = make_broker()
+    first = await broker.submit_orders(ORDERS, "batch1")
+    again = await broker.submit_orders(ORDERS, "batch1")
+    assert len(client.orders) == 4
+    assert [r["order_id"] for r in again] == [r["order_id"] for r in first]
+    assert all(r.get("duplicate") for r in again)
+
+
+@pytest.mark.asyncio
+async def test_rejected_order_does_not_sink_the_batch():
+    broker, client = make_broker(reject={"TSLA"})
+    results = await broker.submit_orders(ORDERS, "batch1")
+    assert [r["status"] for r in results] == ["success", "success", "error", "success"]
+    assert "not tradable" in results[2]["message"]
+
+
+@pytest.mark.asyncio
+async def test_track_orders_polls_until_filled():
+    broker, client = make_broker(fill_delay=0.05)
+    results = await broker.submit_orders(ORDERS[:2], "batch1")
+    ids = [r["order_id"] for r in results]
+    states = await broker.track_orders(ids, timeout=2, interval=0.02)
+    assert [states[i]["status"] for i in ids] == ["filled", "filled"]
+    assert states[ids[0]]["filled_qty"] == 2 and states[ids[0]]["filled_avg_price"] == 150.0
+    assert client.calls["get_order"] > 2   # at least one poll saw them still accepted
+
+
+@pytest.mark.asyncio
+async def test_track_orders_gives_up_at_timeout():
+    broker, client = make_broker(fill_delay=60)
+    [result] = await broker.submit_orders(ORDERS[:1], "batch1")
+    states = await broker.track_orders([result["order_id"]], timeout=0.05, interval=0.02)
+    assert states[result["order_id"]]["status"] == "accepted"
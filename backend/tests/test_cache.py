@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from src.cache import TTLCache, all_stats, sizeof
+
+
+def age(cache, key, seconds):
+    cache._data[key].ts -= seconds
+
+
+def test_get_returns_fresh_value_and_counts_hits():
+    cache = TTLCache("c-basic", ttl=60)
+    assert cache.get("AAPL") is None
+    cache.set("AAPL", [1, 2, 3])
+    assert cache.get("AAPL") == [1, 2, 3]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_miss():
+    cache = TTLCache("c-ttl", ttl=60)
+    cache.set("AAPL", "x")
+    age(cache, "AAPL", 61)
+    assert cache.get("AAPL") is None
+    assert len(cache) == 0 and cache.stats()["expirations"] == 1
+
+
+def test_stale_window_keeps_entry_for_get_stale_only():
+    cache = TTLCache("c-stale", ttl=60, stale_ttl=60)
+    cache.set("AAPL", "x")
+    age(cache, "AAPL", 90)
+    assert cache.get("AAPL") is None
+    value, entry_age = cache.get_stale("AAPL")
+    assert value == "x" and entry_age >= 90
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_max_entries_evicts_least_recently_used():
+    cache = TTLCache("c-lru", ttl=60, max_entries=2)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    cache.get("A")            # B is now least recently used
+    cache.set("C", 3)
+    assert "B" not in cache and "A" in cache and "C" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_max_bytes_counts_dataframe_memory():
+    df = pd.DataFrame({"Close": np.arange(1000, dtype=float)})
+    size = sizeof(df)
+    assert size == df.memory_usage(deep=True).sum()
+
+    cache = TTLCache("c-bytes", ttl=60, max_bytes=int(size * 2.5))
+    for key in ("A", "B", "C"):
+        cache.set(key, df.copy())
+    assert len(cache) == 2 and "A" not in cache
+    assert cache.stats()["bytes"] == 2 * size
+
+
+def test_value_larger_than_budget_is_not_cached():
+    cache = TTLCache("c-huge", ttl=60, max_bytes=100)
+    cache.set("A", np.zeros(1000))
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_replacing_a_key_updates_byte_count():
+    cache = TTLCache("c-replace", ttl=60)
+    cache.set("A", np.zeros(100))
+    cache.set("A", np.zeros(10))
+    assert cache.stats()["bytes"] == 80
+
+
+def test_registry_reports_every_cache():
+    TTLCache("c-registry", ttl=1)
+    assert "c-registry" in all_stats()
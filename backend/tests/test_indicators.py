@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, SMAIndicator
+from src import indicators
+from src.feature_engineering import add_technical_indicators
+from src.indicators import COLUMNS, IndicatorState, compute_indicators, latest_indicators
+
+
+def ta_indicators(closes) -> dict[str, np.ndarray]:
+    close = pd.Series(closes, dtype=float)
+    macd = MACD(close=close)
+    return {
+        "rsi": RSIIndicator(close=close, window=14).rsi().to_numpy(),
+        "sma": SMAIndicator(close=close, window=14).sma_indicator().to_numpy(),
+        "macd": macd.macd().to_numpy(),
+        "macd_signal": macd.macd_signal().to_numpy(),
+    }
+
+
+def random_walk(n, seed=0):
+    return 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, n)))
+
+
+def assert_matches(actual, expected):
+    for name in COLUMNS:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize("n", [1, 10, 14, 30, 34, 500])
+def test_batch_matches_ta(n):
+    closes = random_walk(n)
+    assert_matches(compute_indicators(closes), ta_indicators(closes))
+
+
+def test_batch_matches_ta_per_column():
+    matrix = np.stack([random_walk(300, seed) for seed in range(5)], axis=1)
+    result = compute_indicators(matrix)
+    assert result["macd"].shape == (300, 5)
+    for j in range(5):
+        assert_matches({k: v[:, j] for k, v in result.items()}, ta_indicators(matrix[:, j]))
+
+
+def test_rsi_without_losses_is_100_like_ta():
+    closes = np.linspace(10, 20, 40)
+    assert compute_indicators(closes)["rsi"][-1] == 100.0
+    assert_matches(compute_indicators(closes), ta_indicators(closes))
+
+
+def test_nan_closes_are_rejected():
+    with pytest.raises(ValueError):
+        compute_indicators([1.0, np.nan, 2.0])
+
+
+@pytest.mark.parametrize("seed_len", [0, 5, 20, 30, 200])
+def test_streaming_from_seed_matches_ta(seed_len):
+    closes = random_walk(400, seed=3)
+    state = IndicatorState.from_history(closes[:seed_len])
+    streamed = [state.update(c) for c in closes[seed_len:]]
+    expected = ta_indicators(closes)
+    assert_matches({k: np.array([row[k] for row in streamed]) for k in COLUMNS},
+                   {k: v[seed_len:] for k, v in expected.items()})
+
+
+def test_latest_indicators_streams_only_new_bars():
+    indicators.reset_indicators()
+    closes = random_walk(300, seed=4)
+    ts = np.arange(300) * 300_000
+    with patch.object(IndicatorState, "from_history", wraps=IndicatorState.from_history) as seed:
+        first = latest_indicators("AAPL", closes[:200], ts[:200])
+        revised = closes[:250].copy()
+        revised[199] *= 1.02   # the bar that was in progress last time closed elsewhere
+        second = latest_indicators("AAPL", revised, ts[:250])
+        assert [len(call.args[0]) for call in seed.call_args_list] == [199]
+        latest_indicators("AAPL", closes[50:260], ts[50:260] + 1)   # unrelated history: reseeded
+        assert [len(call.args[0]) for call in seed.call_args_list] == [199, 209]
+
+    assert_matches({k: first[k] for k in COLUMNS}, {k: v[199] for k, v in ta_indicators(closes[:200]).items()})
+    assert_matches({k: second[k] for k in COLUMNS}, {k: v[-1] for k, v in ta_indicators(revised).items()})
+    indicators.reset_indicators()
+
+
+def test_add_technical_indicators_matches_ta():
+    closes = random_walk(120, seed=5)
+    df = add_technical_indicators(pd.DataFrame({"close_aapl": closes}))
+    assert_matches({k: df[k].to_numpy() for k in COLUMNS}, ta_indicators(closes))
+
+
+def test_latest_indicator_states_are_bounded_and_reported():
+    from src.cache import all_stats
+    indicators.reset_indicators()
+    closes = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, 60))
+    indicators.latest_indicators("AAPL", closes, np.arange(60))
+    assert all_stats()["indicators"]["entries"] == 1
+    assert indicators._states.max_entries is not None
+    indicators.reset_indicators()
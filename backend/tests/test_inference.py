@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import pytest
+import numpy as np
+from src.inference import InferenceBatcher
+
+
+class FakeModel:
+    """Returns the row sum of each window, and records the batch sizes it saw."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.threads = set()
+        self.delay = delay
+        self.fail = fail
+
+    def predict(self, X, verbose=0):
+        self.calls.append(len(X))
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("model exploded")
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return np.asarray(X).sum(axis=1, keepdims=True)
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def _make(model, **kwargs):
+        b = InferenceBatcher(model, **kwargs)
+        batchers.append(b)
+        return b
+
+    yield _make
+    for b in batchers:
+        b.stop()
+
+
+def windows(n, value):
+    return np.full((n, 5), float(value))
+
+
+@pytest.mark.asyncio
+async def test_single_request_returns_its_predictions(make_batcher):
+    batcher = make_batcher(FakeModel())
+    result = await batcher.predict(windows(3, 1))
+    np.testing.assert_array_equal(result, [[5.0], [5.0], [5.0]])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.predict(windows(i + 1, i)) for i in range(8)))
+
+    assert sum(model.calls) == sum(range(1, 9))
+    assert len(model.calls) < 8
+    for i, result in enumerate(results):
+        assert result.shape == (i + 1, 1)
+        assert np.all(result == 5.0 * i)
+
+
+@pytest.mark.asyncio
+async def test_predict_calls_never_exceed_max_batch_size(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model, max_batch_size=10, max_wait_ms=20)
+    results = await asyncio.gather(*(batcher.predict(windows(7, i)) for i in range(4)))
+    assert max(model.calls) <= 10
+    assert [len(r) for r in results] == [7, 7, 7, 7]
+
+
+@pytest.mark.asyncio
+async def test_model_runs_on_worker_thread(make_batcher):
+    model = FakeModel()
+    batcher = make_batcher(model)
+    await batcher.predict(windows(2, 1))
+    assert model.threads == {"inference-worker"}
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_predict(make_batcher):
+    batcher = make_batcher(FakeModel(delay=0.2))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await batcher.predict(windows(1, 1))
+    task.cancel()
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_model_errors_propagate_to_every_caller(make_batcher):
+    batcher = make_batcher(FakeModel(fail=True), max_wait_ms=20)
+    results = await asyncio.gather(batcher.predict(windows(1, 1)), batcher.predict(windows(1, 2)),
+                                   return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_requests_still_queued(make_batcher):
+    model = FakeModel(delay=0.3)
+    batcher = make_batcher(model, max_wait_ms=0)
+    running = asyncio.create_task(batcher.predict(windows(1, 1)))
+    while not model.calls:
+        await asyncio.sleep(0.01)
+    queued = asyncio.create_task(batcher.predict(windows(1, 2)))
+    await asyncio.sleep(0.01)
+
+    await asyncio.to_thread(batcher.stop, 0.01)
+    with pytest.raises(RuntimeError, match="stopped"):
+        await asyncio.wait_for(queued, 1)
+    np.testing.assert_array_equal(await running, [[5.0]])
+
+
+@pytest.mark.asyncio
+async def test_stats_track_batches_and_latency(make_batcher):
+    batcher = make_batcher(FakeModel(), max_wait_ms=50)
+    await asyncio.gather(*(batcher.predict(windows(2, i)) for i in range(4)))
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert stats["rows"] == 8
+    assert stats["queue_depth"] == 0
+    assert stats["latency_ms"]["p99"] is not None
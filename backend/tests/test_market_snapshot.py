@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+import pytest
+from src.market_snapshot import MarketSnapshot, MarketSnapshotService
+
+RESULTS = [
+    {"T": "AAPL", "o": 100.0, "h": 106.0, "l": 99.0, "c": 105.0, "v": 5_000_000},
+    {"T": "MSFT", "o": 400.0, "h": 401.0, "l": 380.0, "c": 380.0, "v": 3_000_000},
+    {"T": "PENNY", "o": 0.10, "h": 0.30, "l": 0.10, "c": 0.30, "v": 1_000},
+    {"T": "FLAT", "o": 50.0, "h": 50.0, "l": 50.0, "c": 50.0, "v": 9_000_000},
+    {"T": "NOOPEN", "o": 0, "c": 12.0, "v": 10},
+]
+
+
+def test_bar_lookup():
+    snap = MarketSnapshot("2024-01-02", RESULTS)
+    assert len(snap) == 5
+    assert snap.bar("AAPL") == {"ticker": "AAPL", "date": "2024-01-02", "open": 100.0, "high": 106.0,
+                                "low": 99.0, "close": 105.0, "volume": 5_000_000, "change_pct": 5.0}
+    assert snap.bar("NOOPEN")["change_pct"] == 0.0
+    assert snap.bar("ZZZZ") is None
+
+
+def test_top_rankings():
+    snap = MarketSnapshot("2024-01-02", RESULTS)
+    assert [r["ticker"] for r in snap.top(2, by="gainers")] == ["PENNY", "AAPL"]
+    assert [r["ticker"] for r in snap.top(2, by="gainers", min_volume=100_000)] == ["AAPL", "FLAT"]
+    assert [r["ticker"] for r in snap.top(1, by="losers")] == ["MSFT"]
+    assert [r["ticker"] for r in snap.top(10, by="volume")] == ["FLAT", "AAPL", "MSFT", "PENNY", "NOOPEN"]
+    assert snap.top(0) == [] and snap.top(5, min_volume=10**9) == []
+
+
+def test_top_matches_full_sort_on_large_table():
+    import random
+    rng = random.Random(3)
+    rows = [{"T": f"T{i}", "o": 10.0, "c": 10.0 * rng.uniform(0.5, 1.5), "v": rng.randint(0, 10**6)}
+            for i in range(5000)]
+    snap = MarketSnapshot("2024-01-02", rows)
+    expected = sorted(range(5000), key=lambda i: -snap.volume[i])[:25]
+    assert [r["ticker"] for r in snap.top(25, by="volume")] == [f"T{i}" for i in expected]
+
+
+class FakeGrouped:
+    def __init__(self, results_by_call):
+        self.results_by_call = list(results_by_call)
+        self.dates = []
+
+    async def __call__(self, date):
+        self.dates.append(date)
+        await asyncio.sleep(0.01)
+        result = self.results_by_call.pop(0) if len(self.results_by_call) > 1 else self.results_by_call[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.mark.asyncio
+async def test_refresh_walks_back_past_empty_days():
+    fetch = FakeGrouped([[], RESULTS])
+    service = MarketSnapshotService(fetch)
+    snap = await service.refresh()
+    assert len(fetch.dates) == 2 and fetch.dates[1] < fetch.dates[0]
+    assert snap.date == fetch.dates[1] and service.bar("MSFT")["close"] == 380.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_fetch_and_current_day_is_not_refetched():
+    fetch = FakeGrouped([RESULTS])
+    service = MarketSnapshotService(fetch)
+    snaps = await asyncio.gather(*(service.ensure() for _ in range(10)))
+    assert all(s is snaps[0] for s in snaps) and len(fetch.dates) == 1
+    assert await service.refresh() is snaps[0] and len(fetch.dates) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_snapshot():
+    request = httpx.Request("GET", "https://api.polygon.io")
+    forbidden = httpx.HTTPStatusError("403", request=request, response=httpx.Response(403, request=request))
+    fetch = FakeGrouped([forbidden])
+    service = MarketSnapshotService(fetch)
+    assert await service.refresh() is None and len(fetch.dates) == 1   # no retry on other dates
+    old = MarketSnapshot("2000-01-03", RESULTS)
+    service.snapshot = old
+    assert await service.refresh() is old
+    assert service.stats()["tickers"] == 5
+
+
+@pytest.mark.asyncio
+async def test_scheduled_refresh_runs_until_stopped():
+    fetch = FakeGrouped([RESULTS])
+    service = MarketSnapshotService(fetch, interval=0.01)
+    await service.start()
+    await asyncio.sleep(0.05)
+    await service.stop()
+    assert service.snapshot is not None and service.refreshes == 1
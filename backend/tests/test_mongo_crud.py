@@ -0,0 +1,282 @@
+import os
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from src.models import PriceAlert, Transaction
+from src import mongo_crud
+
+
+def fake_db():
+    db = MagicMock()
+    collections = {}
+
+    def collection(name):
+        if name not in collections:
+            collections[name] = MagicMock()
+            collections[name].create_indexes = AsyncMock()
+            collections[name].drop_index = AsyncMock(side_effect=OperationFailure("index not found"))
+        return collections[name]
+
+    db.__getitem__.side_effect = collection
+    return db, collections
+
+
+# ── Index bootstrap ────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_creates_every_index():
+    db, collections = fake_db()
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.ensure_indexes()
+    assert set(collections) == {"users", "watchlist", "transactions", "alerts"}
+
+    specs = {name: c.create_indexes.call_args[0][0][0].document for name, c in collections.items()}
+    assert specs["users"]["unique"] and list(specs["users"]["key"]) == ["email"]
+    assert specs["watchlist"]["unique"] and list(specs["watchlist"]["key"]) == ["user_email", "ticker"]
+    assert dict(specs["transactions"]["key"]) == {"user_email": 1, "executed_at": -1, "_id": -1}
+    assert specs["alerts"]["partialFilterExpression"] == {"triggered": False}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_survives_a_failing_collection():
+    db, collections = fake_db()
+    db["users"].create_indexes.side_effect = DuplicateKeyError("duplicate email")
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.ensure_indexes()
+    assert collections["alerts"].create_indexes.await_count == 1
+
+
+# ── Queries ────────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_add_to_watchlist_is_a_single_upsert():
+    db = MagicMock()
+    db.watchlist.update_one = AsyncMock(return_value=MagicMock(upserted_id="new"))
+    with patch("src.mongo_crud.db", db):
+        assert await mongo_crud.add_to_watchlist("AAPL", "a@example.com") is True
+        db.watchlist.update_one.return_value = MagicMock(upserted_id=None)
+        assert await mongo_crud.add_to_watchlist("AAPL", "a@example.com") is False
+    query, update = db.watchlist.update_one.call_args[0]
+    assert query == {"user_email": "a@example.com", "ticker": "AAPL"}
+    assert "$setOnInsert" in update and db.watchlist.update_one.call_args[1]["upsert"]
+
+
+@pytest.mark.asyncio
+async def test_add_to_watchlist_race_reports_existing():
+    db = MagicMock()
+    db.watchlist.update_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+    with patch("src.mongo_crud.db", db):
+        assert await mongo_crud.add_to_watchlist("AAPL", "a@example.com") is False
+
+
+@pytest.mark.asyncio
+async def test_user_lookup_never_fetches_the_password_hash():
+    db = MagicMock()
+    db.users.find_one = AsyncMock(return_value={"_id": 1})
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.get_user_by_email("a@example.com")
+    assert db.users.find_one.call_args[0][1] == {"_id": 1}
+
+
+@pytest.mark.asyncio
+async def test_transactions_page_is_keyed_on_executed_at_and_id():
+    db = MagicMock()
+    db.transactions.aggregate.return_value.to_list = AsyncMock(return_value=[])
+    before = (datetime(2024, 1, 2), ObjectId())
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.get_user_transactions("a@example.com", limit=10, before=before,
+                                               start=datetime(2024, 1, 1))
+    match, sort, limit, project, _ = db.transactions.aggregate.call_args[0][0]
+    assert match["$match"]["user_email"] == "a@example.com"
+    assert match["$match"]["executed_at"] == {"$gte": datetime(2024, 1, 1)}
+    assert match["$match"]["$or"] == [
+        {"executed_at": {"$lt": before[0]}},
+        {"executed_at": before[0], "_id": {"$lt": before[1]}},
+        {"executed_at": None},
+    ]
+    assert list(sort["$sort"].items()) == [("executed_at", -1), ("_id", -1)]
+    assert limit == {"$limit": 10}
+    assert project == {"$project": {"user_email": 0}}
+
+
+@pytest.mark.asyncio
+async def test_watchlist_changes_are_one_bulk_write():
+    db = MagicMock()
+    db.watchlist.find.return_value.to_list = AsyncMock(return_value=[{"ticker": "TSLA"}])
+    db.watchlist.bulk_write = AsyncMock(side_effect=BulkWriteError({
+        "upserted": [{"index": 0, "_id": ObjectId()}],
+        "writeErrors": [{"index": 2, "code": 11000, "errmsg": "duplicate key"}],
+    }))
+    with patch("src.mongo_crud.db", db):
+        results = await mongo_crud.apply_watchlist_changes(
+            "a@example.com", add=["AAPL", "MSFT", "NVDA"], remove=["TSLA", "GOOG"])
+    assert [(r["ticker"], r["status"]) for r in results] == [
+        ("AAPL", "added"), ("MSFT", "exists"), ("NVDA", "exists"), ("TSLA", "removed"), ("GOOG", "not_found"),
+    ]
+    ops = db.watchlist.bulk_write.await_args.args[0]
+    assert len(ops) == 4   # three upserts, one delete (GOOG is not watched)
+    assert db.watchlist.bulk_write.await_args.kwargs == {"ordered": False}
+
+
+@pytest.mark.asyncio
+async def test_alert_changes_are_one_bulk_write():
+    owned, foreign = str(ObjectId()), str(ObjectId())
+    db = MagicMock()
+    db.alerts.find.return_value.to_list = AsyncMock(return_value=[{"_id": ObjectId(owned)}])
+    db.alerts.bulk_write = AsyncMock(return_value=MagicMock(bulk_api_result={"nInserted": 1, "nRemoved": 1}))
+    alerts = [PriceAlert(ticker="AAPL", target_price=200, condition="above", user_email="a@example.com")]
+    with patch("src.mongo_crud.db", db):
+        results = await mongo_crud.apply_alert_changes("a@example.com", alerts, [owned, foreign])
+    assert results[0]["status"] == "created" and ObjectId.is_valid(results[0]["alert_id"])
+    assert [r["status"] for r in results[1:]] == ["deleted", "not_found"]
+    assert len(db.alerts.bulk_write.await_args.args[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_deletes_are_reported_per_item():
+    db = MagicMock()
+    db.watchlist.find.return_value.to_list = AsyncMock(return_value=[{"ticker": "TSLA"}, {"ticker": "AMD"}])
+    db.watchlist.bulk_write = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [{"index": 2, "code": 50, "errmsg": "operation exceeded time limit"}],
+    }))
+    with patch("src.mongo_crud.db", db):
+        results = await mongo_crud.apply_watchlist_changes("a@example.com", add=["AAPL"], remove=["TSLA", "AMD"])
+    assert [(r["ticker"], r["status"]) for r in results] == [("AAPL", "exists"), ("TSLA", "removed"), ("AMD", "error")]
+
+    owned = [str(ObjectId()), str(ObjectId())]
+    db.alerts.find.return_value.to_list = AsyncMock(return_value=[{"_id": ObjectId(a)} for a in owned])
+    db.alerts.bulk_write = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [{"index": 0, "code": 50, "errmsg": "operation exceeded time limit"}],
+    }))
+    with patch("src.mongo_crud.db", db):
+        results = await mongo_crud.apply_alert_changes("a@example.com", [], owned)
+    assert [r["status"] for r in results] == ["error", "deleted"]
+    assert results[0]["detail"] == "operation exceeded time limit"
+
+
+@pytest.mark.asyncio
+async def test_record_transactions_is_one_insert_and_skips_replays():
+    db = MagicMock()
+    db.transactions.insert_many = AsyncMock(side_effect=BulkWriteError({
+        "nInserted": 1, "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate client_order_id"}],
+    }))
+    rows = [Transaction(action="Buy", ticker=t, quantity=1, client_order_id=f"b-{i}") for i, t in enumerate("AB")]
+    with patch("src.mongo_crud.db", db):
+        assert await mongo_crud.record_transactions(rows) == 1
+        assert await mongo_crud.record_transactions([]) == 0
+        db.transactions.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 121}]})
+        with pytest.raises(BulkWriteError):
+            await mongo_crud.record_transactions(rows)
+    assert db.transactions.insert_many.await_count == 2
+    assert db.transactions.insert_many.await_args.kwargs == {"ordered": False}
+
+
+def test_cursor_round_trip():
+    tx_id = ObjectId()
+    cursor = mongo_crud.encode_cursor({"_id": str(tx_id), "executed_at": "2024-01-02T03:04:05.678"})
+    assert mongo_crud.decode_cursor(cursor) == (datetime(2024, 1, 2, 3, 4, 5, 678000), tx_id)
+    with pytest.raises(ValueError):
+        mongo_crud.decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_cursor_for_legacy_row_without_executed_at_pages_by_id():
+    tx_id = ObjectId()
+    for row in ({"_id": str(tx_id)}, {"_id": str(tx_id), "executed_at": None}):
+        assert mongo_crud.decode_cursor(mongo_crud.encode_cursor(row)) == (None, tx_id)
+
+    db = MagicMock()
+    db.transactions.aggregate.return_value.to_list = AsyncMock(return_value=[])
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.get_user_transactions("a@example.com", limit=10, before=(None, tx_id))
+    match = db.transactions.aggregate.call_args[0][0][0]["$match"]
+    assert match["$or"] == [{"executed_at": None, "_id": {"$lt": tx_id}}]
+
+
+# ── Query plans (needs a local mongod: MONGO_TEST_URI=mongodb://localhost:27017) ──
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+
+@pytest_asyncio.fixture
+async def live_db():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(MONGO_TEST_URI, serverSelectionTimeoutMS=2000)
+    db = client["trading_bot_test_indexes"]
+    await client.drop_database(db.name)
+    with patch("src.mongo_crud.db", db):
+        await mongo_crud.ensure_indexes()
+        yield db
+    await client.drop_database(db.name)
+    client.close()
+
+
+def winning_stages(plan: dict) -> set:
+    stages, node = set(), plan["queryPlanner"]["winningPlan"]
+    while node:
+        stages.add(node.get("stage"))
+        node = node.get("inputStage") or node.get("queryPlan")
+    return stages
+
+
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+@pytest.mark.asyncio
+@pytest.mark.parametrize("collection,query,sort", [
+    ("users", {"email": "a@example.com"}, None),
+    ("watchlist", {"user_email": "a@example.com", "ticker": "AAPL"}, None),
+    ("watchlist", {"user_email": "a@example.com"}, None),
+    ("transactions", {"user_email": "a@example.com"}, [("executed_at", -1), ("_id", -1)]),
+    ("alerts", {"user_email": "a@example.com", "triggered": False}, None),
+])
+async def test_queries_use_an_index(live_db, collection, query, sort):
+    cursor = live_db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    stages = winning_stages(await cursor.explain())
+    assert "IXSCAN" in stages and "COLLSCAN" not in stages and "SORT" not in stages
+
+
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+@pytest.mark.asyncio
+async def test_watchlist_upsert_is_idempotent(live_db):
+    assert await mongo_crud.add_to_watchlist("AAPL", "a@example.com") is True
+    assert await mongo_crud.add_to_watchlist("AAPL", "a@example.com") is False
+    assert await live_db.watchlist.count_documents({}) == 1
+
+
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+@pytest.mark.asyncio
+async def test_transaction_pages_cover_every_row_once(live_db):
+    t0 = datetime(2024, 1, 1)
+    # repeated timestamps: the _id tie-break must keep pages from overlapping
+    await live_db.transactions.insert_many([
+        {"user_email": "a@example.com", "ticker": "AAPL", "action": "Buy", "quantity": 1, "price": 10.0,
+         "executed_at": t0 + timedelta(minutes=i // 3)}
+        for i in range(25)
+    ] + [{"user_email": "a@example.com", "ticker": "AAPL", "action": "Buy", "quantity": 1, "price": 10.0}
+         for _ in range(3)])   # legacy rows without executed_at
+    seen, before = [], None
+    while True:
+        page = await mongo_crud.get_user_transactions("a@example.com", limit=4, before=before)
+        if not page:
+            break
+        seen.extend(tx["_id"] for tx in page)
+        before = mongo_crud.decode_cursor(mongo_crud.encode_cursor(page[-1]))
+    assert len(seen) == len(set(seen)) == 28
+
+    [summary] = await mongo_crud.summarize_user_transactions("a@example.com")
+    assert summary["ticker"] == "AAPL" and summary["trades"] == summary["buys"] == 28
+    assert summary["notional"] == 280.0
+
+
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+@pytest.mark.asyncio
+async def test_watchlist_batch_round_trip(live_db):
+    await mongo_crud.add_to_watchlist("AAPL", "a@example.com")
+    await mongo_crud.add_to_watchlist("NVDA", "a@example.com")
+    results = await mongo_crud.apply_watchlist_changes("a@example.com", add=["AAPL", "MSFT"], remove=["NVDA", "TSLA"])
+    assert [r["status"] for r in results] == ["exists", "added", "removed", "not_found"]
+    assert sorted(w["ticker"] for w in await mongo_crud.get_watchlist("a@example.com")) == ["AAPL", "MSFT"]
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from src import news_sentiment
+from src.news_sentiment import aggregate_sentiment, article_key, fetch_news_many, score_articles
+
+
+def article(i, title="Apple beats estimates", published="2024-01-02T00:00:00Z"):
+    return {"id": f"a{i}", "title": title, "description": "", "article_url": f"https://news.example/{i}",
+            "published_utc": published, "publisher": {"name": "Wire"}}
+
+
+@pytest.fixture(autouse=True)
+def empty_score_cache():
+    news_sentiment._score_cache.clear()
+    yield
+    news_sentiment._score_cache.clear()
+
+
+def test_article_key_prefers_id_then_url():
+    assert article_key({"id": "x1", "article_url": "https://a"}) == "id:x1"
+    assert article_key({"article_url": "https://a"}) == article_key({"article_url": "https://a", "title": "t"})
+    assert article_key({"article_url": "https://a"}) != article_key({"article_url": "https://b"})
+
+
+@pytest.mark.asyncio
+async def test_only_unseen_articles_are_scored():
+    with patch("src.news_sentiment.score_texts", wraps=news_sentiment.score_texts) as scorer:
+        first = await score_articles([article(1), article(2, "Shares plunge after fraud lawsuit")])
+        second = await score_articles([article(2, "Shares plunge after fraud lawsuit"), article(3), article(1)])
+    assert first[0] > 0.05 and first[1] < -0.05
+    assert second == [first[1], first[0], first[0]]
+    assert [len(call.args[0]) for call in scorer.call_args_list] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_scores_shared_articles_once():
+    shared = article(1)
+    payloads = {"AAPL": [shared, article(2)], "MSFT": [shared]}
+
+    async def get_json(path, params):
+        return {"results": payloads[params["ticker"]]}
+
+    with patch("src.polygon_client.get_json", side_effect=get_json), \
+         patch("src.news_sentiment.score_texts", wraps=news_sentiment.score_texts) as scorer:
+        news, errors = await fetch_news_many(["AAPL", "MSFT"])
+    assert errors == {}
+    assert list(news) == ["AAPL", "MSFT"]
+    assert [a["url"] for a in news["AAPL"]] == ["https://news.example/1", "https://news.example/2"]
+    assert news["MSFT"][0] == news["AAPL"][0]
+    assert scorer.call_count == 1 and len(scorer.call_args.args[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_reported_not_empty():
+    async def get_json(path, params):
+        if params["ticker"] == "MSFT":
+            raise ConnectionError("down")
+        return {"results": [article(1)]}
+
+    with patch("src.polygon_client.get_json", side_effect=get_json):
+        news, errors = await fetch_news_many(["AAPL", "MSFT"])
+        assert list(news) == ["AAPL"] and isinstance(errors["MSFT"], ConnectionError)
+        with pytest.raises(ConnectionError):
+            await news_sentiment.fetch_news("MSFT")
+
+
+def test_aggregate_weights_recent_articles_more():
+    now = 1_704_153_600.0   # 2024-01-02T00:00:00Z
+    articles = [
+        {"compound": 0.8, "published_utc": "2024-01-02T00:00:00Z"},
+        {"compound": -0.4, "published_utc": "2024-01-01T00:00:00Z"},   # one half-life old
+    ]
+    agg = aggregate_sentiment(articles, half_life_hours=24, now=now)
+    assert agg["count"] == 2 and agg["mean"] == 0.2
+    assert agg["weighted"] == pytest.approx((0.8 - 0.5 * 0.4) / 1.5, abs=1e-3)
+    assert agg["sentiment"] == "Bullish"
+
+
+def test_aggregate_of_nothing_is_neutral():
+    assert aggregate_sentiment([]) == {"count": 0, "mean": None, "weighted": None, "sentiment": "Neutral"}
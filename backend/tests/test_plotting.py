@@ -0,0 +1,58 @@
+import base64
+import numpy as np
+import pytest
+from src import plotting
+from src.plotting import downsample_indices, render_png, render_png_cached, series_payload
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def test_short_series_is_not_downsampled():
+    assert downsample_indices(np.arange(50.0), 600).tolist() == list(range(50))
+
+
+def test_downsample_respects_point_budget_and_keeps_endpoints():
+    values = np.random.default_rng(0).normal(size=10_000)
+    idx = downsample_indices(values, 600)
+    assert len(idx) <= 600
+    assert idx[0] == 0 and idx[-1] == len(values) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_downsample_keeps_spikes():
+    values = np.zeros(10_000)
+    values[1234], values[8765] = 50.0, -50.0
+    idx = downsample_indices(values, 100)
+    assert 1234 in idx and 8765 in idx
+
+
+def test_series_payload_uses_same_positions_for_both_series():
+    y = np.arange(2000.0).reshape(-1, 1)
+    payload = series_payload(y, y + 1, points=200)
+    assert payload["length"] == 2000
+    assert len(payload["index"]) == len(payload["actual"]) == len(payload["predicted"]) <= 200
+    assert payload["actual"] == [float(i) for i in payload["index"]]
+    assert payload["predicted"] == [float(i) + 1 for i in payload["index"]]
+
+
+def test_render_png_returns_base64_png():
+    y = np.linspace(100, 110, 300).reshape(-1, 1)
+    assert base64.b64decode(render_png("AAPL", y, y * 1.01)).startswith(PNG_MAGIC)
+
+
+@pytest.mark.asyncio
+async def test_render_png_cached_renders_once_per_version():
+    plotting._png_cache.clear()
+    y = np.linspace(100, 110, 300).reshape(-1, 1)
+    try:
+        first = await render_png_cached("AAPL", ("v1",), y, y)
+        hits = plotting._png_cache.hits
+        second = await render_png_cached("AAPL", ("v1",), y, y)
+        assert second == first and plotting._png_cache.hits == hits + 1
+        assert base64.b64decode(first).startswith(PNG_MAGIC)
+
+        await render_png_cached("AAPL", ("v2",), y, y * 2)
+        assert len(plotting._png_cache) == 2
+    finally:
+        plotting.shutdown_pool()
+        plotting._png_cache.clear()
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import httpx
+import pytest
+from src.polygon_client import PolygonClient
+
+
+class StubPolygon:
+    """
+    Local HTTP server standing in for api.polygon.io.
+
+    `routes` maps a path to a list of (status, body) responses served in turn;
+    the last one repeats. Every request is counted and its query recorded.
+    """
+
+    def __init__(self):
+        self.routes: dict[str, list[tuple[int, dict]]] = {}
+        self.hits = Counter()
+        self.queries = []
+        self.delay = 0.0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                with stub._lock:
+                    stub.hits[parts.path] += 1
+                    stub.queries.append(parse_qs(parts.query))
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                    responses = stub.routes.get(parts.path, [(404, {"status": "NOT_FOUND"})])
+                    status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.active -= 1
+
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubPolygon()
+    yield server
+    server.close()
+
+
+def make_client(stub, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return PolygonClient(base_url=stub.url, api_key="test-key", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_get_json_returns_body_and_sends_api_key(stub):
+    stub.routes["/v2/aggs/ticker/AAPL/prev"] = [(200, {"results": [{"c": 190.5}]})]
+    client = make_client(stub)
+    try:
+        data = await client.get_json("/v2/aggs/ticker/AAPL/prev", params={"adjusted": "true"})
+    finally:
+        await client.aclose()
+    assert data["results"][0]["c"] == 190.5
+    assert stub.queries[0]["apiKey"] == ["test-key"]
+    assert stub.queries[0]["adjusted"] == ["true"]
+
+
+@pytest.mark.asyncio
+async def test_retries_on_429_and_5xx(stub):
+    stub.routes["/flaky"] = [(429, {}), (503, {}), (200, {"ok": True})]
+    client = make_client(stub)
+    try:
+        assert await client.get_json("/flaky") == {"ok": True}
+    finally:
+        await client.aclose()
+    assert stub.hits["/flaky"] == 3
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries(stub):
+    stub.routes["/down"] = [(500, {})]
+    client = make_client(stub, max_retries=2)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_json("/down")
+    finally:
+        await client.aclose()
+    assert stub.hits["/down"] == 3
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(stub):
+    stub.routes["/forbidden"] = [(403, {})]
+    client = make_client(stub)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_json("/forbidden")
+    finally:
+        await client.aclose()
+    assert stub.hits["/forbidden"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_call(stub):
+    stub.routes["/news"] = [(200, {"results": []})]
+    stub.delay = 0.1
+    client = make_client(stub)
+    try:
+        results = await asyncio.gather(*(client.get_json("/news", {"ticker": "AAPL"}) for _ in range(10)))
+        different = await client.get_json("/news", {"ticker": "MSFT"})
+    finally:
+        await client.aclose()
+    assert all(r == {"results": []} for r in results + [different])
+    assert stub.hits["/news"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_host(stub):
+    for i in range(12):
+        stub.routes[f"/t/{i}"] = [(200, {"i": i})]
+    stub.delay = 0.05
+    client = make_client(stub, max_concurrency=3)
+    try:
+        await asyncio.gather(*(client.get_json(f"/t/{i}") for i in range(12)))
+    finally:
+        await client.aclose()
+    assert stub.max_active <= 3
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(stub):
+    stub.routes["/a"] = [(200, {})]
+    client = make_client(stub)
+    try:
+        for i in range(5):
+            await client.get_json("/a", {"i": i})
+        connections = client._client._transport._pool.connections
+    finally:
+        await client.aclose()
+    assert len(connections) == 1
+
+
+# ── Route call sites go through the shared client ─────────────────────────────
+
+@pytest.fixture
+def app_client(stub, monkeypatch):
+    from unittest.mock import MagicMock, patch
+    from fastapi.testclient import TestClient
+    from src import polygon_client
+    from main import app
+
+    monkeypatch.setattr(polygon_client, "POLYGON_BASE_URL", stub.url)
+    monkeypatch.setattr(polygon_client, "_clients", polygon_client.weakref.WeakKeyDictionary())
+    with patch("main._load_model", return_value=MagicMock()), TestClient(app) as client:
+        yield client
+
+
+def test_price_endpoint_uses_snapshot(stub, app_client):
+    stub.routes["/v2/snapshot/locale/us/markets/stocks/tickers/AAPL"] = [(200, {"ticker": {
+        "day": {"c": 101.0, "v": 5000}, "prevDay": {"c": 100.0}, "lastTrade": {"p": 101.0},
+    }})]
+    res = app_client.get("/price/AAPL")
+    assert res.status_code == 200
+    assert res.json() == {"ticker": "AAPL", "price": 101.0, "change": 1.0, "change_pct": 1.0, "volume": 5000}
+
+
+def test_price_endpoint_falls_back_to_prev_close(stub, app_client):
+    stub.routes["/v2/snapshot/locale/us/markets/stocks/tickers/MSFT"] = [(403, {})]
+    stub.routes["/v2/aggs/ticker/MSFT/prev"] = [(200, {"results": [{"c": 410.25, "v": 1234}]})]
+    res = app_client.get("/price/MSFT")
+    assert res.status_code == 200
+    assert res.json()["price"] == 410.25
+    assert stub.hits["/v2/aggs/ticker/MSFT/prev"] == 1
+
+
+def test_price_fallback_reads_market_snapshot(stub, app_client):
+    from src.market_snapshot import MarketSnapshot
+    app_client.app.state.market.snapshot = MarketSnapshot("2024-01-02", [{"T": "IBM", "o": 180.0, "c": 182.5, "v": 777}])
+    stub.routes["/v2/snapshot/locale/us/markets/stocks/tickers/IBM"] = [(403, {})]
+    res = app_client.get("/price/IBM")
+    assert res.status_code == 200
+    assert res.json()["price"] == 182.5 and res.json()["volume"] == 777
+    assert stub.hits["/v2/aggs/ticker/IBM/prev"] == 0
+
+
+def test_empty_snapshot_falls_back_to_market_snapshot(stub, app_client):
+    from src.market_snapshot import MarketSnapshot
+    app_client.app.state.market.snapshot = MarketSnapshot("2024-01-02", [{"T": "IBM", "o": 180.0, "c": 182.5, "v": 777}])
+    stub.routes["/v2/snapshot/locale/us/markets/stocks/tickers/IBM"] = [(200, {"ticker": {
+        "day": {}, "prevDay": {}, "lastTrade": {},
+    }})]
+    res = app_client.get("/price/IBM")
+    assert res.status_code == 200
+    assert res.json()["price"] == 182.5 and res.json()["volume"] == 777
+    assert stub.hits["/v2/aggs/ticker/IBM/prev"] == 0
@@ -0,0 +1,190 @@
+import pytest
+import numpy as np
+from src import predictor
+from src.predictor import predict_incremental, get_state, reset_state
+
+TIME_STEP = 10
+
+
+class FakePredict:
+    """Async stand-in for InferenceBatcher.predict: window mean, counting rows."""
+
+    def __init__(self):
+        self.rows = []
+
+    async def __call__(self, X):
+        self.rows.append(len(X))
+        return np.asarray(X).mean(axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    reset_state()
+    yield
+    reset_state()
+
+
+def make_history(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 0.3, n))
+    timestamps = np.arange(n) * 300_000
+    return closes, timestamps
+
+
+async def run(closes, timestamps, predict, **kwargs):
+    return await predict_incremental("AAPL", closes, timestamps, predict, time_step=TIME_STEP, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_first_call_predicts_every_window():
+    closes, ts = make_history()
+    predict = FakePredict()
+    y_real, preds = await run(closes, ts, predict)
+    assert predict.rows == [len(closes) - TIME_STEP]
+    assert y_real.shape == preds.shape == (len(closes) - TIME_STEP, 1)
+    np.testing.assert_allclose(y_real.ravel(), closes[TIME_STEP:])
+
+
+@pytest.mark.asyncio
+async def test_new_bars_only_predict_new_windows():
+    closes, ts = make_history(205)
+    # Keep the extra bars inside the first call's price range
+    closes[200:] = np.clip(closes[200:], closes[:200].min(), closes[:200].max())
+    predict = FakePredict()
+    await run(closes[:200], ts[:200], predict)
+    y_inc, p_inc = await run(closes, ts, predict)
+
+    # 5 new bars plus the re-evaluated last known bar
+    assert predict.rows[-1] == 6
+
+    reset_state()
+    y_full, p_full = await run(closes, ts, FakePredict())
+    np.testing.assert_allclose(y_inc, y_full)
+    np.testing.assert_allclose(p_inc, p_full)
+
+
+@pytest.mark.asyncio
+async def test_no_new_bars_reevaluates_only_last_bar():
+    closes, ts = make_history()
+    predict = FakePredict()
+    await run(closes, ts, predict)
+    await run(closes, ts, predict)
+    assert predict.rows[-1] == 1
+
+
+@pytest.mark.asyncio
+async def test_revised_last_bar_is_picked_up():
+    closes, ts = make_history()
+    predict = FakePredict()
+    await run(closes, ts, predict)
+
+    revised = closes.copy()
+    revised[-1] = (closes.min() + closes.max()) / 2
+    y_real, _ = await run(revised, ts, predict)
+    assert y_real[-1][0] == pytest.approx(revised[-1])
+    assert len(y_real) == len(closes) - TIME_STEP
+
+
+@pytest.mark.asyncio
+async def test_new_high_forces_full_recompute():
+    closes, ts = make_history(201)
+    closes[-1] = closes[:200].max() + 5
+    predict = FakePredict()
+    await run(closes[:200], ts[:200], predict)
+    await run(closes, ts, predict)
+    assert predict.rows[-1] == len(closes) - TIME_STEP
+    assert get_state("AAPL").data_max == pytest.approx(closes[-1])
+
+
+@pytest.mark.asyncio
+async def test_revised_high_matches_cold_recompute():
+    closes, ts = make_history()
+    closes[-1] = closes.max() + 5            # in-progress bar sets the high...
+    predict = FakePredict()
+    await run(closes, ts, predict)
+
+    revised = closes.copy()
+    revised[-1] = np.median(closes)          # ...then is revised inward
+    y_inc, p_inc = await run(revised, ts, predict)
+    assert predict.rows[-1] == len(closes) - TIME_STEP
+    assert get_state("AAPL").data_max == pytest.approx(revised.max())
+
+    reset_state()
+    y_full, p_full = await run(revised, ts, FakePredict())
+    np.testing.assert_allclose(y_inc, y_full)
+    np.testing.assert_allclose(p_inc, p_full)
+
+
+@pytest.mark.asyncio
+async def test_states_are_bounded_and_reported():
+    from src.cache import all_stats
+    closes, ts = make_history()
+    await run(closes, ts, FakePredict())
+    stats = all_stats()["predictor"]
+    assert stats["entries"] == 1
+    assert stats["bytes"] >= get_state("AAPL").y_real.nbytes * 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_forces_full_recompute():
+    closes, ts = make_history()
+    predict = FakePredict()
+    await run(closes, ts, predict)
+    await run(closes, ts, predict, refresh=True)
+    assert predict.rows[-1] == len(closes) - TIME_STEP
+
+
+@pytest.mark.asyncio
+async def test_history_window_sliding_forward_keeps_length():
+    closes, ts = make_history(210)
+    closes[200:] = np.clip(closes[200:], closes[5:200].min(), closes[5:200].max())
+    predict = FakePredict()
+    await run(closes[:200], ts[:200], predict)
+    y_real, preds = await run(closes[10:], ts[10:], predict)   # oldest 10 bars dropped
+    assert len(y_real) == len(preds) == 200 - TIME_STEP
+
+
+@pytest.mark.asyncio
+async def test_state_version_changes_with_new_bars():
+    closes, ts = make_history(201)
+    closes[-1] = closes[:200].mean()
+    await run(closes[:200], ts[:200], FakePredict())
+    before = get_state("AAPL").version
+    await run(closes, ts, FakePredict())
+    assert get_state("AAPL").version != before
+
+
+@pytest.mark.asyncio
+async def test_too_short_history_raises():
+    closes, ts = make_history(TIME_STEP)
+    with pytest.raises(ValueError):
+        await run(closes, ts, FakePredict())
+
+
+# ── predict_latest ─────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_predict_latest_matches_full_recompute_last_value():
+    histories = {f"T{i}": make_history(120 + i, seed=i)[0] for i in range(5)}
+    predict = FakePredict()
+    latest = await predictor.predict_latest(histories, predict, time_step=TIME_STEP)
+    assert predict.rows == [5]
+
+    for ticker, closes in histories.items():
+        y_real, preds = await predict_incremental(ticker, closes, np.arange(len(closes)), FakePredict(),
+                                                  time_step=TIME_STEP)
+        actual, predicted = latest[ticker]
+        assert actual == pytest.approx(y_real[-1][0])
+        assert predicted == pytest.approx(preds[-1][0])
+
+
+@pytest.mark.asyncio
+async def test_predict_latest_handles_flat_series():
+    latest = await predictor.predict_latest({"FLAT": np.full(30, 50.0)}, FakePredict(), time_step=TIME_STEP)
+    assert latest["FLAT"] == (50.0, pytest.approx(50.0))
+
+
+@pytest.mark.asyncio
+async def test_predict_latest_rejects_short_history():
+    with pytest.raises(ValueError):
+        await predictor.predict_latest({"AAPL": np.ones(TIME_STEP)}, FakePredict(), time_step=TIME_STEP)
@@ -1,63 +1,6 @@
 import pytest
 import numpy as np
-import pandas as pd
-from src.preprocessing import scale_data, create_sequences
-
-
-# ── scale_data ────────────────────────────────────────────────────────────────
-
-def make_df(col="Close"):
-    return pd.DataFrame({col: [10.0, 20.0, 30.0, 40.0, 50.0]})
-
-
-def test_scale_data_output_range():
-    scaler, df_scaled = scale_data(make_df(), column_name="Close")
-    values = df_scaled["Close"].values
-    assert values.min() >= 0.0
-    assert values.max() <= 1.0
-
-
-def test_scale_data_min_is_zero():
-    _, df_scaled = scale_data(make_df(), column_name="Close")
-    assert df_scaled["Close"].min() == pytest.approx(0.0)
-
-
-def test_scale_data_max_is_one():
-    _, df_scaled = scale_data(make_df(), column_name="Close")
-    assert df_scaled["Close"].max() == pytest.approx(1.0)
-
-
-def test_scale_data_preserves_index():
-    df = make_df()
-    df.index = pd.date_range("2024-01-01", periods=5)
-    _, df_scaled = scale_data(df, column_name="Close")
-    assert list(df_scaled.index) == list(df.index)
-
-
-def test_scale_data_fallback_to_close_prefix():
-    df = pd.DataFrame({"close_aapl": [10.0, 20.0, 30.0]})
-    scaler, df_scaled = scale_data(df, column_name="Close")
-    assert df_scaled["close_aapl"].max() == pytest.approx(1.0)
-
-
-def test_scale_data_raises_on_missing_column():
-    df = pd.DataFrame({"volume": [100, 200, 300]})
-    with pytest.raises(KeyError):
-        scale_data(df, column_name="Close")
-
-
-def test_scale_data_returns_scaler():
-    from sklearn.preprocessing import MinMaxScaler
-    scaler, _ = scale_data(make_df(), column_name="Close")
-    assert isinstance(scaler, MinMaxScaler)
-
-
-def test_scale_data_scaler_can_inverse_transform():
-    scaler, df_scaled = scale_data(make_df(), column_name="Close")
-    scaled_vals = df_scaled["Close"].values.reshape(-1, 1)
-    recovered = scaler.inverse_transform(scaled_vals).flatten()
-    expected = make_df()["Close"].values
-    np.testing.assert_allclose(recovered, expected, rtol=1e-5)
+from src.preprocessing import create_sequences, iter_sequences
 
 
 # ── create_sequences ──────────────────────────────────────────────────────────
@@ -99,3 +42,33 @@ def test_create_sequences_empty_when_too_short():
     X, y = create_sequences(data, time_step=10)
     assert len(X) == 0
     assert len(y) == 0
+
+
+def test_create_sequences_matches_list_based_windows():
+    data = np.random.default_rng(0).random(500)
+    X, y = create_sequences(data, time_step=50)
+    expected_X = np.array([data[i - 50:i] for i in range(50, len(data))])
+    expected_y = np.array([data[i] for i in range(50, len(data))])
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_create_sequences_returns_read_only_views():
+    data = make_series(100)
+    X, y = create_sequences(data, time_step=10)
+    assert np.shares_memory(X, data)
+    assert not X.flags.writeable
+    assert not y.flags.writeable
+
+
+def test_iter_sequences_chunks_cover_all_windows():
+    data = make_series(1000)
+    X, y = create_sequences(data, time_step=50)
+    chunks = list(iter_sequences(data, time_step=50, batch_size=128))
+    assert all(len(cx) <= 128 for cx, _ in chunks)
+    np.testing.assert_array_equal(np.concatenate([cx for cx, _ in chunks]), X)
+    np.testing.assert_array_equal(np.concatenate([cy for _, cy in chunks]), y)
+
+
+def test_iter_sequences_empty_when_too_short():
+    assert list(iter_sequences(make_series(5), time_step=10)) == []
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+import pytest_asyncio
+from src.price_hub import PriceHub, Subscription
+
+INTERVAL = 0.02
+
+
+class FakeFeed:
+    """Async stand-in for get_quote: serves `prices`, counting calls per ticker."""
+
+    def __init__(self, prices=None):
+        self.prices = dict(prices or {})
+        self.calls = Counter()
+
+    async def __call__(self, ticker, prev_day=None):
+        self.calls[ticker] += 1
+        price = self.prices.get(ticker, 100.0)
+        return {"ticker": ticker, "price": price, "change": 0.0, "change_pct": 0.0, "volume": 0, "ts": time.time()}
+
+
+def drain(sub: Subscription) -> list[dict]:
+    messages = []
+    while not sub.queue.empty():
+        messages.append(json.loads(sub.queue.get_nowait()))
+    return messages
+
+
+@pytest_asyncio.fixture
+async def hub_and_feed():
+    feed = FakeFeed()
+    hub = PriceHub(feed, interval=INTERVAL)
+    yield hub, feed
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_one_upstream_poll_per_ticker_regardless_of_subscribers(hub_and_feed):
+    hub, feed = hub_and_feed
+    subs = [hub.subscribe() for _ in range(200)]
+    for sub in subs:
+        hub.add_tickers(sub, ["AAPL"])
+    await asyncio.sleep(INTERVAL * 5.5)
+
+    assert hub.stats()["tickers_polled"] == 1
+    assert 4 <= feed.calls["AAPL"] <= 7
+    assert all(drain(sub)[0]["ticker"] == "AAPL" for sub in subs)
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_latest_quote_immediately(hub_and_feed):
+    hub, feed = hub_and_feed
+    hub.add_tickers(hub.subscribe(), ["AAPL"])
+    await asyncio.sleep(INTERVAL / 2)
+
+    late = hub.subscribe()
+    hub.add_tickers(late, ["AAPL"])
+    assert drain(late)[0]["price"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_poller_stops_after_last_unsubscribe(hub_and_feed):
+    hub, feed = hub_and_feed
+    sub = hub.subscribe()
+    hub.add_tickers(sub, ["AAPL", "MSFT"])
+    await asyncio.sleep(INTERVAL / 2)
+    hub.unsubscribe(sub)
+    await asyncio.sleep(INTERVAL * 2)
+
+    calls = dict(feed.calls)
+    await asyncio.sleep(INTERVAL * 3)
+    assert dict(feed.calls) == calls
+    assert hub.stats()["tickers_polled"] == 0 and hub.latest("AAPL") is None
+
+
+@pytest.mark.asyncio
+async def test_alerts_fire_server_side_and_reach_only_their_owner():
+    feed = FakeFeed({"AAPL": 150.0})
+    batches = []
+
+    async def on_alerts(alerts):
+        batches.append([a["_id"] for a in alerts])
+
+    hub = PriceHub(feed, interval=INTERVAL, on_alerts=on_alerts)
+    owner, other = hub.subscribe("a@example.com"), hub.subscribe("b@example.com")
+    hub.add_alert({"_id": "1", "ticker": "AAPL", "target_price": 140.0, "condition": "above", "user_email": "a@example.com"})
+    hub.add_alert({"_id": "2", "ticker": "AAPL", "target_price": 140.0, "condition": "below", "user_email": "a@example.com"})
+    try:
+        await asyncio.sleep(INTERVAL / 2)    # the alert alone keeps AAPL polled
+    finally:
+        await hub.stop()
+
+    assert batches == [["1"]]
+    assert drain(owner) == [{"type": "alert", "alert_id": "1", "ticker": "AAPL", "condition": "above",
+                             "target_price": 140.0, "price": 150.0}]
+    assert drain(other) == []
+    assert hub.stats()["alerts_active"] == 1 and hub.stats()["alerts_triggered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fired_alerts_are_recorded_in_one_batch():
+    feed = FakeFeed({"AAPL": 150.0, "MSFT": 50.0})
+    batches = []
+
+    async def on_alerts(alerts):
+        batches.append(sorted(a["_id"] for a in alerts))
+
+    hub = PriceHub(feed, interval=10, on_alerts=on_alerts, flush_interval=INTERVAL)
+    for i, ticker in enumerate(["AAPL", "AAPL", "MSFT"]):
+        hub.add_alert({"_id": str(i), "ticker": ticker, "target_price": 100.0,
+                       "condition": "above" if ticker == "AAPL" else "below", "user_email": "a@example.com"})
+    try:
+        await asyncio.sleep(INTERVAL * 3)
+    finally:
+        await hub.stop()
+    assert batches == [["0", "1", "2"]]
+
+
+@pytest.mark.asyncio
+async def test_start_loads_stored_alerts():
+    hub = PriceHub(FakeFeed(), interval=INTERVAL, load_alerts=AsyncMock(return_value=[
+        {"_id": "1", "ticker": "MSFT", "target_price": 500.0, "condition": "above", "user_email": "a@example.com"},
+    ]))
+    try:
+        await hub.start()
+        await asyncio.sleep(0)
+        assert hub.stats()["alerts_active"] == 1 and hub.stats()["tickers_polled"] == 1
+    finally:
+        await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_new_tickers_are_refused_past_max_tickers():
+    hub = PriceHub(FakeFeed(), interval=INTERVAL, max_tickers=2)
+    try:
+        first, second = hub.subscribe(), hub.subscribe()
+        assert hub.add_tickers(first, ["AAPL", "MSFT", "NVDA"]) == ["NVDA"]
+        assert hub.add_tickers(second, ["MSFT", "NVDA"]) == ["NVDA"]   # already-polled tickers still join
+        stats = hub.stats()
+        assert stats["tickers_polled"] == 2 and stats["max_tickers"] == 2 and stats["tickers_rejected"] == 2
+    finally:
+        await hub.stop()
+
+
+def test_connections_are_capped_per_client():
+    hub = PriceHub(FakeFeed(), max_connections_per_client=2)
+    subs = [hub.subscribe(client="1.2.3.4") for _ in range(2)]
+    assert hub.subscribe(client="1.2.3.4") is None
+    assert hub.subscribe(client="5.6.7.8") is not None
+    hub.unsubscribe(subs[0])
+    assert hub.subscribe(client="1.2.3.4") is not None
+    assert hub.stats()["connections_rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_drops_oldest_messages():
+    sub = Subscription(max_queue=2)
+    for i in range(5):
+        sub.push(str(i))
+    assert [sub.queue.get_nowait() for _ in range(2)] == ["3", "4"]
+    assert sub.dropped == 3
+
+
+# ── /ws/prices ─────────────────────────────────────────────────────────────────
+
+def fake_market(*args, **kwargs):
+    """MarketSnapshotService listing only AAPL and MSFT, without calling Polygon."""
+    from src.market_snapshot import MarketSnapshotService
+
+    async def fetch(date):
+        return [{"T": "AAPL", "o": 180.0, "c": 187.5, "v": 1000}, {"T": "MSFT", "o": 400.0, "c": 410.0, "v": 1000}]
+
+    return MarketSnapshotService(fetch)
+
+
+def auth(url: str) -> str:
+    from src.auth import create_access_token
+    return f"{url}?token={create_access_token({'sub': 'test@example.com'})}"
+
+
+@pytest.fixture
+def ws_client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with patch("main._load_model", return_value=MagicMock()), \
+         patch("main.MarketSnapshotService", new=fake_market), \
+         patch("main.get_quote", new=FakeFeed({"AAPL": 187.5})), \
+         patch("main.get_active_alerts", new_callable=AsyncMock, return_value=[]), \
+         patch("main.ensure_indexes", new_callable=AsyncMock), \
+         patch("main.PRICE_POLL_INTERVAL", INTERVAL), \
+         TestClient(app) as client:
+        yield client
+
+
+def test_ws_streams_prices_for_subscribed_tickers(ws_client):
+    with ws_client.websocket_connect("/ws/prices") as ws:
+        ws.send_json({"subscribe": ["aapl"]})
+        message = ws.receive_json()
+    assert message["type"] == "price" and message["ticker"] == "AAPL" and message["price"] == 187.5
+
+
+def test_ws_rejects_invalid_tickers(ws_client):
+    with ws_client.websocket_connect("/ws/prices") as ws:
+        ws.send_json({"subscribe": ["NOT-A-TICKER"]})
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_ws_rejects_invalid_token(ws_client):
+    from starlette.websockets import WebSocketDisconnect
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with ws_client.websocket_connect("/ws/prices?token=garbage") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_ws_anonymous_clients_are_limited_to_snapshot_tickers(ws_client):
+    with ws_client.websocket_connect("/ws/prices") as ws:
+        ws.send_json({"subscribe": ["ZZZQ"]})
+        message = ws.receive_json()
+    assert message["type"] == "error" and "ZZZQ" in message["detail"]
+
+
+def test_ws_signed_in_clients_can_subscribe_to_any_ticker(ws_client):
+    with ws_client.websocket_connect(auth("/ws/prices")) as ws:
+        ws.send_json({"subscribe": ["ZZZQ"]})
+        message = ws.receive_json()
+    assert message["type"] == "price" and message["ticker"] == "ZZZQ"
+
+
+def test_ws_caps_connections_per_address():
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    from main import app
+
+    with patch("main._load_model", return_value=MagicMock()), \
+         patch("main.MarketSnapshotService", new=fake_market), \
+         patch("main.get_active_alerts", new_callable=AsyncMock, return_value=[]), \
+         patch("main.ensure_indexes", new_callable=AsyncMock), \
+         patch("main.WS_MAX_CONNECTIONS_PER_IP", 1), \
+         TestClient(app) as client:
+        with client.websocket_connect("/ws/prices"):
+            with pytest.raises(WebSocketDisconnect) as exc:
+                with client.websocket_connect("/ws/prices") as second:
+                    second.receive_json()
+            assert exc.value.code == 1013
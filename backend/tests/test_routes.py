@@ -25,6 +25,12 @@ def client():
         yield TestClient(app)
 
 
+@pytest.fixture
+def admin(monkeypatch):
+    """Put the make_test_token() user on the ADMIN_EMAILS allow-list."""
+    monkeypatch.setattr("main.ADMIN_EMAILS", {"test@example.com"})
+
+
 # ── Public routes ──────────────────────────────────────────────────────────────
 
 def test_health_check(client):
@@ -91,6 +97,89 @@ def test_transactions_with_valid_token(client):
     assert "data" in res.json()
 
 
+def test_transactions_next_page_cursor(client):
+    import main
+    token = make_test_token()
+    rows = [{"_id": f"{i:024x}", "executed_at": f"2024-01-01T00:00:0{i}.000", "ticker": "AAPL"} for i in range(3)]
+    main.get_user_transactions.return_value = rows
+    res = client.get("/transactions?limit=2", headers={"Authorization": f"Bearer {token}"})
+    body = res.json()
+    assert len(body["data"]) == 2
+    assert main.get_user_transactions.call_args[1]["limit"] == 3
+    assert main.decode_cursor(body["next_before"])[1] == main.ObjectId(rows[1]["_id"])
+
+    main.get_user_transactions.return_value = rows[:2]
+    res = client.get("/transactions?limit=2", headers={"Authorization": f"Bearer {token}"})
+    assert res.json()["next_before"] is None
+
+
+def test_transactions_rejects_bad_cursor(client):
+    token = make_test_token()
+    res = client.get("/transactions?before=garbage", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 400
+
+
+def test_transactions_summary(client):
+    token = make_test_token()
+    totals = [{"ticker": "AAPL", "trades": 2, "notional": 300.0}]
+    with patch("main.summarize_user_transactions", new_callable=AsyncMock, return_value=totals) as summarize:
+        res = client.get("/transactions?summary=true&start=2024-01-01T00:00:00",
+                         headers={"Authorization": f"Bearer {token}"})
+    assert res.json()["data"] == totals
+    assert summarize.call_args[1]["start"].year == 2024
+
+
+def test_portfolio_uses_cached_broker(client):
+    from src.broker import AsyncBroker, FakeBroker
+    fake = FakeBroker(prices={"AAPL": 110.0})
+    fake.submit_order("AAPL", 3, "buy")
+    token = make_test_token()
+    with patch("main.get_broker", return_value=AsyncBroker(fake)):
+        for _ in range(3):
+            res = client.get("/portfolio", headers={"Authorization": f"Bearer {token}"})
+            assert res.status_code == 200
+    assert res.json()["summary"]["total_value"] == 330.0
+    assert fake.calls["list_positions"] == 1
+
+
+def test_execute_trade_goes_through_broker(client):
+    from src.broker import AsyncBroker, FakeBroker
+    fake = FakeBroker()
+    token = make_test_token()
+    with patch("main.get_broker", return_value=AsyncBroker(fake)):
+        res = client.post("/execute-trade?signal=Buy&ticker=msft", headers={"Authorization": f"Bearer {token}"})
+    assert res.json()["trade_result"]["status"] == "success"
+    assert fake.orders[0].symbol == "MSFT"
+
+
+def test_execute_trades_submits_tracks_and_records_once(client):
+    from src.broker import AsyncBroker, FakeBroker
+    fake = FakeBroker(prices={"AAPL": 150.0}, reject={"TSLA"})
+    token = make_test_token()
+    body = {"orders": [{"ticker": "aapl", "side": "Buy", "qty": 2}, {"ticker": "TSLA", "side": "Sell"}]}
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "rebalance-1"}
+    with patch("main.get_broker", return_value=AsyncBroker(fake)), \
+         patch("main.record_transactions", new_callable=AsyncMock, return_value=1) as record:
+        res = client.post("/execute-trades", json=body, headers=headers)
+        bad = client.post("/execute-trades", json={"orders": [{"ticker": "AAPL", "side": "Hold"}]}, headers=headers)
+    assert res.status_code == 200 and bad.status_code == 400
+    aapl, tsla = res.json()["results"]
+    assert aapl["order_status"] == "filled" and aapl["filled_avg_price"] == 150.0
+    assert aapl["client_order_id"].endswith("-rebalance-1-0")
+    assert tsla["status"] == "error"
+    [transactions] = record.await_args.args
+    assert [(t.ticker, t.status, t.price) for t in transactions] == [("AAPL", "filled", 150.0)]
+
+
+def test_logout_revokes_token(client):
+    from src.auth import create_access_token
+    token = create_access_token({"sub": "logout@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/transactions", headers=headers).status_code == 200
+    assert client.post("/logout", headers=headers).status_code == 200
+    assert client.get("/transactions", headers=headers).status_code == 401
+
+
 # ── Input validation still applies even without auth ─────────────────────────
 
 def test_execute_trade_invalid_ticker(client):
@@ -105,3 +194,333 @@ def test_execute_trade_missing_params(client):
     # requests get 401 even when params are missing.
     res = client.post("/execute-trade")
     assert res.status_code in (401, 422)
+
+
+# ── Admin ──────────────────────────────────────────────────────────────────────
+
+def test_inference_stats_requires_auth(client):
+    res = client.get("/admin/inference-stats")
+    assert res.status_code == 401
+
+
+def test_admin_routes_reject_non_admin(client):
+    token = make_test_token()
+    for path in ("/admin/inference-stats", "/admin/price-hub-stats", "/admin/market-stats", "/admin/cache-stats"):
+        res = client.get(path, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code == 403, path
+
+
+def test_inference_stats_with_valid_token(client, admin):
+    token = make_test_token()
+    res = client.get("/admin/inference-stats", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.json()["data"]["queue_depth"] == 0
+
+
+def test_cache_stats_requires_auth(client):
+    res = client.get("/admin/cache-stats")
+    assert res.status_code == 401
+
+
+def test_cache_stats_lists_caches(client, admin):
+    token = make_test_token()
+    res = client.get("/admin/cache-stats", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert {"data", "news", "sentiment"} <= set(res.json()["data"])
+
+
+# ── Multi-ticker scan ──────────────────────────────────────────────────────────
+
+def fake_history(ticker, start=None, end=None, interval=None):
+    import numpy as np
+    import pandas as pd
+    if ticker == "NONE":
+        raise ValueError("No data returned from Polygon for NONE.")
+    base = {"AAPL": 100.0, "MSFT": 400.0}.get(ticker, 50.0)
+    index = pd.date_range("2025-03-03 14:30", periods=120, freq="5min", name="t")
+    return pd.DataFrame({"Close": base + np.sin(np.arange(120) / 5)}, index=index)
+
+
+def window_mean(X, verbose=0):
+    return X.mean(axis=1, keepdims=True)
+
+
+def test_predict_batch_returns_signal_per_ticker(client):
+    client.app.state.model.predict.side_effect = window_mean
+    with patch("main.load_data", new_callable=AsyncMock, side_effect=fake_history) as load:
+        res = client.get("/predict/batch?tickers=aapl,MSFT,NONE,AAPL")
+    assert res.status_code == 200
+    body = res.json()
+    assert [row["ticker"] for row in body["data"]] == ["AAPL", "MSFT"]
+    assert all(row["signal"] in ("Buy", "Sell", "Hold") for row in body["data"])
+    assert set(body["errors"]) == {"NONE"}
+    assert load.await_count == 3
+    # both tickers' windows went through the model together
+    assert len(client.app.state.model.predict.call_args.args[0]) == 2
+
+
+def test_predict_batch_invalid_ticker(client):
+    res = client.get("/predict/batch?tickers=AAPL,NOT-A-TICKER")
+    assert res.status_code == 400
+
+
+def test_watchlist_predict_requires_auth(client):
+    res = client.get("/watchlist/predict")
+    assert res.status_code == 401
+
+
+def test_watchlist_predict_uses_users_watchlist(client):
+    client.app.state.model.predict.side_effect = window_mean
+    token = make_test_token()
+    with patch("main.get_watchlist", new_callable=AsyncMock, return_value=[{"ticker": "MSFT"}]) as watchlist, \
+         patch("main.load_data", new_callable=AsyncMock, side_effect=fake_history):
+        res = client.get("/watchlist/predict", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    watchlist.assert_awaited_once_with("test@example.com")
+    assert [row["ticker"] for row in res.json()["data"]] == ["MSFT"]
+
+
+# ── Batch watchlist / alert mutations ──────────────────────────────────────────
+
+def test_watchlist_batch_applies_changes_in_one_call(client):
+    token = make_test_token()
+    results = [{"ticker": "AAPL", "op": "add", "status": "added"}]
+    with patch("main.apply_watchlist_changes", new_callable=AsyncMock, return_value=results) as apply:
+        res = client.post("/watchlist/batch", json={"add": ["aapl", "AAPL", " msft"], "remove": ["TSLA"]},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.json()["results"] == results
+    apply.assert_awaited_once_with("test@example.com", ["AAPL", "MSFT"], ["TSLA"])
+
+
+def test_watchlist_batch_rejects_whole_batch_on_invalid_ticker(client):
+    token = make_test_token()
+    with patch("main.apply_watchlist_changes", new_callable=AsyncMock) as apply:
+        res = client.post("/watchlist/batch", json={"add": ["AAPL", "NOT-A-TICKER"]},
+                          headers={"Authorization": f"Bearer {token}"})
+        conflict = client.post("/watchlist/batch", json={"add": ["AAPL"], "remove": ["AAPL"]},
+                               headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 400 and "NOT-A-TICKER" in res.json()["detail"]
+    assert conflict.status_code == 400
+    apply.assert_not_awaited()
+
+
+def test_alerts_batch_validates_then_writes(client):
+    token = make_test_token()
+    alert_id = "65a1b2c3d4e5f60718293a4b"
+    results = [
+        {"op": "create", "ticker": "AAPL", "status": "created", "alert_id": alert_id},
+        {"op": "delete", "alert_id": alert_id, "status": "not_found"},
+    ]
+    with patch("main.apply_alert_changes", new_callable=AsyncMock, return_value=results) as apply:
+        bad = client.post("/alerts/batch", json={"create": [{"ticker": "AAPL", "target_price": 1, "condition": "near"}]},
+                          headers={"Authorization": f"Bearer {token}"})
+        bad_id = client.post("/alerts/batch", json={"delete": ["nope"]}, headers={"Authorization": f"Bearer {token}"})
+        res = client.post("/alerts/batch", json={
+            "create": [{"ticker": "aapl", "target_price": 200, "condition": "above"}],
+            "delete": [alert_id],
+        }, headers={"Authorization": f"Bearer {token}"})
+    assert bad.status_code == 400 and bad_id.status_code == 400
+    assert res.status_code == 200 and res.json()["results"] == results
+    user, alerts, delete = apply.await_args.args
+    assert user == "test@example.com" and alerts[0].ticker == "AAPL" and delete == [alert_id]
+
+
+# ── /predict chart modes ───────────────────────────────────────────────────────
+
+def test_predict_returns_downsampled_series_by_default(client):
+    client.app.state.model.predict.side_effect = window_mean
+    with patch("main.load_data", new_callable=AsyncMock, side_effect=fake_history):
+        res = client.get("/predict?ticker=MSFT&refresh=true&points=20")
+    assert res.status_code == 200
+    body = res.json()
+    assert "plot_base64" not in body
+    assert body["series"]["length"] == 120 - 50
+    assert len(body["series"]["actual"]) <= 20
+    assert body["series"]["actual"][-1] == body["current_price"]
+
+
+def test_predict_png_mode_returns_image(client):
+    client.app.state.model.predict.side_effect = window_mean
+    with patch("main.load_data", new_callable=AsyncMock, side_effect=fake_history), \
+         patch("main.render_png_cached", new_callable=AsyncMock, return_value="aW1n") as render:
+        res = client.get("/predict?ticker=MSFT&plot=png")
+    assert res.status_code == 200
+    assert res.json()["plot_base64"] == "aW1n" and "series" not in res.json()
+    ticker, version = render.await_args.args[:2]
+    assert ticker == "MSFT" and version is not None
+
+
+def test_predict_var_comes_from_loaded_bars(client):
+    import numpy as np
+    import pandas as pd
+    client.app.state.model.predict.side_effect = window_mean
+    days = pd.bdate_range("2025-03-03", periods=30)
+    index = pd.DatetimeIndex([d + pd.Timedelta(hours=14, minutes=30 + 5 * i) for d in days for i in range(12)], name="t")
+    closes = 100.0 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(index))))
+    history = pd.DataFrame({"Close": closes}, index=index)
+    with patch("main.load_data", new_callable=AsyncMock, return_value=history) as load, \
+         patch("src.polygon_client.get_json", new_callable=AsyncMock) as polygon:
+        res = client.get("/predict?ticker=IBM&plot=none&confidence_level=0.9")
+    daily = pd.Series(closes[11::12]).pct_change().dropna()
+    assert res.json()["VaR_95_percent"] == pytest.approx(daily.quantile(0.1))
+    assert load.await_count == 1 and load.await_args.kwargs["interval"] == "5"
+    polygon.assert_not_called()
+    assert set(res.json()["indicators"]) == {"rsi", "sma", "macd", "macd_signal"}
+
+
+def test_predict_degrades_when_indicators_fail(client):
+    client.app.state.model.predict.side_effect = window_mean
+    with patch("main.load_data", new_callable=AsyncMock, side_effect=fake_history), \
+         patch("main.latest_indicators", side_effect=ValueError("boom")):
+        res = client.get("/predict?ticker=AAPL&plot=none")
+    assert res.status_code == 200 and res.json()["indicators"] is None
+
+
+def test_news_includes_aggregate(client):
+    articles = [{"title": "t", "compound": 0.5, "sentiment": "Bullish", "published_utc": ""}]
+    with patch("main.fetch_news", new_callable=AsyncMock, return_value=articles):
+        res = client.get("/news/AGGX")
+    assert res.status_code == 200
+    assert res.json()["aggregate"] == {"count": 1, "mean": 0.5, "weighted": 0.5, "sentiment": "Bullish"}
+
+
+def test_news_batch_fetches_only_uncached_tickers(client):
+    from main import _news_cache
+    _news_cache.set("CACHX", [])
+    fetched = {"NEWX": [{"title": "t", "compound": -0.3, "sentiment": "Bearish", "published_utc": ""}]}, {}
+    with patch("main.fetch_news_many", new_callable=AsyncMock, return_value=fetched) as fetch:
+        res = client.get("/news?tickers=cachx,NEWX")
+    assert res.status_code == 200
+    fetch.assert_awaited_once_with(["NEWX"], limit=8)
+    news = res.json()["news"]
+    assert news["CACHX"]["cached"] is True and news["CACHX"]["aggregate"]["count"] == 0
+    assert news["NEWX"]["cached"] is False and news["NEWX"]["aggregate"]["sentiment"] == "Bearish"
+
+
+def test_news_failures_are_not_cached(client):
+    from main import _news_cache
+    with patch("main.fetch_news", new_callable=AsyncMock, side_effect=ConnectionError("down")):
+        res = client.get("/news/FAILX")
+    assert res.status_code == 200 and res.json()["articles"] == []
+    with patch("main.fetch_news_many", new_callable=AsyncMock, return_value=({}, {"FAILY": ConnectionError("down")})):
+        res = client.get("/news?tickers=FAILY")
+    assert res.status_code == 200 and res.json()["news"]["FAILY"]["articles"] == []
+    assert "FAILX" not in _news_cache and "FAILY" not in _news_cache
+
+
+@pytest.mark.asyncio
+async def test_news_batch_joins_in_flight_single_ticker_fetch():
+    import asyncio
+    import main
+
+    release = asyncio.Event()
+    articles = [{"title": "t", "compound": 0.1, "sentiment": "Neutral", "published_utc": ""}]
+
+    async def slow_fetch(ticker, limit=8):
+        await release.wait()
+        return articles
+
+    with patch("main.fetch_news", new=AsyncMock(side_effect=slow_fetch)) as single, \
+         patch("main.fetch_news_many", new_callable=AsyncMock) as many:
+        first = asyncio.ensure_future(main.get_news.__wrapped__(MagicMock(), "JOINX"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(main.get_news_batch.__wrapped__(MagicMock(), tickers="JOINX"))
+        await asyncio.sleep(0.01)
+        release.set()
+        single_res, batch_res = await asyncio.gather(first, second)
+    assert single.await_count == 1
+    many.assert_not_awaited()
+    assert batch_res["news"]["JOINX"]["articles"] == single_res["articles"] == articles
+    main._news_cache.pop("JOINX")
+
+
+def test_news_batch_rejects_invalid_ticker(client):
+    assert client.get("/news?tickers=AAPL,BAD!").status_code == 400
+
+
+# ── Market snapshot ────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def market(client):
+    from main import app
+    from src.market_snapshot import MarketSnapshotService
+
+    async def fetch(date):
+        return [
+            {"T": "AAPL", "o": 100.0, "h": 106.0, "l": 99.0, "c": 105.0, "v": 5_000_000},
+            {"T": "MSFT", "o": 400.0, "h": 401.0, "l": 380.0, "c": 380.0, "v": 3_000_000},
+            {"T": "ZZZQ", "o": 2.0, "h": 3.0, "l": 2.0, "c": 3.0, "v": 200_000},
+        ]
+
+    previous = getattr(app.state, "market", None)
+    app.state.market = MarketSnapshotService(fetch)
+    yield app.state.market
+    app.state.market = previous
+
+
+def test_market_top_reads_snapshot(client, market):
+    res = client.get("/market/top")
+    assert res.status_code == 200
+    data = {row["ticker"]: row for row in res.json()["data"]}
+    assert len(data) == 20
+    assert data["AAPL"] == {"ticker": "AAPL", "name": "Apple Inc.", "price": 105.0, "change_pct": 5.0,
+                            "high": 106.0, "low": 99.0, "volume": 5_000_000}
+    assert data["NVDA"]["price"] is None
+    assert client.get("/market/top").json()["cached"] is True
+    assert market.upstream_calls == 1
+
+
+def test_market_movers_and_bar_cover_any_ticker(client, market):
+    res = client.get("/market/movers?by=gainers&n=2")
+    assert [r["ticker"] for r in res.json()["data"]] == ["ZZZQ", "AAPL"]
+    assert client.get("/market/movers?by=losers&n=1").json()["data"][0]["ticker"] == "MSFT"
+    assert client.get("/market/movers?by=sideways").status_code == 422
+    assert client.get("/market/bar/zzzq").json()["data"]["close"] == 3.0
+    assert client.get("/market/bar/NOPE").status_code == 404
+
+
+# ── Risk ───────────────────────────────────────────────────────────────────────
+
+def fake_daily_returns(tickers, start, end):
+    import numpy as np
+    import pandas as pd
+    index = pd.bdate_range("2025-01-02", periods=60)
+    rng = np.random.default_rng(1)
+    returns = {t: pd.Series(rng.normal(0, 0.01 * (i + 1), 60), index=index) for i, t in enumerate(tickers) if t != "NONE"}
+    return pd.DataFrame(returns), ({"NONE": "No daily data returned from Polygon for NONE."} if "NONE" in tickers else {})
+
+
+def test_risk_reports_every_metric_per_ticker_and_level(client):
+    from src.stock_stats import historical_var
+    with patch("main.get_daily_returns", new_callable=AsyncMock, side_effect=fake_daily_returns):
+        res = client.get("/risk?tickers=AAPL,MSFT,NONE&confidence=0.99,0.95&window=20")
+    body = res.json()
+    assert res.status_code == 200 and body["confidence"] == [0.95, 0.99]
+    assert set(body["data"]) == {"AAPL", "MSFT"} and "NONE" in body["errors"]
+    aapl = body["data"]["AAPL"]
+    returns, _ = fake_daily_returns(["AAPL", "MSFT"], None, None)
+    assert aapl["var_historical"]["0.95"] == pytest.approx(historical_var(returns["AAPL"], 0.95))
+    assert aapl["cvar"]["0.99"] <= aapl["var_historical"]["0.99"] <= aapl["var_historical"]["0.95"]
+    assert body["data"]["MSFT"]["volatility"] > aapl["volatility"]
+    assert len(aapl["rolling"]["dates"]) == len(aapl["rolling"]["var_parametric"]["0.95"]) == 60 - 20 + 1
+
+
+def test_risk_rejects_bad_confidence(client):
+    assert client.get("/risk?tickers=AAPL&confidence=1.5").status_code == 400
+    assert client.get("/risk?tickers=AAPL&confidence=abc").status_code == 400
+
+
+def test_portfolio_risk_uses_broker_positions(client):
+    from src.broker import AsyncBroker, FakeBroker
+    fake = FakeBroker(prices={"AAPL": 100.0, "MSFT": 300.0})
+    fake.holdings = {"AAPL": (10.0, 90.0), "MSFT": (2.0, 250.0)}
+    token = make_test_token()
+    with patch("main.get_broker", return_value=AsyncBroker(fake)), \
+         patch("main.get_daily_returns", new_callable=AsyncMock, side_effect=fake_daily_returns) as returns:
+        res = client.get("/portfolio/risk?confidence=0.95", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    data = res.json()["data"]
+    assert sorted(returns.await_args.args[0]) == ["AAPL", "MSFT"]
+    assert data["value"] == 1600.0 and data["observations"] == 60
+    assert data["var_historical_dollars"]["0.95"] == pytest.approx(data["var_historical"]["0.95"] * 1600.0)
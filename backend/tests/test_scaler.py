@@ -0,0 +1,62 @@
+import pickle
+import numpy as np
+import pytest
+from sklearn.exceptions import NotFittedError
+from sklearn.preprocessing import MinMaxScaler
+from src.scaler import StreamingMinMaxScaler, load_scaler, save_scaler
+
+CLOSES = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 1000))
+
+
+def test_matches_sklearn():
+    ours = StreamingMinMaxScaler().fit(CLOSES)
+    ref = MinMaxScaler().fit(CLOSES.reshape(-1, 1))
+    for attr in ("data_min_", "data_max_", "data_range_", "scale_", "min_"):
+        np.testing.assert_allclose(getattr(ours, attr), getattr(ref, attr))
+    assert ours.n_samples_seen_ == ref.n_samples_seen_ == 1000
+    np.testing.assert_allclose(ours.transform(CLOSES.reshape(-1, 1)), ref.transform(CLOSES.reshape(-1, 1)))
+    np.testing.assert_allclose(ours.inverse_transform(ours.transform(CLOSES)), CLOSES)
+
+
+def test_partial_fit_equals_fit_on_everything():
+    streamed = StreamingMinMaxScaler()
+    for chunk in np.array_split(CLOSES, 7):
+        streamed.partial_fit(chunk)
+    full = StreamingMinMaxScaler().fit(CLOSES)
+    assert streamed.to_dict() == full.to_dict()
+    refit = StreamingMinMaxScaler().fit(CLOSES).fit(CLOSES[:10])   # fit() starts over
+    assert refit.n_samples_seen_ == 10 and refit.data_max_[0] == CLOSES[:10].max()
+
+
+def test_transform_in_place():
+    scaler = StreamingMinMaxScaler().fit(CLOSES)
+    expected = scaler.transform(CLOSES)
+    buf = CLOSES.copy()
+    assert scaler.transform(buf, out=buf) is buf
+    np.testing.assert_allclose(buf, expected)
+    assert scaler.inverse_transform(buf, out=buf) is buf
+    np.testing.assert_allclose(buf, CLOSES)
+
+
+def test_constant_series_and_clip():
+    scaler = StreamingMinMaxScaler().fit(np.full(5, 42.0))
+    assert scaler.transform(np.array([42.0]))[0] == 0.0
+    clipped = StreamingMinMaxScaler(clip=True).fit(np.array([10.0, 20.0]))
+    assert clipped.transform(np.array([5.0, 25.0])).tolist() == [0.0, 1.0]
+
+
+def test_rejects_unfitted_and_multi_column():
+    with pytest.raises(NotFittedError):
+        StreamingMinMaxScaler().transform(CLOSES)
+    with pytest.raises(ValueError):
+        StreamingMinMaxScaler().fit(np.ones((5, 2)))
+
+
+def test_round_trips_through_json_and_pickle(tmp_path):
+    scaler = StreamingMinMaxScaler(feature_range=(-1, 1)).fit(CLOSES)
+    save_scaler("aapl", scaler, directory=str(tmp_path))
+    loaded = load_scaler("AAPL", directory=str(tmp_path))
+    assert isinstance(loaded, MinMaxScaler) and loaded.to_dict() == scaler.to_dict()
+    np.testing.assert_allclose(loaded.transform(CLOSES), scaler.transform(CLOSES))
+    np.testing.assert_allclose(pickle.loads(pickle.dumps(scaler)).transform(CLOSES), scaler.transform(CLOSES))
+    assert load_scaler("MSFT", directory=str(tmp_path)) is None
@@ -1,5 +1,9 @@
+import logging
 import pytest
-from src.signal_generator import generate_signal
+import numpy as np
+from src.signal_generator import (
+    generate_signal, generate_signals, signal_labels, BUY, SELL, HOLD, SIGNAL_LABELS,
+)
 
 
 def test_buy_when_predicted_above_upper_bound():
@@ -58,3 +62,45 @@ def test_high_price_stock():
 
 def test_fractional_prices():
     assert generate_signal(predicted=1.05, current=1.00, threshold=0.01) == "Buy"
+
+
+# ── generate_signals (array form) ─────────────────────────────────────────────
+
+def test_generate_signals_codes():
+    codes = generate_signals([102.0, 98.0, 100.5], [100.0, 100.0, 100.0], threshold=0.01)
+    assert codes.dtype == np.int8
+    assert codes.tolist() == [BUY, SELL, HOLD]
+
+
+def test_generate_signals_matches_scalar():
+    rng = np.random.default_rng(0)
+    current = rng.uniform(1, 1000, 2000)
+    predicted = current * rng.uniform(0.97, 1.03, 2000)
+    labels = signal_labels(generate_signals(predicted, current))
+    assert labels.tolist() == [generate_signal(p, c) for p, c in zip(predicted, current)]
+
+
+def test_generate_signals_per_element_threshold():
+    codes = generate_signals([105.0, 105.0], [100.0, 100.0], threshold=[0.01, 0.10])
+    assert codes.tolist() == [BUY, HOLD]
+
+
+def test_generate_signals_boundaries_are_hold():
+    codes = generate_signals([101.0, 99.0], [100.0, 100.0], threshold=0.01)
+    assert codes.tolist() == [HOLD, HOLD]
+
+
+def test_signal_labels_round_trip():
+    assert SIGNAL_LABELS == {1: "Buy", -1: "Sell", 0: "Hold"}
+    assert signal_labels(np.array([1, -1, 0], dtype=np.int8)).tolist() == ["Buy", "Sell", "Hold"]
+
+
+def test_generate_signal_does_not_print(capsys):
+    generate_signal(predicted=102.0, current=100.0)
+    assert capsys.readouterr().out == ""
+
+
+def test_generate_signal_debug_is_opt_in(caplog):
+    with caplog.at_level(logging.DEBUG, logger="src.signal_generator"):
+        generate_signal(predicted=102.0, current=100.0)
+    assert "Predicted: 102.00" in caplog.text
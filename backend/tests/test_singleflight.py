@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from src.cache import TTLCache
+from src.singleflight import SingleFlight, get_or_refresh
+
+
+class SlowFetch:
+    """Async callable counting its calls; each call takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.05, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        n = self.calls
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"value-{n}"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight, fetch = SingleFlight(), SlowFetch()
+    results = await asyncio.gather(*(flight.do("AAPL", fetch) for _ in range(50)))
+    assert fetch.calls == 1
+    assert set(results) == {"value-1"}
+    assert not flight.in_flight("AAPL")
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flight, fetch = SingleFlight(), SlowFetch()
+    await asyncio.gather(flight.do("AAPL", fetch), flight.do("MSFT", fetch))
+    assert fetch.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter_and_is_not_cached():
+    flight, fetch = SingleFlight(), SlowFetch(fail=True)
+    results = await asyncio.gather(*(flight.do("AAPL", fetch) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert fetch.calls == 1
+
+    fetch.fail = False
+    assert await flight.do("AAPL", fetch) == "value-2"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight, fetch = SingleFlight(), SlowFetch(delay=0.1)
+    first = asyncio.ensure_future(flight.do("AAPL", fetch))
+    second = asyncio.ensure_future(flight.do("AAPL", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "value-1"
+    assert fetch.calls == 1
+
+
+# ── get_or_refresh ─────────────────────────────────────────────────────────────
+
+def age(cache, key, seconds):
+    cache._data[key].ts -= seconds
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_caches_within_ttl():
+    cache, flight, fetch = TTLCache("t-fresh", ttl=60), SingleFlight(), SlowFetch(delay=0)
+    assert await get_or_refresh(cache, "k", fetch, flight) == ("value-1", False)
+    assert await get_or_refresh(cache, "k", fetch, flight) == ("value-1", True)
+    assert fetch.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_miss_stampede_fetches_once():
+    cache, flight, fetch = TTLCache("t-stampede", ttl=60), SingleFlight(), SlowFetch()
+    results = await asyncio.gather(*(get_or_refresh(cache, "k", fetch, flight) for _ in range(20)))
+    assert fetch.calls == 1
+    assert {value for value, _ in results} == {"value-1"}
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_serves_stale_while_one_refresh_runs():
+    cache, flight, fetch = TTLCache("t-stale", ttl=60, stale_ttl=60), SingleFlight(), SlowFetch()
+    cache.set("k", "old")
+    age(cache, "k", 90)
+
+    results = await asyncio.gather(*(get_or_refresh(cache, "k", fetch, flight) for _ in range(10)))
+    assert results == [("old", True)] * 10
+    assert flight.in_flight(("t-stale", "k"))
+
+    await asyncio.sleep(fetch.delay * 2)
+    assert fetch.calls == 1
+    assert cache.get("k") == "value-1"
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_blocks_once_past_stale_window():
+    cache, flight, fetch = TTLCache("t-expired", ttl=60, stale_ttl=60), SingleFlight(), SlowFetch(delay=0)
+    cache.set("k", "old")
+    age(cache, "k", 500)
+    assert await get_or_refresh(cache, "k", fetch, flight) == ("value-1", False)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statistics import NormalDist
+from unittest.mock import AsyncMock, patch
+from src import stock_stats
+from src.stock_stats import (
+    daily_returns_from_bars, expected_shortfall, get_daily_return, historical_var, parametric_var,
+    portfolio_var, risk_metrics, rolling_risk_metrics, volatility,
+)
+
+RNG = np.random.default_rng(42)
+RETURNS = RNG.normal(0.0005, 0.02, (250, 3))
+
+
+def test_metrics_vectorise_over_tickers_and_levels():
+    levels = [0.9, 0.95, 0.99]
+    for fn in (historical_var, parametric_var, expected_shortfall):
+        matrix = fn(RETURNS, levels)
+        assert matrix.shape == (3, 3)
+        for i, level in enumerate(levels):
+            for j in range(3):
+                assert matrix[i, j] == pytest.approx(fn(RETURNS[:, j], level))
+
+
+def test_metric_definitions():
+    r = RETURNS[:, 0]
+    assert historical_var(r, 0.95) == pytest.approx(np.quantile(r, 0.05))
+    z = NormalDist().inv_cdf(0.01)
+    assert parametric_var(r, 0.99) == pytest.approx(r.mean() + z * r.std(ddof=1))
+    assert expected_shortfall(r, 0.95) == pytest.approx(r[r <= np.quantile(r, 0.05)].mean())
+    assert volatility(r) == pytest.approx(r.std(ddof=1) * np.sqrt(252))
+    with pytest.raises(ValueError):
+        historical_var(r, 1.0)
+
+
+def test_missing_days_are_ignored_per_ticker():
+    ragged = RETURNS.copy()
+    ragged[:50, 1] = np.nan
+    metrics = risk_metrics(ragged, (0.95, 0.99))
+    assert metrics["observations"].tolist() == [250, 200, 250]
+    assert metrics["cvar"][1, 1] == pytest.approx(expected_shortfall(RETURNS[50:, 1], 0.99))
+    assert metrics["var_parametric"][0, 1] == pytest.approx(parametric_var(RETURNS[50:, 1], 0.95))
+
+
+def test_rolling_matches_window_by_window():
+    r = RETURNS[:, 2]
+    rolling = rolling_risk_metrics(r, window=30, confidence=(0.95, 0.99))
+    assert rolling["var_historical"].shape == (2, 250 - 30 + 1)
+    for end in (29, 100, 249):
+        window = r[end - 29:end + 1]
+        assert rolling["var_historical"][1, end - 29] == pytest.approx(historical_var(window, 0.99))
+        assert rolling["volatility"][end - 29] == pytest.approx(volatility(window))
+    with pytest.raises(ValueError):
+        rolling_risk_metrics(r[:10], window=30)
+
+
+def test_portfolio_var_weights_by_market_value():
+    index = pd.bdate_range("2024-01-01", periods=250)
+    returns = pd.DataFrame(RETURNS[:, :2], index=index, columns=["AAPL", "MSFT"])
+    returns.iloc[0, 1] = np.nan
+    holdings = [{"ticker": "AAPL", "market_value": 3000.0}, {"ticker": "MSFT", "market_value": 1000.0}]
+    result = portfolio_var(holdings, returns, 0.95)
+    pnl = (returns.dropna() @ np.array([0.75, 0.25])).to_numpy()
+    assert result["value"] == 4000.0 and result["observations"] == 249
+    assert result["var_historical"] == pytest.approx(np.quantile(pnl, 0.05))
+    assert result["cvar_dollars"] == pytest.approx(result["cvar"] * 4000.0)
+    with pytest.raises(ValueError):
+        portfolio_var([{"ticker": "TSLA", "market_value": 1.0}], returns)
+
+
+def test_portfolio_var_handles_short_and_hedged_books():
+    index = pd.bdate_range("2024-01-01", periods=250)
+    returns = pd.DataFrame(RETURNS[:, :2], index=index, columns=["AAPL", "MSFT"])
+    short = portfolio_var([{"ticker": "AAPL", "market_value": -2000.0}], returns, 0.95)
+    # a short loses when the stock rallies: its loss tail is the upper tail of the returns
+    assert short["value"] == -2000.0 and short["gross_exposure"] == 2000.0
+    assert short["var_historical_dollars"] == pytest.approx(np.quantile(-2000.0 * RETURNS[:, 0], 0.05))
+    assert short["var_historical"] == pytest.approx(short["var_historical_dollars"] / 2000.0)
+    assert short["var_historical_dollars"] < 0
+
+    hedged = portfolio_var([{"ticker": "AAPL", "market_value": 1000.0},
+                            {"ticker": "MSFT", "market_value": -1000.0}], returns, 0.95)
+    assert hedged["value"] == 0.0 and hedged["gross_exposure"] == 2000.0
+    assert np.isfinite(hedged["var_historical"]) and hedged["var_historical_dollars"] < 0
+    with pytest.raises(ValueError):
+        portfolio_var([{"ticker": "AAPL", "market_value": 0.0}], returns)
+
+
+def test_daily_returns_from_bars_use_regular_session_close():
+    # 2025-03-03/04 are EST: 14:30 UTC = 9:30 ET, 21:00 UTC = 16:00 ET (after hours)
+    index = pd.to_datetime([
+        "2025-03-03 14:30", "2025-03-03 20:55", "2025-03-03 21:30",
+        "2025-03-04 14:30", "2025-03-04 20:55", "2025-03-04 23:00",
+    ])
+    bars = pd.DataFrame({"Close": [99.0, 100.0, 150.0, 101.0, 110.0, 1.0]}, index=index)
+    assert daily_returns_from_bars(bars) == pytest.approx([0.10])
+
+
+@pytest.mark.asyncio
+async def test_daily_returns_are_cached_per_ticker_and_widened_once():
+    stock_stats._returns_cache.clear()
+    days = pd.bdate_range("2024-01-01", "2024-12-31")
+
+    async def get_json(url, params):
+        start, end = url.split("/")[-2:]
+        span = days[(days >= start) & (days <= end)]
+        return {"results": [{"t": int(d.timestamp() * 1000), "c": 100.0 + i} for i, d in enumerate(span)]}
+
+    with patch("src.polygon_client.get_json", new_callable=AsyncMock, side_effect=get_json) as polygon:
+        q1 = await get_daily_return("aapl", "2024-03-01", "2024-06-30")
+        inner = await get_daily_return("AAPL", "2024-04-01", "2024-04-30")
+        wider = await get_daily_return("AAPL", "2024-01-01", "2024-06-30")
+        again = await get_daily_return("AAPL", "2024-02-01", "2024-03-31")
+    assert polygon.await_count == 2
+    assert polygon.await_args.args[0].endswith("/2024-01-01/2024-06-30")
+    assert inner.index.min() >= pd.Timestamp("2024-04-01") and inner.index.max() <= pd.Timestamp("2024-04-30")
+    assert len(wider) > len(q1) and again.index.min() >= pd.Timestamp("2024-02-01")
+    stock_stats._returns_cache.clear()
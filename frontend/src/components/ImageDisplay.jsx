@@ -9,7 +9,7 @@ const ImageDisplay = ({ stock }) => {
       setLoading(true);
       try {
         const apiUrl = import.meta.env.VITE_API_URL || "";
-        const response = await fetch(`${apiUrl}/predict?ticker=${stock}`);
+        const response = await fetch(`${apiUrl}/predict?ticker=${stock}&plot=png`);
         const data = await response.json();
         setPlotBase64(data.plot_base64);
       } catch (error) {
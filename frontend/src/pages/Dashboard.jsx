@@ -7,8 +7,8 @@ import {
   BarChart2
 } from 'lucide-react';
 import {
-  AreaChart, Area, XAxis, YAxis, CartesianGrid,
-  Tooltip, ResponsiveContainer
+  AreaChart, Area, LineChart, Line, XAxis, YAxis, CartesianGrid,
+  Tooltip, Legend, ResponsiveContainer
 } from 'recharts';
 
 const API = import.meta.env.VITE_API_URL || "";
@@ -409,6 +409,8 @@ const Dashboard = () => {
   };
 
   const handleLogout = () => {
+    // revoke the token server-side too; fire-and-forget
+    if (token) fetch(`${API}/logout`, { method: 'POST', headers: authHeaders(token) }).catch(() => {});
     setToken(null);
     setCurrentUser(null);
     setTransactions([]);
@@ -512,16 +514,6 @@ const Dashboard = () => {
     } catch { /* silent */ }
   };
 
-  /* ── Live prices (public) ──────────────────────────────────────────────── */
-  const fetchLivePrice = useCallback(async (ticker) => {
-    try {
-      const res = await fetch(`${API}/price/${ticker}`);
-      const result = await res.json();
-      if (res.ok) setLivePrices(prev => ({ ...prev, [ticker]: result }));
-    } catch { /* silent */ }
-  }, []);
-
-
   /* ── Price Alerts (protected) ──────────────────────────────────────────── */
   const fetchAlerts = useCallback(async () => {
     if (!token) return;
@@ -553,31 +545,6 @@ const Dashboard = () => {
     } catch { /* silent */ }
   };
 
-  // Check all active alerts against live prices every 30s
-  useEffect(() => {
-    if (!token || alerts.length === 0) return;
-    const check = async () => {
-      for (const alert of alerts) {
-        try {
-          const res = await fetch(`${API}/price/${alert.ticker}`);
-          if (!res.ok) continue;
-          const { price } = await res.json();
-          if (price == null) continue;
-          const hit = alert.condition === 'above' ? price >= alert.target_price
-                                                   : price <= alert.target_price;
-          if (hit) {
-            setTriggeredAlerts(prev => [...prev, { ...alert, current: price, id: Date.now() }]);
-            await fetch(`${API}/alerts/${alert._id}/check`, { method: 'POST', headers: authHeaders(token) });
-            setAlerts(prev => prev.filter(a => a._id !== alert._id));
-          }
-        } catch { /* silent */ }
-      }
-    };
-    check();
-    const id = setInterval(check, 30000);
-    return () => clearInterval(id);
-  }, [alerts, token]); // eslint-disable-line react-hooks/exhaustive-deps
-
   /* ── Transactions (protected) ──────────────────────────────────────────── */
   const fetchTransactions = useCallback(async () => {
     if (!token) return;
@@ -645,20 +612,30 @@ const Dashboard = () => {
     return () => clearInterval(id);
   }, [token, fetchTransactions]);
 
-  // Poll live prices every 30s — stagger requests by 700ms each to avoid
-  // hitting Polygon's free-tier rate limit (5 req/min) when watchlist grows.
-  useEffect(() => {
-    if (watchlist.length === 0) return;
-    const tickers = watchlist.map(w => w.ticker);
+  // Live prices + alerts over one WebSocket. The server polls each ticker once
+  // for every connected client and evaluates price alerts itself, pushing an
+  // "alert" message here when one of ours fires.
+  const streamTickers = [...new Set([...watchlist.map(w => w.ticker), ...alerts.map(a => a.ticker)])]
+    .sort().join(',');
 
-    const pollAll = () => {
-      tickers.forEach((t, i) => setTimeout(() => fetchLivePrice(t), i * 700));
+  useEffect(() => {
+    if (!streamTickers && !token) return;
+    const base = (API || window.location.origin).replace(/^http/, 'ws');
+    const ws = new WebSocket(`${base}/ws/prices${token ? `?token=${encodeURIComponent(token)}` : ''}`);
+    ws.onopen = () => {
+      if (streamTickers) ws.send(JSON.stringify({ subscribe: streamTickers.split(',') }));
     };
-
-    pollAll(); // immediate first run
-    const id = setInterval(pollAll, 30000);
-    return () => clearInterval(id);
-  }, [watchlist, fetchLivePrice]);
+    ws.onmessage = (event) => {
+      const msg = JSON.parse(event.data);
+      if (msg.type === 'price') {
+        setLivePrices(prev => ({ ...prev, [msg.ticker]: msg }));
+      } else if (msg.type === 'alert') {
+        setTriggeredAlerts(prev => [...prev, { ...msg, current: msg.price, id: Date.now() }]);
+        setAlerts(prev => prev.filter(a => a._id !== msg.alert_id));
+      }
+    };
+    return () => ws.close();
+  }, [streamTickers, token]);
 
   /* ── Search ────────────────────────────────────────────────────────────── */
   const handleSearch = () => {
@@ -818,12 +795,32 @@ const Dashboard = () => {
                 <Spinner />
                 <p className="text-xs text-zinc-600">Fetching prediction for {query}…</p>
               </div>
-            ) : data?.plot_base64 ? (
-              <img
-                src={`data:image/png;base64,${data.plot_base64}`}
-                alt={`${query} prediction chart`}
-                className="w-full rounded-xl"
-              />
+            ) : data?.series ? (
+              <div className="h-72">
+                <ResponsiveContainer width="100%" height="100%">
+                  <LineChart
+                    data={data.series.index.map((bar, i) => ({
+                      bar,
+                      actual: data.series.actual[i],
+                      predicted: data.series.predicted[i],
+                    }))}
+                    margin={{ top: 4, right: 4, left: -24, bottom: 0 }}
+                  >
+                    <CartesianGrid strokeDasharray="3 3" stroke="rgba(255,255,255,0.03)" />
+                    <XAxis dataKey="bar" hide />
+                    <YAxis
+                      domain={['auto', 'auto']}
+                      tick={{ fill: '#3f3f46', fontSize: 10 }}
+                      axisLine={false}
+                      tickLine={false}
+                    />
+                    <Tooltip contentStyle={{ background: '#111', border: '1px solid rgba(255,255,255,0.08)', fontSize: 12 }} />
+                    <Legend wrapperStyle={{ fontSize: 11 }} />
+                    <Line type="monotone" dataKey="actual" name="Actual" stroke="#a1a1aa" strokeWidth={1.5} dot={false} isAnimationActive={false} />
+                    <Line type="monotone" dataKey="predicted" name="Predicted" stroke="#34d399" strokeWidth={1.5} dot={false} isAnimationActive={false} />
+                  </LineChart>
+                </ResponsiveContainer>
+              </div>
             ) : (
               <div className="h-72">
                 <ResponsiveContainer width="100%" height="100%">
@@ -1030,7 +1027,7 @@ const Dashboard = () => {
               <h3 className="text-sm font-semibold text-white flex items-center gap-2">
                 <BookmarkCheck size={14} className="text-emerald-400" /> Watchlist
               </h3>
-              <span className="text-xs text-zinc-600">{watchlist.length} ticker{watchlist.length !== 1 ? 's' : ''} · updates every 30s</span>
+              <span className="text-xs text-zinc-600">{watchlist.length} ticker{watchlist.length !== 1 ? 's' : ''} · live</span>
             </div>
             <div className="divide-y divide-white/[0.03]">
               {watchlist.map(({ ticker }) => {
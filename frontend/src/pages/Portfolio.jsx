@@ -41,6 +41,8 @@ const Portfolio = () => {
   const [lastRefreshed, setLastRefreshed]   = useState(null);
 
   const handleLogout = () => {
+    // revoke the token server-side too; fire-and-forget
+    if (token) fetch(`${API}/logout`, { method: 'POST', headers: authHeaders(token) }).catch(() => {});
     localStorage.removeItem('token');
     localStorage.removeItem('user');
     setToken(null);